@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    """项目级配置，注册与具体业务 app 无关的全局信号"""
+    name = 'config'
+
+    def ready(self):
+        from .model_versions import connect_signals
+        connect_signals()
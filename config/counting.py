@@ -0,0 +1,123 @@
+"""
+分页总数统计策略
+
+CustomPageNumberPagination 每页都要执行一次 COUNT(*)，很多时候比取当前页数据还慢。
+这里提供可以按视图集选择的计数策略：
+
+- ExactCount：精确计数（默认，与原来行为一致）
+- CachedCount：按规范化后的查询缓存计数，设置过期时间，相关模型变化时立即失效
+- ApproximateCount：无过滤条件时读取数据库统计信息（SQLite 的 sqlite_stat1、
+  PostgreSQL 的 pg_class.reltuples），有过滤条件或没有统计信息时交给 fallback 策略
+
+使用方法:
+```python
+class UserViewSet(viewsets.ModelViewSet):
+    count_strategy = CachedCount(timeout=60)
+```
+"""
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import connections
+
+from .model_versions import get_model_versions
+
+
+class ExactCount:
+    """精确计数"""
+
+    def count(self, queryset):
+        """
+        Returns:
+            tuple: (总数, 是否精确)
+        """
+        return queryset.count(), True
+
+    async def acount(self, queryset):
+        """异步版本（异步视图集使用）：精确计数使用 QuerySet.acount()，其他策略在线程中执行 count()"""
+        if type(self).count is ExactCount.count:
+            return await queryset.acount(), True
+        return await sync_to_async(self.count)(queryset)
+
+
+class CachedCount(ExactCount):
+    """
+    缓存计数
+
+    缓存 key 由模型版本号和查询 SQL（含参数）的哈希组成，
+    同样的过滤条件共享一个缓存；模型增删改后版本号变化，缓存自动失效。
+
+    Args:
+        timeout: 缓存过期时间（秒），用于兜底不发送信号的批量操作
+        related_models: 过滤条件涉及的其他模型，它们变化时也让计数失效
+        cache_alias: 使用的 Django cache 别名
+    """
+
+    def __init__(self, timeout=60, related_models=(), cache_alias="default"):
+        self.timeout = timeout
+        self.related_models = tuple(related_models)
+        self.cache_alias = cache_alias
+
+    def get_cache_key(self, queryset):
+        models = (queryset.model,) + self.related_models
+        versions = get_model_versions(models)
+        # 计数与排序无关，去掉排序让不同排序的同一查询共享缓存
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.md5(f"{queryset.db}|{sql}|{params!r}".encode()).hexdigest()
+        version = ".".join(str(v) for v in versions)
+        return f"count:{queryset.model._meta.label_lower}:{version}:{digest}"
+
+    def count(self, queryset):
+        cache = caches[self.cache_alias]
+        key = self.get_cache_key(queryset)
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, self.timeout)
+        return total, True
+
+
+class ApproximateCount(ExactCount):
+    """
+    近似计数
+
+    只对没有过滤条件的查询生效，读取数据库维护的统计信息，不扫描表。
+    SQLite 需要执行过 ANALYZE 才有 sqlite_stat1。
+
+    Args:
+        fallback: 无法近似时使用的策略，默认精确计数
+    """
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or ExactCount()
+
+    def estimate(self, queryset):
+        """读取表的估计行数，不支持时返回 None"""
+        query = queryset.query
+        if query.where or query.distinct or query.combinator or query.is_sliced:
+            return None
+
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                # stat 的第一个数字是表（或索引）的行数
+                rows = [int(stat.split()[0]) for (stat,) in cursor.fetchall() if stat]
+                return max(rows) if rows else None
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+        return None
+
+    def count(self, queryset):
+        total = self.estimate(queryset)
+        if total is None:
+            return self.fallback.count(queryset)
+        return total, False
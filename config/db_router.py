@@ -0,0 +1,220 @@
+"""
+主从数据库路由
+
+写操作走主库（default），读操作随机分配到只读副本（settings.DB_ROUTER["REPLICAS"]），
+没有配置副本时所有操作都走主库，行为与不使用路由相同。
+
+读己之写（read-your-writes）：
+
+- 同一个请求中一旦发生写操作，之后的读都走主库
+- 发生写操作的请求结束后，ReplicaStickinessMiddleware 设置 Cookie，
+  并按用户 ID 在缓存中记录，STICKY_SECONDS 秒内该客户端/用户的读都走主库，
+  避免副本同步延迟导致刚写入的数据读不到
+
+需要始终读主库的视图设置 read_from_primary = True；任意代码块可以使用
+``with use_primary_db():`` 或 ``@use_primary_db()`` 强制读主库。
+
+注意：从副本读出的数据可能落后于主库。回填缓存的读（权限缓存、权限位图、菜单树、列表缓存）
+都包在 use_primary_db() 中，否则副本上的旧数据会被缓存到失效之后（如撤销的授权在缓存过期前仍然有效）；
+新增的缓存同样应该在回填时读主库。
+"""
+
+import random
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+# 默认配置
+DEFAULT_DB_ROUTER = {
+    "REPLICAS": [],                # 只读副本的数据库别名
+    "STICKY_SECONDS": 5,           # 写操作后读主库的时间窗口（秒）
+    "COOKIE_NAME": "db_primary",   # 记录时间窗口的 Cookie
+    "CACHE_ALIAS": "default",      # 按用户记录时间窗口的缓存
+    "KEY_PREFIX": "db_router:pin",
+}
+
+# 当前请求的状态（由中间件设置）与强制读主库的嵌套层数
+_request_state = ContextVar("db_router_request_state", default=None)
+_force_primary = ContextVar("db_router_force_primary", default=0)
+
+
+def get_db_router_config():
+    """合并 settings.DB_ROUTER 与默认配置"""
+    return {**DEFAULT_DB_ROUTER, **getattr(settings, "DB_ROUTER", {})}
+
+
+def _pin_key(config, user_id):
+    return f'{config["KEY_PREFIX"]}:{user_id}'
+
+
+def pin_user(user_id, config=None):
+    """用户在时间窗口内读主库"""
+    config = config or get_db_router_config()
+    caches[config["CACHE_ALIAS"]].set(_pin_key(config, user_id), 1, config["STICKY_SECONDS"])
+
+
+def is_user_pinned(user_id, config=None):
+    config = config or get_db_router_config()
+    return caches[config["CACHE_ALIAS"]].get(_pin_key(config, user_id)) is not None
+
+
+def _authenticated_user(request):
+    """
+    请求中已经确定的登录用户
+
+    AuthenticationMiddleware 设置的是懒加载对象，在这里求值会查询 session（又会经过路由），
+    因此只使用已经求值过的用户或 DRF 认证后设置的用户。
+    """
+    user = getattr(request, "user", None)
+    if user is None or isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user if getattr(user, "is_authenticated", False) else None
+
+
+class use_primary_db(ContextDecorator):
+    """
+    强制读主库
+
+    使用方法:
+    ```python
+    with use_primary_db():
+        user = User.objects.get(pk=pk)
+
+    @use_primary_db()
+    def refresh_tree(request): ...
+    ```
+    """
+
+    def __enter__(self):
+        self._token = _force_primary.set(_force_primary.get() + 1)
+        return self
+
+    def __exit__(self, *exc):
+        _force_primary.reset(self._token)
+        return False
+
+
+class RequestState:
+    """一个请求的读写状态"""
+
+    __slots__ = ("request", "pinned", "wrote", "_user_checked")
+
+    def __init__(self, request, pinned=False):
+        self.request = request
+        self.pinned = pinned
+        self.wrote = False
+        self._user_checked = False
+
+    def use_primary(self):
+        if self.pinned:
+            return True
+        if not self._user_checked:
+            # DRF 认证（JWT）在视图中进行，认证完成后才能按用户判断
+            user = _authenticated_user(self.request)
+            if user is not None:
+                self._user_checked = True
+                self.pinned = is_user_pinned(user.pk)
+        return self.pinned
+
+
+class PrimaryReplicaRouter:
+    """写主库、读副本的数据库路由"""
+
+    def _replicas(self):
+        return get_db_router_config()["REPLICAS"]
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas or _force_primary.get():
+            return PRIMARY
+        state = _request_state.get()
+        if state is not None and state.use_primary():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            # 同一请求之后的读都走主库
+            state.wrote = True
+            state.pinned = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *self._replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 副本由主库复制而来（sync_replica），不单独迁移
+        if db in self._replicas():
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    读己之写中间件
+
+    请求开始时根据 Cookie 决定是否读主库（按用户的记录在 DRF 认证之后检查）；
+    请求中发生写操作时，在响应中设置 Cookie 并按用户记录时间窗口。
+    也会检查视图的 read_from_primary 属性。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._finish(request, state, response)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._finish(request, state, response)
+
+    def _start(self, request):
+        state = RequestState(request, pinned=get_db_router_config()["COOKIE_NAME"] in request.COOKIES)
+        return state, _request_state.set(state)
+
+    def _finish(self, request, state, response):
+        config = get_db_router_config()
+        if state.wrote and config["REPLICAS"] and config["STICKY_SECONDS"]:
+            response.set_cookie(
+                config["COOKIE_NAME"], "1", max_age=config["STICKY_SECONDS"], httponly=True, samesite="Lax"
+            )
+            user = _authenticated_user(request)
+            if user is not None:
+                pin_user(user.pk, config)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF 的 as_view() 在视图函数上保存了视图类
+        view_class = getattr(view_func, "cls", None)
+        if getattr(view_func, "read_from_primary", False) or getattr(view_class, "read_from_primary", False):
+            state = _request_state.get()
+            if state is not None:
+                state.pinned = True
+        return None
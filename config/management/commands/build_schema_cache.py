@@ -0,0 +1,29 @@
+"""
+预先生成 OpenAPI schema 缓存（部署时执行一次）：
+
+    python manage.py build_schema_cache
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+from config.schema_cache import schema_cache
+
+
+class Command(BaseCommand):
+    help = "预先生成 OpenAPI schema 的 yaml/json 缓存（内存与磁盘）"
+
+    def handle(self, *args, **options):
+        schema_cache.clear()
+        self.stdout.write(f"缓存 key: {schema_cache.key}")
+        for renderer in (OpenApiYamlRenderer(), OpenApiJsonRenderer()):
+            start = time.perf_counter()
+            entry = schema_cache.get(renderer)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(
+                f"{renderer.format}: {len(entry.body)} 字节，gzip 后 {len(entry.gzipped)} 字节，"
+                f"ETag {entry.etag}，耗时 {elapsed:.0f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"已写入 {schema_cache.get_dir()}"))
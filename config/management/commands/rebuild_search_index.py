@@ -0,0 +1,43 @@
+"""
+重建全文索引影子表（见 mixins/view/search_backends.py）
+
+批量导入、QuerySet.update() 等不发送信号的操作之后执行：
+
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index rbac_app.User
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import get_resolver
+
+from mixins.view.search_backends import FTS5SearchBackend
+
+
+class Command(BaseCommand):
+    help = "删除并重建声明了 search_fields 的模型的 FTS5 影子表"
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="只重建这些模型，格式为 app_label.Model")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        # 导入所有视图，视图集定义时会注册搜索后端
+        get_resolver().url_patterns
+        backends = FTS5SearchBackend.registered()
+        if options["models"]:
+            labels = {label.lower() for label in options["models"]}
+            backends = [backend for backend in backends if backend.model._meta.label_lower in labels]
+        if not backends:
+            self.stdout.write("没有使用 FTS5SearchBackend 的视图集，无需重建")
+            return
+
+        for backend in backends:
+            start = time.perf_counter()
+            if backend.rebuild(options["database"]):
+                elapsed = (time.perf_counter() - start) * 1000
+                self.stdout.write(f"{backend.model._meta.label} -> {backend.table}：{elapsed:.0f} ms")
+            else:
+                self.stdout.write(self.style.WARNING(f"{backend.model._meta.label}：数据库不支持 FTS5，已跳过"))
@@ -0,0 +1,56 @@
+"""
+把主库复制到只读副本（见 config/db_router.py）
+
+本地用两个 SQLite 文件模拟主从时，副本不会自动同步，写入主库后执行：
+
+    python manage.py sync_replica
+    python manage.py sync_replica replica1
+
+使用 SQLite 在线备份 API 逐页复制，主库在复制过程中仍可读写。
+"""
+
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from config.db_router import get_db_router_config
+
+
+class Command(BaseCommand):
+    help = "使用 SQLite 备份 API 把主库复制到只读副本"
+
+    def add_arguments(self, parser):
+        parser.add_argument("replicas", nargs="*", help="只同步这些副本（数据库别名），默认全部")
+        parser.add_argument("--pages", type=int, default=1024, help="每一步复制的页数，-1 表示一次复制全部")
+
+    def handle(self, *args, **options):
+        configured = get_db_router_config()["REPLICAS"]
+        replicas = options["replicas"] or configured
+        if not replicas:
+            self.stdout.write("没有配置只读副本（settings.DB_ROUTER['REPLICAS']），无需同步")
+            return
+        unknown = [alias for alias in replicas if alias not in configured]
+        if unknown:
+            raise CommandError(f"不是只读副本：{', '.join(unknown)}")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("sync_replica 只支持 SQLite，其他数据库请使用数据库自身的复制功能")
+        primary.ensure_connection()
+
+        for alias in replicas:
+            replica = connections[alias]
+            if replica.vendor != "sqlite":
+                raise CommandError(f"{alias} 不是 SQLite 数据库")
+            # 关闭 Django 持有的副本连接，复制完成后重新打开
+            replica.close()
+            start = time.perf_counter()
+            target = sqlite3.connect(replica.settings_dict["NAME"])
+            try:
+                primary.connection.backup(target, pages=options["pages"])
+            finally:
+                target.close()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"{DEFAULT_DB_ALIAS} -> {alias}：{elapsed:.0f} ms")
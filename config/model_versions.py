@@ -0,0 +1,77 @@
+"""
+模型版本号
+
+每个模型在 Django cache 中维护一个版本号，post_save、post_delete、m2m_changed 时递增。
+列表计数、查询结果等缓存把相关模型的版本号放进缓存 key，模型一有变化旧缓存就不再命中。
+
+信号中立即递增一次，并在事务提交后再递增一次，
+避免事务提交前其他请求按新版本号缓存了旧数据。
+
+注意：QuerySet.update() 和 bulk_create() 等批量操作不会发送信号，
+因此依赖版本号的缓存都应该同时设置过期时间。
+"""
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+MODEL_VERSION_CACHE_ALIAS = "default"
+MODEL_VERSION_KEY_PREFIX = "model_version"
+
+
+def _key(model):
+    return f"{MODEL_VERSION_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def get_model_version(model):
+    """获取模型的当前版本号"""
+    return caches[MODEL_VERSION_CACHE_ALIAS].get_or_set(_key(model), 1, None)
+
+
+def get_model_versions(models):
+    """
+    批量获取多个模型的版本号（一次缓存访问）
+
+    Returns:
+        tuple: 与 models 顺序一致的版本号
+    """
+    cache = caches[MODEL_VERSION_CACHE_ALIAS]
+    keys = [_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_model_version(*models):
+    """递增模型版本号"""
+    cache = caches[MODEL_VERSION_CACHE_ALIAS]
+    for model in {model._meta.concrete_model for model in models}:
+        key = _key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, None)
+
+
+def _bump_now_and_on_commit(models, using):
+    bump_model_version(*models)
+    transaction.on_commit(lambda: bump_model_version(*models), using=using)
+
+
+def _model_saved_or_deleted(sender, using=None, **kwargs):
+    _bump_now_and_on_commit((sender,), using)
+
+
+def _m2m_changed(sender, instance, action, model, using=None, **kwargs):
+    if action.startswith("post_"):
+        _bump_now_and_on_commit((sender, type(instance), model), using)
+
+
+def connect_signals():
+    """连接全局信号（在 AppConfig.ready 中调用）"""
+    post_save.connect(_model_saved_or_deleted, dispatch_uid="model_versions_post_save")
+    post_delete.connect(_model_saved_or_deleted, dispatch_uid="model_versions_post_delete")
+    m2m_changed.connect(_m2m_changed, dispatch_uid="model_versions_m2m_changed")
@@ -1,28 +1,95 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import partial
+
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from django.conf import settings
+
+from .counting import ExactCount
+
 #自定义配置返回字段
 DEFAULT_PAGINATION_KEYS = {
     "count": "total",
+    "count_exact": "total_exact",
     "next": "next_page",
     "previous": "prev_page",
     "results": "items",
+    "facets": "facets",  # 搜索视图集的分面计数（见 mixins/view/facets.py）
 }
-class CustomPageNumberPagination(PageNumberPagination):
+class PaginationKeyMixin:
+    def get_key(self, key):
+        """从配置中取分页字段映射，没有就使用当前文件的DEFAULT_PAGINATION_KEYS"""
+        keys = getattr(settings, 'CUSTOM_PAGINATION_KEYS', DEFAULT_PAGINATION_KEYS)
+        return keys.get(key, key)  # 如果没配置，则保留原字段名
+
+
+class CountingPaginator(DjangoPaginator):
+    """使用计数策略（见 config.counting）统计总数的 Django Paginator"""
+
+    def __init__(self, *args, count_strategy=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        total, self.count_exact = self.count_strategy.count(self.object_list)
+        return total
+
+
+class CustomPageNumberPagination(PaginationKeyMixin, PageNumberPagination):
     # 自定义请求参数名
     page_query_param = 'page'            # 请求页码参数名，默认是 'page'
     page_size_query_param = 'page_size'    # 请求每页条数参数名，默认是 'page_size'
     max_page_size = 100
     page_size = 10
+    # 默认计数策略，视图集可以通过 count_strategy 属性覆盖
+    count_strategy = ExactCount()
 
-    def get_key(self, key):
-        """从配置中取分页字段映射，没有就使用当前文件的DEFAULT_PAGINATION_KEYS"""
-        keys = getattr(settings, 'CUSTOM_PAGINATION_KEYS', DEFAULT_PAGINATION_KEYS)
-        return keys.get(key, key)  # 如果没配置，则保留原字段名
+    def paginate_queryset(self, queryset, request, view=None):
+        count_strategy = getattr(view, 'count_strategy', None) or self.count_strategy
+        self.django_paginator_class = partial(CountingPaginator, count_strategy=count_strategy)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        异步版本的 paginate_queryset（异步视图集使用）
+
+        计数使用计数策略的 acount()，当前页通过 aiterator() 读取，返回结构与同步版本一致。
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        count_strategy = getattr(view, 'count_strategy', None) or self.count_strategy
+        paginator = CountingPaginator(queryset, page_size, count_strategy=count_strategy)
+        # 预先填充 count（cached_property），Paginator 不会再同步计数
+        paginator.count, paginator.count_exact = await count_strategy.acount(queryset)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        object_list = self.page.object_list
+        if isinstance(object_list, QuerySet):
+            # 带 prefetch_related 的 aiterator() 必须指定 chunk_size
+            object_list = [obj async for obj in object_list.aiterator(chunk_size=page_size)]
+        self.page.object_list = list(object_list)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
 
     def get_paginated_response(self, data):
         return Response({
             self.get_key("count"): self.page.paginator.count,
+            self.get_key("count_exact"): getattr(self.page.paginator, 'count_exact', True),
             self.get_key("next"): self.get_next_link(),
             self.get_key("previous"): self.get_previous_link(),
             self.get_key("results"): data,
@@ -37,6 +104,11 @@ class CustomPageNumberPagination(PageNumberPagination):
                     'type': 'integer',
                     'example': 123,
                 },
+                self.get_key("count_exact"): {
+                    'type': 'boolean',
+                    'example': True,
+                    'description': '总数是否精确（近似计数策略下为 false）',
+                },
                 self.get_key("next"): {
                     'type': 'string',
                     'nullable': True,
@@ -51,4 +123,89 @@ class CustomPageNumberPagination(PageNumberPagination):
                 },
                 self.get_key("results"): schema,
             },
-        }
\ No newline at end of file
+        }
+
+
+class CustomCursorPagination(PaginationKeyMixin, CursorPagination):
+    """
+    键集（游标）分页
+
+    按索引字段做 WHERE id > ? 的范围查询，不使用 OFFSET，翻到再深的页也不会变慢；
+    返回结构与 CustomPageNumberPagination 一致（同样使用 CUSTOM_PAGINATION_KEYS 映射）。
+    游标是不透明的 base64 字符串，从 next_page / prev_page 链接中获取。
+
+    总数需要一次 COUNT(*)，默认不计算（total 返回 null），
+    请求时带上 with_total=1 或把 include_total 设为 True 才计算。
+
+    视图可以通过 cursor_ordering 属性指定排序字段，必须是不变且唯一（或接近唯一）的索引字段，
+    如 "-id" 或 ("-date_joined", "-id")。
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    page_size = 10
+    ordering = '-id'
+    include_total = False
+    include_total_query_param = 'with_total'
+
+    def get_ordering(self, request, queryset, view):
+        cursor_ordering = getattr(view, 'cursor_ordering', None)
+        if cursor_ordering:
+            return (cursor_ordering,) if isinstance(cursor_ordering, str) else tuple(cursor_ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def should_include_total(self, request):
+        value = request.query_params.get(self.include_total_query_param)
+        if value is None:
+            return self.include_total
+        return value.lower() in ('1', 'true', 'yes')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = queryset.count() if self.should_include_total(request) else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            self.get_key("count"): self.total,
+            self.get_key("next"): self.get_next_link(),
+            self.get_key("previous"): self.get_previous_link(),
+            self.get_key("results"): data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': [self.get_key("count"), self.get_key("results")],
+            'properties': {
+                self.get_key("count"): {
+                    'type': 'integer',
+                    'nullable': True,
+                    'example': 123,
+                    'description': f'总数，仅在 {self.include_total_query_param}=1 时计算，否则为 null',
+                },
+                self.get_key("next"): {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                    'example': f'http://api.example.org/list/?{self.cursor_query_param}=cD00ODY%3D',
+                },
+                self.get_key("previous"): {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                    'example': f'http://api.example.org/list/?{self.cursor_query_param}=cj0xJnA9NDg3',
+                },
+                self.get_key("results"): schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.include_total_query_param,
+            'required': False,
+            'in': 'query',
+            'description': '是否计算总数（需要一次 COUNT 查询）',
+            'schema': {'type': 'boolean'},
+        })
+        return parameters
@@ -1,6 +1,10 @@
+import hashlib
+import json
 
+from django.http import StreamingHttpResponse
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.compat import SHORT_SEPARATORS, LONG_SEPARATORS
 
 #配置返回结构
 RESPONSE_TEMPLATE_CONFIG = {
@@ -11,82 +15,274 @@ RESPONSE_TEMPLATE_CONFIG = {
         "data": {"type": "any", "default": None}, #detault为None代表返回数据的schema结构
     }
 }
+class ResponseTemplate:
+    """
+    编译后的响应模板
+
+    在导入时（或调用 reload_response_template 时）把 RESPONSE_TEMPLATE_CONFIG 解析一次：
+    确定 code / msg / data 各自对应的字段、常量字段的默认值，
+    并预先编码成功响应中 data 前后的 JSON 字节，渲染时只需要序列化 data 再拼接。
+    """
+
+    def __init__(self, cfg):
+        field_order = cfg["field_order"]
+        fields = cfg["fields"]
+        self.field_order = tuple(field_order)
+        self.keys = frozenset(field_order)
+        self.code_key = field_order[0]  # 通常是 code 字段
+        self.msg_keys = frozenset(
+            key for key in field_order[1:] if "msg" in key or "message" in key
+        )
+        # data 占位字段：default 为 None
+        self.data_keys = frozenset(
+            key for key in field_order[1:]
+            if key not in self.msg_keys and fields[key].get("default") is None
+        )
+        self.defaults = {key: fields[key].get("default") for key in field_order}
+        self.code_default = fields[self.code_key].get("default", 0)
+        self.msg_defaults = {key: fields[key].get("default", "success") for key in self.msg_keys}
+        self._encoded = {}
+
+    def build(self, data=None, code=None, message=None):
+        """按模板组装响应字典（与原 build_response 行为一致）"""
+        resp = {}
+        for key in self.field_order:
+            if key == self.code_key:
+                resp[key] = code if code is not None else self.code_default
+            elif key in self.msg_keys:
+                resp[key] = message if message is not None else self.msg_defaults[key]
+            elif key in self.data_keys:
+                resp[key] = data
+            else:
+                resp[key] = self.defaults[key]
+        return resp
+
+    def build_custom(self, data=None, code=None, msg=None):
+        """按模板组装响应字典（与原 custom_response 行为一致）"""
+        overrides = {"code": code, "msg": msg}
+        result = {}
+        for key in self.field_order:
+            default = self.defaults[key]
+            if default is None:
+                result[key] = data
+            else:
+                result[key] = overrides.get(key, default)
+        return result
+
+    def encoded_parts(self, dumps):
+        """
+        成功响应中 data 前后的 JSON 字节（按编码参数缓存）
+
+        Args:
+            dumps: 与渲染器参数一致的 json 序列化函数，同时作为缓存 key
+
+        Returns:
+            tuple: (前缀字节, 后缀字节)；模板中没有唯一的 data 字段时返回 None
+        """
+        parts = self._encoded.get(dumps.key)
+        if parts is None and len(self.data_keys) == 1:
+            marker = "__response_data_placeholder__"
+            text = dumps(self.build(data=marker))
+            prefix, suffix = text.split(dumps(marker), 1)
+            parts = self._encoded[dumps.key] = (prefix.encode(), suffix.encode())
+        return parts
+
+
+def compile_response_template():
+    """根据 RESPONSE_TEMPLATE_CONFIG 编译响应模板"""
+    return ResponseTemplate(RESPONSE_TEMPLATE_CONFIG)
+
+
+response_template = compile_response_template()
+
+
+def reload_response_template():
+    """运行时修改 RESPONSE_TEMPLATE_CONFIG 后调用，重新编译响应模板"""
+    global response_template
+    response_template = compile_response_template()
+    return response_template
+
+
 def build_response(data=None, code=None, message=None, is_error=False):
-    cfg = RESPONSE_TEMPLATE_CONFIG
-    resp = {}
-    for key in cfg["field_order"]:
-        field = cfg["fields"][key]
+    return response_template.build(data=data, code=code, message=message)
+
+
+class _Dumps:
+    """与 JSONRenderer.render 参数一致的 json.dumps（不缩进）"""
 
-        if key == cfg["field_order"][0]:  # 通常是 code 字段
-            resp[key] = code if code is not None else field.get("default", 0)
-        elif "msg" in key or "message" in key:
-            resp[key] = message if message is not None else field.get("default", "success")
-        elif field.get("default") is None:
-            resp[key] = data  # data 占位字段 → 替换为实际数据
-        else:
-            resp[key] = field.get("default")
+    def __init__(self, renderer):
+        separators = SHORT_SEPARATORS if renderer.compact else LONG_SEPARATORS
+        self.key = (renderer.encoder_class, renderer.ensure_ascii, renderer.strict, separators)
+        self.kwargs = dict(
+            cls=renderer.encoder_class, ensure_ascii=renderer.ensure_ascii,
+            allow_nan=not renderer.strict, separators=separators,
+        )
+
+    def __call__(self, value):
+        return json.dumps(value, **self.kwargs)
 
-    return resp
 
 #将django drf 返回的内容包装成模板
 class CustomRenderer(JSONRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
         response = renderer_context.get("response", None)
-        template_keys = set(RESPONSE_TEMPLATE_CONFIG["field_order"])
+        template = response_template
         """
         如果返回的数据是字典
         且已经包含了配置中要求的所有字段（如 code、message、data）
         就直接返回（说明已经是标准格式了，不需要重复包装）
         """
-        if isinstance(data, dict) and template_keys <= set(data.keys()):
+        if isinstance(data, dict) and data.keys() >= template.keys:
             return super().render(data, accepted_media_type, renderer_context)
         """
         处理错误响应
         """
-        if response and not str(response.status_code).startswith("2"):
+        if response and not 200 <= response.status_code < 300:
             code = response.status_code
             message = data.get("detail") if isinstance(data, dict) and 'detail' in data else data
-            return super().render(build_response(code=code, message=message, is_error=True), accepted_media_type, renderer_context)
+            return super().render(template.build(code=code, message=message), accepted_media_type, renderer_context)
         """
         如果结构不对，那就把 data 包进响应模板中。
+        不缩进时只序列化 data，再拼接预先编码好的前后缀。
         """
-        return super().render(build_response(data=data), accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context) is None:
+            parts = template.encoded_parts(self._get_dumps())
+            if parts is not None:
+                payload = super().render(data, accepted_media_type, renderer_context) if data is not None else b"null"
+                return parts[0] + payload + parts[1]
+        return super().render(template.build(data=data), accepted_media_type, renderer_context)
+
+    def _get_dumps(self):
+        dumps = self.__class__.__dict__.get("_dumps")
+        if dumps is None:
+            dumps = _Dumps(self)
+            self.__class__._dumps = dumps
+        return dumps
+
+def stream_response_envelope(rows, renderer=None):
+    """
+    以模板结构流式输出列表：先输出 data 之前的字节，再逐行输出序列化后的数据，最后输出后缀
+
+    同一时刻只有一行数据在内存中，首字节不需要等待整个列表序列化完成。
+    模板中没有唯一的 data 字段时无法拼接，退回到 CustomRenderer 一次性渲染整个列表。
+
+    Args:
+        rows: 可迭代的已序列化数据（字典），通常来自查询集的 iterator()
+        renderer: 提供 JSON 编码参数的渲染器，默认 CustomRenderer
+    """
+    renderer = renderer or CustomRenderer()
+    dumps = renderer._get_dumps()
+    parts = response_template.encoded_parts(dumps)
+    if parts is None:
+        yield renderer.render(list(rows))
+        return
+    prefix, suffix = parts
+    yield prefix + b"["
+    separator = b""
+    for row in rows:
+        text = dumps(row).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        yield separator + text.encode()
+        separator = b","
+    yield b"]" + suffix
+
+
+class StreamingEnvelopeResponse(StreamingHttpResponse):
+    """
+    流式响应：输出结构与 CustomRenderer 一致的 {code, msg, data: [...]}
+    """
+
+    def __init__(self, rows, status=200, renderer=None, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(stream_response_envelope(rows, renderer), status=status, **kwargs)
+
 
 # 将django drf spectacular返回的schema格式封装成模板
+ENVELOPE_BASE_NAME = "EnvelopeBase"
+ENVELOPE_PREFIX = "Envelope_"
+
+
+def _schema_ref(name):
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+def _envelope_name(schema, digest):
+    """
+    包装后组件的名称：
+
+    - {"$ref": ".../User"}                        -> Envelope_User
+    - {"type": "array", "items": {"$ref": ".../User"}} -> Envelope_UserList
+    - 其他内联 schema                              -> Envelope_<内容哈希>
+    """
+    ref = schema.get("$ref")
+    if ref is None and schema.get("type") == "array" and set(schema) <= {"type", "items"}:
+        item_ref = schema.get("items", {}).get("$ref")
+        if item_ref:
+            return f"{ENVELOPE_PREFIX}{item_ref.rsplit('/', 1)[-1]}List"
+    if ref is not None and len(schema) == 1:
+        return f"{ENVELOPE_PREFIX}{ref.rsplit('/', 1)[-1]}"
+    return f"{ENVELOPE_PREFIX}{digest[:8]}"
+
+
 def wrap_schema_with_three_stage(result, generator, request, public):
+    """
+    把所有响应的 schema 包装成模板结构
+
+    code / msg 等常量字段只定义一次，放在共享组件 EnvelopeBase 中；
+    每种不同的 data schema 生成一个 Envelope_<Name> 组件（allOf: [EnvelopeBase, {data}]），
+    相同的 data schema 只生成一个组件，响应中只保留 $ref。
+    """
     if "components" not in result:
         return result
 
     cfg = RESPONSE_TEMPLATE_CONFIG
     field_order = cfg["field_order"]
     field_definitions = cfg["fields"]
+    data_keys = [key for key in field_order if field_definitions[key].get("default") is None]
+    base_keys = [key for key in field_order if key not in data_keys]
+
+    schemas = result["components"].setdefault("schemas", {})
+    schemas[ENVELOPE_BASE_NAME] = {
+        "type": "object",
+        "properties": {
+            key: {k: v for k, v in field_definitions[key].items() if k != "default"}
+            for key in base_keys
+        },
+        "required": base_keys,
+    }
+    base_ref = _schema_ref(ENVELOPE_BASE_NAME)
+    envelopes = {}  # data schema 的规范化 JSON -> 组件名
 
     for path_item in result.get("paths", {}).values():
         for operation in path_item.values():
+            if not isinstance(operation, dict):
+                continue
             responses = operation.get("responses", {})
             for response in responses.values():
                 for content_schema in response.get("content", {}).values():
                     original_schema = content_schema.get("schema")
-                    if original_schema:
-                        properties = {}
-                        required = []
-
-                        for key in field_order:
-                            field = field_definitions[key]
-                            if field.get("default") is None:
-                                # data 占位字段 → 使用原始 schema
-                                properties[key] = original_schema
-                            else:
-                                properties[key] = {
-                                    k: v for k, v in field.items() if k != "default"
-                                }
-                            required.append(key)
-
-                        content_schema["schema"] = {
-                            "type": "object",
-                            "properties": properties,
-                            "required": required
+                    if not original_schema:
+                        continue
+                    canonical = json.dumps(original_schema, sort_keys=True, default=str)
+                    name = envelopes.get(canonical)
+                    if name is None:
+                        digest = hashlib.sha256(canonical.encode()).hexdigest()
+                        name = _envelope_name(original_schema, digest)
+                        if name in schemas:
+                            # 名称冲突（如与已有组件同名）时改用内容哈希
+                            name = f"{ENVELOPE_PREFIX}{digest[:8]}"
+                        schemas[name] = {
+                            "allOf": [
+                                base_ref,
+                                {
+                                    "type": "object",
+                                    "properties": {key: original_schema for key in data_keys},
+                                    "required": data_keys,
+                                },
+                            ]
                         }
+                        envelopes[canonical] = name
+                    content_schema["schema"] = _schema_ref(name)
 
     return result
 
@@ -98,21 +294,4 @@ def custom_response(data=None, code=None, msg=None, status=None, **kwargs):
     - msg: 提示信息，可覆盖配置默认
     - status: DRF 的 HTTP 状态码（默认自动判断）
     """
-    cfg = RESPONSE_TEMPLATE_CONFIG
-    field_order = cfg["field_order"]
-    fields = cfg["fields"]
-
-    result = {}
-    for field in field_order:
-        default = fields[field].get("default")
-
-        # data 字段特殊处理：default=None 说明它占位实际响应体
-        if default is None:
-            result[field] = data
-        else:
-            result[field] = {
-                "code": code,
-                "msg": msg
-            }.get(field, default)
-
-    return Response(result, status=status, **kwargs)
\ No newline at end of file
+    return Response(response_template.build_custom(data=data, code=code, msg=msg), status=status, **kwargs)
@@ -0,0 +1,281 @@
+"""
+OpenAPI schema 缓存
+
+drf-spectacular 每次请求 /schema/ 都会重新遍历所有视图生成文档，
+POSTPROCESSING_HOOKS（wrap_schema_with_three_stage）还要再遍历一遍所有路径，冷生成需要数秒。
+
+这里把生成结果按“URLconf 哈希 + 代码版本”缓存：
+
+- 一级缓存：进程内字典，命中时直接返回渲染好的字节
+- 二级缓存：磁盘文件（同一次部署的多个进程/重启后共享）
+
+每种格式（yaml/json）同时保存原始字节和预先 gzip 压缩的字节，以及基于内容的 ETag
+（两种编码是不同的字节，gzip 版本的 ETag 带 -gzip 后缀）。
+部署时可以执行 ``python manage.py build_schema_cache`` 预先生成，首个请求就不会冷启动。
+
+可在 settings 中通过 SCHEMA_CACHE 覆盖默认配置。
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+# 默认配置
+DEFAULT_SCHEMA_CACHE = {
+    "ENABLED": True,                        # 关闭后退化为每次重新生成
+    "DIR": None,                            # 磁盘缓存目录，None 表示 BASE_DIR/.schema_cache；False 表示不落盘
+    "CODE_VERSION": "",                     # 代码版本（如 git commit），为空时使用源码文件指纹
+    "GZIP_LEVEL": 9,                        # 预压缩级别，只在构建时执行一次
+}
+
+# 计算源码指纹时跳过的目录
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__", "migrations", ".schema_cache"}
+
+_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def get_schema_cache_config():
+    """合并 settings.SCHEMA_CACHE 与默认配置"""
+    return {**DEFAULT_SCHEMA_CACHE, **getattr(settings, "SCHEMA_CACHE", {})}
+
+
+# ---------- 缓存 key ----------
+def _walk_urlpatterns(patterns, prefix=""):
+    """按顺序展开 URLconf，生成 (路由, 视图标识) 二元组"""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _walk_urlpatterns(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            callback = pattern.callback
+            view = getattr(callback, "cls", callback)
+            actions = getattr(callback, "actions", None) or {}
+            yield route, f"{view.__module__}.{view.__qualname__}:{sorted(actions.items())}"
+
+
+def get_urlconf_hash(urlconf=None):
+    """URLconf 的哈希：路由或视图有增删改时变化"""
+    digest = hashlib.sha256()
+    for route, view in _walk_urlpatterns(get_resolver(urlconf).url_patterns):
+        digest.update(f"{route}\0{view}\n".encode())
+    return digest.hexdigest()
+
+
+def get_source_fingerprint(root=None):
+    """
+    源码指纹：项目内所有 .py 文件的路径、修改时间与大小
+
+    没有配置 CODE_VERSION 时用它代表代码版本，序列化器、视图的修改都会使缓存失效。
+    """
+    root = Path(root or settings.BASE_DIR)
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                digest.update(f"{os.path.relpath(path, root)}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def get_code_version():
+    """代码版本：优先使用配置的 CODE_VERSION，其次是源码指纹"""
+    return get_schema_cache_config()["CODE_VERSION"] or get_source_fingerprint()
+
+
+def compute_cache_key(urlconf=None):
+    """缓存 key：URLconf 哈希 + 代码版本 + 文档相关配置"""
+    parts = (
+        get_urlconf_hash(urlconf),
+        get_code_version(),
+        drf_spectacular.__version__,
+        str(spectacular_settings.VERSION),
+        settings.LANGUAGE_CODE,
+    )
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+
+
+# ---------- 缓存条目 ----------
+@dataclass(frozen=True)
+class CachedSchema:
+    """某一格式的 schema 渲染结果"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body, gzipped=None, level=9):
+        if gzipped is None:
+            # mtime=0 保证相同内容压缩出相同字节
+            gzipped = gzip.compress(body, compresslevel=level, mtime=0)
+        return cls(body, gzipped, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    @property
+    def gzip_etag(self):
+        """gzip 编码的 ETag：强 ETag 要求字节完全一致，不能与原始字节共用"""
+        return f'{self.etag[:-1]}-gzip"'
+
+
+class SchemaCache:
+    """
+    OpenAPI schema 缓存，进程内单例见 schema_cache
+
+    缓存 key 在进程内只计算一次（URLconf 与源码在进程运行期间不会变化；
+    开发服务器修改代码后会自动重启进程）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._entries = {}  # 格式 -> CachedSchema
+        self._schema = None  # 生成的 schema 字典，多种格式共用一次生成结果
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = compute_cache_key()
+        return self._key
+
+    def get_dir(self):
+        directory = get_schema_cache_config()["DIR"]
+        if directory is False:
+            return None
+        return Path(directory or Path(settings.BASE_DIR) / ".schema_cache")
+
+    def _paths(self, fmt):
+        directory = self.get_dir()
+        if directory is None:
+            return None, None
+        base = directory / f"{self.key}.{fmt}"
+        return base, base.with_name(base.name + ".gz")
+
+    # ---------- 磁盘 ----------
+    def _load_from_disk(self, fmt):
+        path, gz_path = self._paths(fmt)
+        if path is None:
+            return None
+        try:
+            return CachedSchema.from_body(path.read_bytes(), gz_path.read_bytes())
+        except OSError:
+            return None
+
+    def _save_to_disk(self, fmt, entry):
+        path, gz_path = self._paths(fmt)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免其他进程读到写了一半的文件
+            for target, content in ((gz_path, entry.gzipped), (path, entry.body)):
+                tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+                tmp.write_bytes(content)
+                os.replace(tmp, target)
+            # 清理旧版本的缓存文件
+            for stale in path.parent.glob(f"*.{fmt}*"):
+                if not stale.name.startswith(self.key):
+                    stale.unlink(missing_ok=True)
+        except OSError:
+            # 磁盘缓存只是优化，写入失败时仍然可以使用进程内缓存
+            pass
+
+    # ---------- 构建 ----------
+    def build(self, renderer, generator_class=None, public=None):
+        """生成并渲染 schema，不读写磁盘缓存"""
+        generator_class = generator_class or spectacular_settings.DEFAULT_GENERATOR_CLASS
+        if public is None:
+            public = spectacular_settings.SERVE_PUBLIC
+        if self._schema is None:
+            self._schema = generator_class().get_schema(request=None, public=public)
+        return renderer.render(self._schema, renderer.media_type, {})
+
+    def get(self, renderer, generator_class=None, public=None):
+        """
+        获取某一格式的缓存条目，依次查询进程内缓存、磁盘缓存，都未命中时才生成
+
+        Args:
+            renderer: drf-spectacular 的 OpenApiYamlRenderer / OpenApiJsonRenderer 实例
+        """
+        fmt = renderer.format
+        entry = self._entries.get(fmt)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._entries.get(fmt) or self._load_from_disk(fmt)
+            if entry is None:
+                body = self.build(renderer, generator_class, public)
+                entry = CachedSchema.from_body(body, level=get_schema_cache_config()["GZIP_LEVEL"])
+                self._save_to_disk(fmt, entry)
+            self._entries[fmt] = entry
+        return entry
+
+    def clear(self):
+        """清空进程内缓存并重新计算 key（测试或运维时使用）"""
+        with self._lock:
+            self._entries = {}
+            self._schema = None
+            self._key = None
+
+
+schema_cache = SchemaCache()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    带缓存的 SpectacularAPIView
+
+    默认参数的请求直接返回缓存的字节，支持 ETag（If-None-Match 返回 304）与预压缩的 gzip；
+    带 lang / version 参数、自定义 urlconf 或媒体类型参数的请求仍按原逻辑实时生成。
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if not self._is_cacheable(request):
+            return super().get(request, *args, **kwargs)
+
+        entry = schema_cache.get(request.accepted_renderer, self.generator_class, self.serve_public)
+        gzipped = bool(_accepts_gzip.search(request.headers.get("Accept-Encoding", "")))
+        etag = entry.gzip_etag if gzipped else entry.etag
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+            return response
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        if gzipped:
+            response = HttpResponse(entry.gzipped, content_type=content_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(entry.body, content_type=content_type)
+        response["ETag"] = etag
+        response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+    def _is_cacheable(self, request):
+        if not get_schema_cache_config()["ENABLED"]:
+            return False
+        if self.urlconf is not None or self.patterns is not None or self.custom_settings or self.api_version:
+            return False
+        if request.GET.get("lang") or request.GET.get("version") or request.version:
+            return False
+        # Accept 中带参数（如 indent=2）时渲染结果不同
+        return ";" not in (request.accepted_media_type or "")
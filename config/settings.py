@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from config.sqlite import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -40,6 +43,7 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
+    "config",  # 项目级全局信号（模型版本号等）
     "test_api",
     "rbac_app"
 ]
@@ -50,6 +54,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # 写操作后一段时间内读主库（见 config/db_router.py）
+    'config.db_router.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,11 +83,26 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_PROFILE=production 时启用 WAL、PRAGMA、BEGIN IMMEDIATE 与持久连接（见 config/sqlite.py）
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "default")
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', profile=SQLITE_PROFILE),
+}
+
+# 只读副本：DATABASE_REPLICAS 为逗号分隔的 SQLite 文件路径，依次注册为 replica1、replica2……
+# 读操作由 config.db_router 分配到副本，本地用 python manage.py sync_replica 从主库复制。
+# 测试时副本镜像主库（TEST.MIRROR），不单独建库。
+REPLICA_DATABASES = [path for path in os.environ.get("DATABASE_REPLICAS", "").split(",") if path]
+for _index, _path in enumerate(REPLICA_DATABASES, 1):
+    DATABASES[f'replica{_index}'] = {
+        **sqlite_database(_path, profile=SQLITE_PROFILE),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+DB_ROUTER = {
+    "REPLICAS": [f'replica{index}' for index in range(1, len(REPLICA_DATABASES) + 1)],
+    "STICKY_SECONDS": 5,  # 写操作后该客户端/用户读主库的时间窗口，秒
 }
 
 
@@ -130,7 +151,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # 无状态 JWT：令牌中的权限版本号有效时不查询 User 表，过期时回退到数据库。
+        # 注意这是全局行为：此时 request.user 是 RBACTokenUser 而不是 User 模型实例，
+        # 只提供 claims 中的字段和权限方法，需要完整用户对象的视图应自行查询或单独设置认证类
+        # 需要每次都查库时可改回 "rest_framework_simplejwt.authentication.JWTAuthentication"
+        "rbac_app.authentication.StatelessJWTAuthentication",
     ],
     "DEFAULT_RENDERER_CLASSES": [
         "config.renderers.CustomRenderer",# 配置返回通用结构
@@ -140,6 +165,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'config.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 10,  # 每页默认10条数据
 }
+# JWT 配置：签发/刷新令牌时写入 RBAC claims（见 rbac_app/authentication.py）
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "rbac_app.authentication.RBACTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "rbac_app.authentication.RBACTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "rbac_app.authentication.RBACTokenUser",
+}
 # 更改为自己重写的 User 模型
 AUTH_USER_MODEL = 'rbac_app.User'
 
@@ -155,3 +186,62 @@ SPECTACULAR_SETTINGS = {
         "config.renderers.wrap_schema_with_three_stage",#配置返回结构
     ],
 }
+
+# OpenAPI schema 缓存（见 config/schema_cache.py）
+SCHEMA_CACHE = {
+    "DIR": BASE_DIR / ".schema_cache",                # 磁盘缓存目录
+    "CODE_VERSION": os.environ.get("APP_VERSION", ""),  # 部署版本号，为空时使用源码文件指纹
+}
+
+# 缓存：默认使用进程内 locmem；多进程部署时设置 DJANGO_CACHE=file 改用文件缓存，
+# 权限缓存、模型版本号、列表结果缓存才能在进程间共享。
+# 无状态 JWT 的权限版本号保存在单独的 permission_versions 缓存中，不会被列表缓存等挤出；
+# 使用 locmem 时其他进程的版本号都不一致，每个请求都会回退到数据库查询用户
+# （仍然正确，只是失去了无状态认证的效果）
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / ".cache",
+        }
+        if os.environ.get("DJANGO_CACHE") == "file"
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "drf-vben-admin",
+        }
+    ),
+    "permission_versions": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / ".cache" / "permission_versions",
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        }
+        if os.environ.get("DJANGO_CACHE") == "file"
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "drf-vben-admin-permission-versions",
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        }
+    ),
+}
+
+# 列表结果缓存（见 mixins/view/cache.py）
+LIST_CACHE = {
+    "TIMEOUT": 30,      # 过期时间，秒（兜底不发送信号的批量修改）
+    "LOCK_WAIT": 0.2,   # 等待其他请求重建缓存的最长时间，秒；超时后自行查询，不长时间占住 worker
+}
+
+# 查询预算（见 mixins/view/budget.py），视图集可通过 query_budget 属性覆盖，None 表示不限制
+QUERY_BUDGET = {
+    "MAX_QUERIES": 100,                     # 每个请求的 SQL 语句数量
+    "MAX_TIME": 5.0,                        # 处理函数开始后的墙钟时间（不只是查询耗时），秒
+    "MAX_SQLITE_INSTRUCTIONS": 50_000_000,  # SQLite 虚拟机指令数
+}
+
+# RBAC 用户有效权限缓存（见 rbac_app/permission_cache.py）
+RBAC_PERMISSION_CACHE = {
+    "TIMEOUT": 300,       # 二级缓存（Django cache）过期时间，秒
+    "LOCAL_MAXSIZE": 1024,  # 进程内 LRU 容量
+    "LOCAL_TTL": 5,       # 进程内 LRU 过期时间，秒（限定跨进程失效延迟）
+    "VERSION_CACHE_ALIAS": "permission_versions",  # 权限版本号使用的独立缓存
+}
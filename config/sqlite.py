@@ -0,0 +1,66 @@
+"""
+SQLite 连接配置
+
+默认的 django.db.backends.sqlite3 配置使用回滚日志（rollback journal），写事务会阻塞所有读，
+多个 worker 同时读写时容易出现 "database is locked"；每个请求还会重新打开一次连接。
+
+生产配置（sqlite_database(..., profile="production")）：
+
+- 每个新连接执行 PRAGMA（OPTIONS["init_command"]）：
+  journal_mode=WAL（读写互不阻塞）、synchronous=NORMAL（WAL 下仍保证一致性，只在检查点时 fsync）、
+  mmap_size、cache_size、busy_timeout（锁等待而不是立即报错）、temp_store=MEMORY
+- 写事务使用 BEGIN IMMEDIATE（OPTIONS["transaction_mode"]）：事务开始时就获取写锁，
+  避免“先读后写”的事务在升级写锁时直接失败（busy_timeout 对这种情况无效）
+- 持久连接（CONN_MAX_AGE）与连接健康检查（CONN_HEALTH_CHECKS）
+
+在 settings 中通过环境变量 SQLITE_PROFILE=production 启用。
+WAL 模式会在数据库文件旁生成 -wal、-shm 文件。
+"""
+
+# 生产配置的 PRAGMA，按顺序执行
+PRODUCTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # 256 MB 内存映射读
+    "cache_size": -64 * 1000,        # 负数表示 KB：约 64 MB 页缓存
+    "busy_timeout": 5000,            # 毫秒
+    "temp_store": "MEMORY",
+}
+
+PROFILES = ("default", "production")
+
+
+def build_init_command(pragmas):
+    """把 {pragma: 值} 转换成 init_command（分号分隔的 PRAGMA 语句）"""
+    return ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())
+
+
+def sqlite_database(name, profile="default", pragmas=None, conn_max_age=600):
+    """
+    构建 DATABASES 中的 SQLite 配置
+
+    Args:
+        name: 数据库文件路径
+        profile: "default" 为 Django 默认配置，"production" 为生产配置
+        pragmas: 覆盖部分 PRODUCTION_PRAGMAS
+        conn_max_age: 生产配置下持久连接的最长时间（秒），None 表示不限制
+
+    Returns:
+        dict: DATABASES 的一项
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"未知的 SQLite 配置：{profile}，可选值为 {', '.join(PROFILES)}")
+    database = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+    }
+    if profile == "production":
+        database.update({
+            "OPTIONS": {
+                "init_command": build_init_command({**PRODUCTION_PRAGMAS, **(pragmas or {})}),
+                "transaction_mode": "IMMEDIATE",
+            },
+            "CONN_MAX_AGE": conn_max_age,
+            "CONN_HEALTH_CHECKS": True,
+        })
+    return database
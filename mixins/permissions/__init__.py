@@ -1,9 +1,11 @@
 from .base_permissions import IsOwnerOrReadOnly, IsAdminOrReadOnly, IsOwnerOrStaff, IsAuthenticatedAndActive
+from .rbac_permissions import HasPermissionCode
 
 
 __all__ = [
     'IsOwnerOrReadOnly',
     'IsAdminOrReadOnly',
     'IsOwnerOrStaff',
-    'IsAuthenticatedAndActive'
-] 
\ No newline at end of file
+    'IsAuthenticatedAndActive',
+    'HasPermissionCode'
+] 
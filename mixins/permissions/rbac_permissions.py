@@ -0,0 +1,81 @@
+from rest_framework import permissions
+
+from rbac_app.permission_registry import permission_registry
+
+
+class HasPermissionCode(permissions.BasePermission):
+    """
+    基于 RBAC 权限编码（Permission.code）的权限检查
+
+    权限编码在第一次检查时编译成位掩码，之后每次检查只是一次按位与，
+    不访问数据库（见 rbac_app.permission_registry）。超级管理员始终有权限。
+
+    使用方法:
+    ```python
+    class UserViewSet(viewsets.ModelViewSet):
+        # 需要同时拥有全部编码
+        permission_classes = [HasPermissionCode("user:list", "user:create")]
+
+    class RoleViewSet(viewsets.ModelViewSet):
+        # 拥有任意一个编码即可
+        permission_classes = [HasPermissionCode("role:manage", "role:view", any_of=True)]
+
+    class PermissionViewSet(viewsets.ModelViewSet):
+        # 直接使用类时，按 action 从视图的 permission_code_map 中取编码；
+        # 没有出现在映射中的 action 一律拒绝，只需要登录的 action 显式映射为空元组
+        permission_classes = [HasPermissionCode]
+        permission_code_map = {"list": "perm:list", "create": "perm:create", "tree": ()}
+    ```
+    """
+
+    def __init__(self, *codes, any_of=False):
+        self.codes = frozenset(codes)
+        self.any_of = any_of
+        # 预编译结果：{编码集合: (registry.generation, 位掩码, 编码是否都存在)}
+        self._compiled = {}
+
+    def __call__(self):
+        # DRF 会调用 permission_classes 中的每一项来获取实例，这里直接返回自身
+        return self
+
+    def get_codes(self, view):
+        """
+        获取需要检查的权限编码，未指定时使用视图的 permission_code_map
+
+        Returns:
+            frozenset | None: None 表示 action 不在映射中（拒绝访问），空集合表示只需要登录
+        """
+        if self.codes:
+            return self.codes
+        code_map = getattr(view, "permission_code_map", {})
+        action = getattr(view, "action", None)
+        if action not in code_map:
+            return None
+        codes = code_map[action]
+        return frozenset([codes] if isinstance(codes, str) else codes)
+
+    def _compile(self, codes):
+        compiled = self._compiled.get(codes)
+        if compiled is None or compiled[0] != permission_registry.generation:
+            mask, known = permission_registry.compile(codes)
+            compiled = self._compiled[codes] = (permission_registry.generation, mask, known)
+        return compiled[1], compiled[2]
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+
+        codes = self.get_codes(view)
+        if codes is None:
+            # 新增的 action 没有配置编码时默认拒绝，避免接口意外地不受保护
+            return False
+        if not codes:
+            return True
+
+        # 先计算用户掩码：重新计算角色掩码时可能为新编码分配位
+        user_mask = permission_registry.user_mask(user.pk)
+        required, known = self._compile(codes)
+        return permission_registry.check(user_mask, required, known, self.any_of)
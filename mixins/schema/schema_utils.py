@@ -1,7 +1,14 @@
-import uuid
-from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter, OpenApiTypes
+import functools
+import hashlib
+import inspect
+import json
+
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from rest_framework import serializers
 
+from config.renderers import custom_response
+from .param_validator import ParamValidator
+
 
 # ---------- 类型映射 ----------
 # 用于将自定义的字符串类型映射为 drf_spectacular 中对应的 OpenApiTypes 类型，方便自动生成文档时使用
@@ -36,6 +43,57 @@ field_mapping = {
 }
 
 
+# ---------- 内联序列化器缓存 ----------
+# 组件名 -> 序列化器类。组件名由前缀和字段定义的内容哈希组成，
+# 相同的字段定义只构造一次序列化器类，文档中也只生成一个组件，且每次启动生成的名称都相同
+_serializer_cache = {}
+
+
+def _normalize_spec(spec):
+    """把字段定义转换成可稳定序列化的结构（保留字段顺序，元组补全为 6 项）"""
+    if isinstance(spec, dict):
+        return [[key, _normalize_spec(val)] for key, val in spec.items()]
+    if isinstance(spec, tuple):
+        return ["tuple", [_normalize_spec(item) for item in list(spec) + [None] * (6 - len(spec))]]
+    if isinstance(spec, list):
+        return [_normalize_spec(item) for item in spec]
+    if spec is None or isinstance(spec, (str, int, float, bool)):
+        return spec
+    # Decimal、date 等默认值/示例
+    return [type(spec).__name__, str(spec)]
+
+
+def spec_hash(spec, length=8):
+    """字段定义的内容哈希"""
+    text = json.dumps(_normalize_spec(spec), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+
+def get_inline_serializer_class(prefix, spec):
+    """
+    获取字段定义对应的序列化器类（带缓存）
+
+    Args:
+        prefix: 组件名前缀，如 'Resp200'、'Req'
+        spec: 字段定义字典
+
+    Returns:
+        名为 '<prefix>_<内容哈希>' 的 Serializer 子类
+    """
+    name = f"{prefix}_{spec_hash(spec)}"
+    serializer_class = _serializer_cache.get(name)
+    if serializer_class is None:
+        serializer_class = type(name, (serializers.Serializer,), create_fields(spec))
+        # 并发构造时只保留先写入的类，保证同名组件只对应一个类
+        serializer_class = _serializer_cache.setdefault(name, serializer_class)
+    return serializer_class
+
+
+def inline_serializer_for(prefix, spec, **kwargs):
+    """按字段定义创建内联序列化器实例（同一定义复用同一个类）"""
+    return get_inline_serializer_class(prefix, spec)(**kwargs)
+
+
 # ---------- 字段构造工具 ----------
 def build_serializer_field(cls_factory, required, help_text, default=None):
     """
@@ -120,12 +178,11 @@ def create_fields(field_dict):
 
             # 如果 type_str 是字典，则表示嵌套结构，递归创建内嵌序列化器
             if isinstance(type_str, dict):
-                nested_name = f"{key.capitalize()}Nested_{uuid.uuid4().hex[:6]}"
                 # 有默认值时，字段不必填
                 real_required = required if default is None else False
-                fields[key] = inline_serializer(
-                    name=nested_name,
-                    fields=create_fields(type_str),
+                fields[key] = inline_serializer_for(
+                    f"{key.capitalize()}Nested",
+                    type_str,
                     required=real_required,
                     help_text=desc,
                     default=default,
@@ -147,11 +204,7 @@ def create_fields(field_dict):
 
         elif isinstance(val, dict):
             # 字段值是字典，直接递归嵌套序列化器
-            nested_name = f"{key.capitalize()}Nested_{uuid.uuid4().hex[:6]}"
-            fields[key] = inline_serializer(
-                name=nested_name,
-                fields=create_fields(val),
-            )
+            fields[key] = inline_serializer_for(f"{key.capitalize()}Nested", val)
         else:
             # 简单类型字符串，直接映射字段
             field_cls = field_mapping.get(val, serializers.CharField)
@@ -160,7 +213,7 @@ def create_fields(field_dict):
 
 
 # ---------- 主入口函数 ----------
-def simple_extend_schema(summary="", parameters=None, responses=None, request_body=None):
+def simple_extend_schema(summary="", parameters=None, responses=None, request_body=None, validate_params=False):
     """
     生成 DRF-Spectacular 的 extend_schema 装饰器，用于快速定义接口文档
 
@@ -169,9 +222,12 @@ def simple_extend_schema(summary="", parameters=None, responses=None, request_bo
         parameters: 请求参数字典，格式为 {参数名: (类型, 是否必填, 描述, 默认值, 示例, 枚举)}
         responses: 响应体字典，格式为 {状态码: 字段定义字典}
         request_body: 请求体字段定义字典
+        validate_params: 是否按 parameters 校验查询参数。开启后参数定义在装饰时编译成校验器，
+            校验通过的参数（已转换类型、已填充默认值）保存在 request.validated_params，
+            校验失败直接返回 400
 
     Returns:
-        drf_spectacular.utils.extend_schema 装饰器实例
+        装饰器：未开启 validate_params 时就是 extend_schema 装饰器实例
     """
     param_list = []
     if parameters:
@@ -195,23 +251,51 @@ def simple_extend_schema(summary="", parameters=None, responses=None, request_bo
 
     resp_dict = {}
     if responses:
-        # 遍历响应码及响应体结构，动态生成 inline_serializer
+        # 遍历响应码及响应体结构，按内容哈希复用内联序列化器
         for code, schema in responses.items():
-            name = f"Resp{code}_{uuid.uuid4().hex[:6]}"
-            resp_dict[code] = inline_serializer(name=name, fields=create_fields(schema))
+            resp_dict[code] = inline_serializer_for(f"Resp{code}", schema)
 
     request_serializer = None
     if request_body:
-        # 请求体也用 inline_serializer 封装
-        name = f"Req_{uuid.uuid4().hex[:6]}"
-        request_serializer = inline_serializer(name=name, fields=create_fields(request_body))
+        # 请求体也用内联序列化器封装
+        request_serializer = inline_serializer_for("Req", request_body)
 
-    return extend_schema(
+    schema_decorator = extend_schema(
         summary=summary,
         parameters=param_list,
         request=request_serializer,
         responses=resp_dict,
     )
+    if not validate_params:
+        return schema_decorator
+    return _with_param_validation(schema_decorator, ParamValidator.compile(parameters))
+
+
+def _with_param_validation(schema_decorator, validator):
+    """在视图方法执行前用预编译的校验器校验查询参数"""
+
+    def decorator(method):
+        def validate(request):
+            params, errors = validator.validate(request.query_params)
+            if errors:
+                return custom_response(data=errors, code=400, msg="参数校验失败", status=400)
+            request.validated_params = params
+            return None
+
+        if inspect.iscoroutinefunction(method):
+            # 异步视图（见 mixins/view/async_viewsets.py）的方法保持为协程函数
+            @functools.wraps(method)
+            async def wrapper(self, request, *args, **kwargs):
+                return validate(request) or await method(self, request, *args, **kwargs)
+        else:
+            @functools.wraps(method)
+            def wrapper(self, request, *args, **kwargs):
+                return validate(request) or method(self, request, *args, **kwargs)
+
+        wrapper.param_validator = validator
+        return schema_decorator(wrapper)
+
+    return decorator
 
 # ----------示例---------
 #     @simple_extend_schema(
@@ -5,18 +5,50 @@
 减少手动编写重复的 API 文档代码。
 """
 
+import inspect
+from functools import update_wrapper
+from types import MappingProxyType
+
 from rest_framework import viewsets
 from drf_spectacular.utils import extend_schema
-import types
-from functools import wraps
+
+
+def _isolate_method(method):
+    """
+    为子类创建方法的独立副本
+
+    继承来的方法（如 ListModelMixin.list）被所有视图集共享，直接装饰会把 summary 泄漏到其他视图集；
+    这里为每个子类包一层，装饰只作用在副本上。父类已经自动包装过的方法会先还原成原始方法，避免层层嵌套。
+    原方法是 async def 时副本也是 async def，DRF / Django 依据 iscoroutinefunction 判断视图是否异步。
+    """
+    original = getattr(method, "_schema_original", method)
+
+    if inspect.iscoroutinefunction(original):
+        async def view_method(self, *args, **kwargs):
+            return await original(self, *args, **kwargs)
+    else:
+        def view_method(self, *args, **kwargs):
+            return original(self, *args, **kwargs)
+
+    update_wrapper(view_method, original)
+    # update_wrapper 只浅拷贝 __dict__，kwargs 需要单独复制，否则 extend_schema 会改到原方法上
+    view_method.kwargs = dict(getattr(original, "kwargs", {}))
+    view_method._schema_original = original
+    return view_method
+
+
 class SchemaModelViewSet(viewsets.ModelViewSet):
     """
     自动为 ModelViewSet 的标准方法添加 extend_schema 装饰器
-    
+
     自动根据视图集的文档字符串或自定义的 schema_name 属性，为标准的 CRUD 方法
     添加合适的 API 摘要。继承此类可以大大减少文档注释的工作量。
+
+    装饰在定义子类时（__init_subclass__）完成且只执行一次，
+    DRF 每个请求实例化视图时不再做任何装饰工作。
+    已经用 extend_schema 显式装饰过的方法保持不变。
     """
-    
+
     # 标准操作的摘要模板
     schema_summary_mapping = {
         'list': '获取{name}列表',
@@ -26,77 +58,38 @@ class SchemaModelViewSet(viewsets.ModelViewSet):
         'partial_update': '部分更新{name}',
         'destroy': '删除{name}'
     }
-    
+
     # 这个属性用于在 summary 中显示的名称
     schema_name = ""
-    
-    def __new__(cls, *args, **kwargs):
-        """创建实例时应用装饰器"""
-        instance = super().__new__(cls)
-
-        # 装饰子类的方法
-        cls._apply_schema_decorators(cls)
-        
-        return instance
-    
-    @classmethod
-    def _apply_schema_decorators(cls, subclass):
-        """
-        为子类的方法应用装饰器
-        
-        参数:
-            subclass: 要应用装饰器的子类
-        """
-        # 获取 schema_name
-        name = subclass.schema_name
-        if not name and subclass.__doc__:
-            try:
-                name = subclass.__doc__.split('视图集')[0].strip()
-            except:
-                name = subclass.__doc__.strip()
-        if not name:
-            name = "对象"
-        
-        # 为每个方法添加装饰器
-        for method_name, summary_template in cls.schema_summary_mapping.items():
-            if hasattr(subclass, method_name) and callable(getattr(subclass, method_name)):
-                method_func = getattr(subclass, method_name)
-                
-                # 检查方法是否已有装饰器
-                if not hasattr(method_func, '_spectacular_annotation'):
-                    # 格式化 summary
-                    summary = summary_template.format(name=name)
-                    
-                    # 使用 extend_schema 装饰方法
-                    decorated_method = extend_schema(summary=summary)(method_func)
-                    
-                    # 设置回子类
-                    setattr(subclass, method_name, decorated_method)
-    
-
-
-# 预先为每个方法创建并应用装饰器
-def _apply_schema_decorators():
-    """为 SchemaModelViewSet 的标准方法添加 extend_schema 装饰器"""
-
 
-    for method_name, summary_template in SchemaModelViewSet.schema_summary_mapping.items():
-        if hasattr(SchemaModelViewSet, method_name):
-            original_method = getattr(viewsets.ModelViewSet, method_name)
-
-            # 创建装饰器
-            decorated_method = extend_schema(
-                summary=summary_template.format(name='')
-            )(original_method)
-
-            # 保留原始方法的属性
-            # 加上 wraps 保留元信息
-            decorated_method = wraps(original_method)(decorated_method)
-            # 设置到 SchemaModelViewSet 类
-            setattr(SchemaModelViewSet, method_name, decorated_method)
-
-# 应用装饰器
-_apply_schema_decorators()
+    # 定义子类时计算出的 {方法名: summary}，只读
+    schema_summaries = MappingProxyType({})
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._apply_schema_decorators()
 
+    @classmethod
+    def get_schema_name(cls):
+        """summary 中显示的名称：schema_name，其次是文档字符串中“视图集”之前的部分"""
+        name = cls.schema_name
+        if not name and cls.__doc__:
+            name = cls.__doc__.split('视图集')[0].strip()
+        return name or "对象"
 
+    @classmethod
+    def _apply_schema_decorators(cls):
+        """为子类的标准方法应用装饰器（定义子类时调用一次）"""
+        name = cls.get_schema_name()
+        summaries = {}
+        for method_name, summary_template in cls.schema_summary_mapping.items():
+            method = getattr(cls, method_name, None)
+            if not callable(method):
+                continue
+            # 显式装饰过的方法（不是本类自动包装的）保持原样
+            if 'schema' in getattr(method, 'kwargs', {}) and not hasattr(method, '_schema_original'):
+                continue
+            summary = summary_template.format(name=name)
+            setattr(cls, method_name, extend_schema(summary=summary)(_isolate_method(method)))
+            summaries[method_name] = summary
+        cls.schema_summaries = MappingProxyType(summaries)
@@ -1,9 +1,22 @@
 """
 视图相关工具
 
-包含视图集扩展功能，如搜索功能等。
+包含视图集扩展功能，如搜索功能（可插拔的全文索引后端）、自动预加载、流式导出、列表结果缓存、查询预算、异步视图集、批量增删改等。
 """
 
+from .async_viewsets import AsyncAPIView, AsyncGenericViewSet, AsyncModelViewSet, AsyncReadOnlyModelViewSet
+from .bulk import BulkListSerializer, BulkModelMixin
+from .budget import QueryBudget, QueryBudgetExceeded, QueryBudgetMixin
+from .cache import ListCacheMixin, get_list_cache_stats
+from .export import ExportModelMixin
+from .prefetch import AutoPrefetchMixin
 from .search import SearchableListModelMixin, SearchableListModelMixinUp
+from .search_backends import FTS5SearchBackend, IcontainsSearchBackend
 
-__all__ = ['SearchableListModelMixin', 'SearchableListModelMixinUp'] 
\ No newline at end of file
+__all__ = [
+    'AsyncAPIView', 'AsyncGenericViewSet', 'AsyncModelViewSet', 'AsyncReadOnlyModelViewSet',
+    'AutoPrefetchMixin', 'BulkListSerializer', 'BulkModelMixin', 'ExportModelMixin',
+    'FTS5SearchBackend', 'IcontainsSearchBackend', 'ListCacheMixin',
+    'QueryBudget', 'QueryBudgetExceeded', 'QueryBudgetMixin',
+    'SearchableListModelMixin', 'SearchableListModelMixinUp', 'get_list_cache_stats',
+] 
@@ -0,0 +1,260 @@
+"""
+异步视图集
+
+DRF 的 APIView / ViewSet 都是同步的，部署在 ASGI（config/asgi.py）下时每个请求都要切换到线程中执行。
+这里提供 dispatch 为协程的视图基类，以及使用 Django 异步 ORM 的 CRUD 混入类：
+
+- list：计数使用 acount()，当前页通过 aiterator() 读取（CustomPageNumberPagination.apaginate_queryset）
+- retrieve / update / destroy：aget() 获取对象，asave() / adelete() 写入
+- create：asave() 保存对象，多对多字段使用 aset()
+
+响应仍由 DRF 的 finalize_response 处理，CustomRenderer 三段式结构与分页字段映射保持不变。
+
+以下步骤仍是同步代码，按需切换到线程：
+
+- 认证、权限检查、过滤与序列化先在事件循环中直接执行，需要查询数据库时（SynchronousOnlyOperation）改到线程中重新执行
+- 限流会记录请求历史，不能重复执行，直接在线程中执行
+- 序列化器校验通常需要查询数据库（唯一性、外键），直接在线程中执行
+- 自定义了 create() / update() 的序列化器、同步的处理函数（如 @action）在线程中执行
+
+使用方法:
+```python
+class UserViewSet(AutoPrefetchMixin, AsyncModelViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+```
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation, ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.response import Response
+from rest_framework.utils import model_meta
+from rest_framework.views import APIView
+
+
+async def run_sync_safe(func, *args, **kwargs):
+    """
+    在事件循环中直接执行同步函数，访问数据库时改到线程中重新执行
+
+    只用于可以安全地重复执行的函数（权限检查、序列化输出）。
+    """
+    try:
+        return func(*args, **kwargs)
+    except SynchronousOnlyOperation:
+        return await sync_to_async(func)(*args, **kwargs)
+
+
+class AsyncAPIViewMixin:
+    """dispatch 为协程的 APIView 混入类，处理函数可以是协程函数，也可以是同步函数"""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        # 让 Django 按异步视图调用（WSGI 下由 Django 自动包装成同步调用）
+        return markcoroutinefunction(view)
+
+    async def ainitial(self, request, *args, **kwargs):
+        """认证、权限检查、限流（APIView.initial 的异步版本，每一步只执行一次）"""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        try:
+            self.perform_authentication(request)
+        except SynchronousOnlyOperation:
+            # 认证需要查询数据库：清除认证结果后在线程中重新执行
+            for attr in ("_user", "_auth", "_authenticator"):
+                request.__dict__.pop(attr, None)
+            await sync_to_async(self.perform_authentication)(request)
+        await run_sync_safe(self.check_permissions, request)
+        if self.throttle_classes:
+            await sync_to_async(self.check_throttles)(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIView(AsyncAPIViewMixin, APIView):
+    """异步 APIView，get / post 等处理函数定义为 async def"""
+
+
+class AsyncGenericViewSet(AsyncAPIViewMixin, viewsets.GenericViewSet):
+    """异步 GenericViewSet，提供 get_object、分页、序列化、保存的异步版本"""
+
+    # 未分页列表每次从数据库读取的行数
+    async_chunk_size = 2000
+
+    async def afilter_queryset(self):
+        """get_queryset + filter_queryset（过滤后端可能查询数据库，如 FTS5SearchBackend 检查索引表）"""
+        return await run_sync_safe(lambda: self.filter_queryset(self.get_queryset()))
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        assert lookup_url_kwarg in self.kwargs, (
+            f"Expected view {self.__class__.__name__} to be called with a URL keyword argument "
+            f'named "{lookup_url_kwarg}".'
+        )
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        await run_sync_safe(self.check_object_permissions, self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """分页器支持 apaginate_queryset 时使用异步版本，否则在线程中分页"""
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if hasattr(paginator, "apaginate_queryset"):
+            return await paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def aserialize(self, instance, many=False):
+        """序列化输出"""
+        serializer = self.get_serializer(instance, many=many)
+        return await run_sync_safe(lambda: serializer.data)
+
+    async def avalidate(self, serializer):
+        """校验请求数据（通常需要查询数据库，在线程中执行）"""
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+    async def asave_serializer(self, serializer, **kwargs):
+        """
+        ModelSerializer.save() 的异步版本：asave() 保存对象，多对多字段使用 aset()
+
+        序列化器自定义了 create() / update() 时调用 save() 本身（在线程中执行）。
+        """
+        custom_save = (
+            not isinstance(serializer, serializers.ModelSerializer)
+            or type(serializer).create is not serializers.ModelSerializer.create
+            or type(serializer).update is not serializers.ModelSerializer.update
+        )
+        if custom_save:
+            return await sync_to_async(serializer.save)(**kwargs)
+
+        validated_data = {**serializer.validated_data, **kwargs}
+        info = model_meta.get_field_info(serializer.Meta.model)
+        many_to_many = {
+            name: validated_data.pop(name)
+            for name, relation in info.relations.items()
+            if relation.to_many and name in validated_data
+        }
+        instance = serializer.instance
+        if instance is None:
+            instance = serializer.Meta.model(**validated_data)
+        else:
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+        await instance.asave()
+        for name, value in many_to_many.items():
+            await getattr(instance, name).aset(value)
+        serializer.instance = instance
+        return instance
+
+
+class AsyncListModelMixin:
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset()
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(await self.aserialize(page, many=True))
+
+        objects = [obj async for obj in queryset.aiterator(chunk_size=self.async_chunk_size)]
+        return Response(await self.aserialize(objects, many=True))
+
+
+class AsyncRetrieveModelMixin:
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await self.aserialize(instance))
+
+
+class AsyncCreateModelMixin:
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        await self.avalidate(serializer)
+        await self.aperform_create(serializer)
+        data = await run_sync_safe(lambda: serializer.data)
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
+    async def aperform_create(self, serializer):
+        await self.asave_serializer(serializer)
+
+    get_success_headers = mixins.CreateModelMixin.get_success_headers
+
+
+class AsyncUpdateModelMixin:
+    async def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        await self.avalidate(serializer)
+        await self.aperform_update(serializer)
+
+        if getattr(instance, "_prefetched_objects_cache", None):
+            # 与 UpdateModelMixin 一致：清除预加载缓存，输出更新后的关联数据
+            instance._prefetched_objects_cache = {}
+
+        return Response(await run_sync_safe(lambda: serializer.data))
+
+    async def aperform_update(self, serializer):
+        await self.asave_serializer(serializer)
+
+    async def partial_update(self, request, *args, **kwargs):
+        kwargs["partial"] = True
+        return await self.update(request, *args, **kwargs)
+
+
+class AsyncDestroyModelMixin:
+    async def destroy(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        await self.aperform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    async def aperform_destroy(self, instance):
+        await instance.adelete()
+
+
+class AsyncReadOnlyModelViewSet(AsyncRetrieveModelMixin, AsyncListModelMixin, AsyncGenericViewSet):
+    """异步只读视图集：list、retrieve"""
+
+
+class AsyncModelViewSet(
+    AsyncCreateModelMixin,
+    AsyncRetrieveModelMixin,
+    AsyncUpdateModelMixin,
+    AsyncDestroyModelMixin,
+    AsyncListModelMixin,
+    AsyncGenericViewSet,
+):
+    """异步 ModelViewSet：list、retrieve、create、update、partial_update、destroy"""
@@ -0,0 +1,219 @@
+"""
+查询预算
+
+一次请求能使用的数据库资源上限，防止病态的搜索请求（大量模糊条件加上很宽的时间范围）长时间占用 worker：
+
+- MAX_QUERIES：SQL 语句数量
+- MAX_TIME：从处理函数开始执行算起的墙钟时间（秒），包括查询之间的 Python 代码耗时，
+  在执行下一条语句前（SQLite 还在语句执行过程中）检查
+- MAX_SQLITE_INSTRUCTIONS：SQLite 虚拟机指令数，通过连接的 set_progress_handler 统计，
+  超出时 SQLite 会中断正在执行的语句，单条慢查询也能及时终止
+
+语句数量和时间在每条语句执行前通过 connection.execute_wrapper 检查；
+SQLite 的 progress handler 在执行过程中每隔 PROGRESS_INTERVAL 条指令检查一次指令数与时间。
+超出预算时抛出 QueryBudgetExceeded，由 DRF 转换为标准错误响应结构。
+
+默认值在 settings.QUERY_BUDGET 中配置，视图集可通过 query_budget 属性覆盖。
+默认只限制 list 与 export；写操作加入 query_budget_actions 后在 transaction.atomic() 中执行，
+中断时整体回滚，不会留下已保存、但信号中的后续写入只完成一半的数据。
+流式响应（未分页的列表、导出）在视图返回之后才执行查询，迭代时重新启用同一个预算（见 export.iter_serialized_rows），
+超出预算时中断输出。
+"""
+
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.exceptions import APIException
+
+# 默认配置，None 表示不限制
+DEFAULT_QUERY_BUDGET = {
+    "ENABLED": True,
+    "MAX_QUERIES": 100,                     # SQL 语句数量
+    "MAX_TIME": 5.0,                        # 处理函数开始后的墙钟时间（秒）
+    "MAX_SQLITE_INSTRUCTIONS": 50_000_000,  # SQLite 虚拟机指令数
+    "PROGRESS_INTERVAL": 1000,              # 每执行多少条指令调用一次 progress handler
+}
+
+
+def get_query_budget_config(overrides=None):
+    """合并默认配置、settings.QUERY_BUDGET 与视图集的覆盖配置"""
+    return {**DEFAULT_QUERY_BUDGET, **getattr(settings, "QUERY_BUDGET", {}), **(overrides or {})}
+
+
+class QueryBudgetExceeded(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "查询超出资源限制，请缩小查询范围"
+    default_code = "query_budget_exceeded"
+
+
+class QueryBudget:
+    """
+    单次请求的查询预算
+
+    使用方法:
+    ```python
+    budget = QueryBudget(max_queries=20, max_time=1.0)
+    with budget.guard():
+        list(queryset)
+    ```
+    """
+
+    def __init__(self, max_queries=None, max_time=None, max_instructions=None, progress_interval=1000):
+        self.max_queries = max_queries
+        self.max_time = max_time
+        self.max_instructions = max_instructions
+        self.progress_interval = progress_interval
+        self.queries = 0
+        self.instructions = 0
+        self.started = None
+        self.exceeded = None  # 超出预算的原因
+        self._sqlite_connections = []
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_queries=config["MAX_QUERIES"],
+            max_time=config["MAX_TIME"],
+            max_instructions=config["MAX_SQLITE_INSTRUCTIONS"],
+            progress_interval=config["PROGRESS_INTERVAL"],
+        )
+
+    def elapsed(self):
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def _over_time(self):
+        return self.max_time is not None and self.elapsed() > self.max_time
+
+    def _fail(self, reason):
+        self.exceeded = reason
+        self._remove_progress_handlers()
+        raise QueryBudgetExceeded(f"查询超出资源限制（{reason}），请缩小查询范围")
+
+    # ---------- SQLite progress handler ----------
+    def _progress(self):
+        """返回非 0 时 SQLite 中断当前语句"""
+        self.instructions += self.progress_interval
+        if self.max_instructions is not None and self.instructions > self.max_instructions:
+            self.exceeded = f"指令数超过 {self.max_instructions}"
+            return 1
+        if self._over_time():
+            self.exceeded = f"耗时超过 {self.max_time} 秒"
+            return 1
+        return 0
+
+    def _install_progress_handler(self, connection):
+        if connection.vendor != "sqlite" or self.max_instructions is None and self.max_time is None:
+            return
+        raw = connection.connection
+        if raw is None or any(raw is installed for installed in self._sqlite_connections):
+            return
+        raw.set_progress_handler(self._progress, self.progress_interval)
+        self._sqlite_connections.append(raw)
+
+    def _remove_progress_handlers(self):
+        for raw in self._sqlite_connections:
+            try:
+                raw.set_progress_handler(None, 0)
+            except Exception:
+                # 连接已经关闭
+                pass
+        self._sqlite_connections = []
+
+    # ---------- execute wrapper ----------
+    def __call__(self, execute, sql, params, many, context):
+        if self.max_queries is not None and self.queries >= self.max_queries:
+            self._fail(f"语句数超过 {self.max_queries}")
+        if self._over_time():
+            self._fail(f"耗时超过 {self.max_time} 秒")
+        self.queries += 1
+        self._install_progress_handler(context["connection"])
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as exc:
+            self.raise_if_exceeded(exc)
+            raise
+
+    def raise_if_exceeded(self, exc=None):
+        """数据库错误由预算中断引起时，转换为 QueryBudgetExceeded"""
+        if self.exceeded is not None:
+            # 之后的回滚等语句不能再被中断
+            self._remove_progress_handlers()
+            raise QueryBudgetExceeded(f"查询超出资源限制（{self.exceeded}），请缩小查询范围") from exc
+
+    @contextmanager
+    def guard(self, aliases=None):
+        """
+        在所有（或指定的）数据库连接上启用预算
+
+        同一个预算可以多次启用（如视图中一次、流式响应迭代时一次），耗时从第一次启用开始计算。
+        """
+        if self.started is None:
+            self.started = time.monotonic()
+        with ExitStack() as stack:
+            for alias in aliases or connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            try:
+                yield self
+            finally:
+                self._remove_progress_handlers()
+
+
+class QueryBudgetMixin:
+    """
+    视图集查询预算混入类
+
+    使用方法:
+    ```python
+    class UserViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
+        queryset = User.objects.all()
+        serializer_class = UserSerializer
+        query_budget = {"MAX_QUERIES": 20, "MAX_TIME": 1.0}  # 覆盖 settings.QUERY_BUDGET
+    ```
+    """
+    query_budget = None
+    # 限制预算的 action，None 表示全部（写操作在事务中执行，中断时回滚）
+    query_budget_actions = ("list", "export")
+
+    def get_query_budget(self):
+        """当前请求的预算，不限制时返回 None"""
+        config = get_query_budget_config(self.query_budget)
+        if not config["ENABLED"]:
+            return None
+        actions = self.query_budget_actions
+        if actions is not None and getattr(self, "action", None) not in actions:
+            return None
+        return QueryBudget.from_config(config)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._query_budget = None
+        self._budget_atomic = False
+        with ExitStack() as stack:
+            self._budget_stack = stack
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # 认证、权限检查之后才开始计算预算；预算在 dispatch 返回时解除
+        self._query_budget = self.get_query_budget()
+        if self._query_budget is not None:
+            if request.method not in SAFE_METHODS:
+                self._budget_stack.enter_context(transaction.atomic())
+                self._budget_atomic = True
+            self._budget_stack.enter_context(self._query_budget.guard())
+
+    def handle_exception(self, exc):
+        budget = getattr(self, "_query_budget", None)
+        if budget is not None and isinstance(exc, DatabaseError):
+            # 在读取结果时被 progress handler 中断的语句不经过 execute_wrapper
+            try:
+                budget.raise_if_exceeded(exc)
+            except QueryBudgetExceeded as budget_exc:
+                exc = budget_exc
+        if getattr(self, "_budget_atomic", False):
+            # 异常已转换为错误响应，事务不会因异常退出，需要显式回滚
+            transaction.set_rollback(True)
+        return super().handle_exception(exc)
@@ -0,0 +1,489 @@
+"""
+批量增删改 Mixin
+
+一次请求提交一个数组，代替逐个对象调用 create / partial_update / destroy：
+
+- POST   {prefix}/bulk/：批量创建，请求体为对象数组
+- PATCH  {prefix}/bulk/：批量部分更新，请求体为对象数组，每个对象必须带 id
+- DELETE {prefix}/bulk/：批量删除，请求体为 id 数组
+
+校验使用 many=True 的 BulkListSerializer，按批次而不是按对象查询数据库：
+
+- 外键 / 多对多主键：每个关联字段一次 in_bulk() 取回全部引用的对象
+- 唯一字段（UniqueValidator）：每个字段一次 IN 查询，同时检查批次内部的重复值
+- 需要看到整个批次才能判断的规则（如层级不能成环）由子类的 validate_batch() 实现
+
+写入使用 bulk_create() / bulk_update()，多对多中间表批量插入、删除；删除由 QuerySet.delete() 执行，
+每张表按 id IN (...) 批量删除。整个批次在一个事务中执行，任何一项校验失败都不会写入，
+错误按数组下标逐项返回（标准三段式结构，data 为与请求数组等长的错误列表）。
+
+批量写入不会触发模型的 save()；默认在写入前后逐个对象发送 pre_save / post_save / m2m_changed 信号，
+使权限缓存、闭包表、全文索引、模型版本号等依赖信号的逻辑保持一致。
+确认模型没有依赖信号的逻辑时可以设置 bulk_send_signals = False，事务提交后只递增模型版本号。
+
+使用方法:
+```python
+class UserViewSet(BulkModelMixin, viewsets.ModelViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+```
+"""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, router, transaction
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.fields import empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils import model_meta
+from rest_framework.validators import UniqueValidator
+
+from config.db_router import use_primary_db
+from config.model_versions import bump_model_version
+from config.renderers import custom_response
+
+
+class PrefetchedRelatedObjects:
+    """
+    PrimaryKeyRelatedField 的查询集替身
+
+    PrimaryKeyRelatedField.to_internal_value() 对每个主键调用 queryset.get(pk=...)，
+    替换成预先批量读取的对象后，逐项校验时不再查询数据库。
+    """
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            key = self.model._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            # PrimaryKeyRelatedField 把 TypeError / ValueError 转换为 incorrect_type 错误
+            raise ValueError(pk)
+        try:
+            return self.objects[key]
+        except (KeyError, TypeError):
+            raise self.model.DoesNotExist from None
+
+
+def _related_pk_field(field):
+    """返回需要批量预取的 PrimaryKeyRelatedField（多对多时为 child_relation）"""
+    relation = field.child_relation if isinstance(field, ManyRelatedField) else field
+    if type(relation) is not PrimaryKeyRelatedField or relation.read_only or relation.pk_field is not None:
+        return None
+    return relation
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    批量校验与写入的 ListSerializer
+
+    Args:
+        child: ModelSerializer 实例
+        batch_size: bulk_create / bulk_update 每条 SQL 的行数
+        send_signals: 是否逐个对象发送 pre_save / post_save / m2m_changed 信号
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.batch_size = kwargs.pop('batch_size', None)
+        self.send_signals = kwargs.pop('send_signals', True)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    # 校验
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        fields = self.child.fields
+        unique_fields = self._detach_unique_validators(fields)
+        self._prefetch_related(fields, data)
+
+        ret = []
+        errors = [{} for _ in data]
+        for index, item in enumerate(data):
+            if self.instance is not None:
+                self.child.instance = self.instance[index]
+                self.child.initial_data = item
+            try:
+                ret.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                ret.append(None)
+                errors[index] = exc.detail
+        self.child.instance = None
+
+        self._check_unique(unique_fields, ret, errors)
+        self.validate_batch(ret, errors)
+        if any(errors):
+            raise ValidationError(errors)
+        return ret
+
+    def _detach_unique_validators(self, fields):
+        """
+        取出字段上的 UniqueValidator（精确匹配），改为批量检查
+
+        Returns:
+            list: (字段名, 模型字段名, 校验器)
+        """
+        unique_fields = []
+        for name, field in fields.items():
+            if field.read_only:
+                continue
+            for validator in field.validators:
+                if isinstance(validator, UniqueValidator) and validator.lookup == 'exact':
+                    unique_fields.append((name, field.source, validator))
+                    field.validators = [v for v in field.validators if v is not validator]
+                    break
+        return unique_fields
+
+    def _prefetch_related(self, fields, data):
+        """每个关联字段一次 in_bulk() 取回请求中引用的全部对象"""
+        for name, field in fields.items():
+            relation = _related_pk_field(field)
+            if relation is None:
+                continue
+            queryset = relation.get_queryset()
+            pk_field = queryset.model._meta.pk
+            keys = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                for pk in (value if isinstance(value, list) else [value]):
+                    if pk is None or isinstance(pk, (bool, dict, list)):
+                        continue
+                    try:
+                        keys.add(pk_field.to_python(pk))
+                    except (DjangoValidationError, TypeError, ValueError):
+                        pass
+            relation.queryset = PrefetchedRelatedObjects(queryset.model, queryset.in_bulk(keys) if keys else {})
+
+    def _check_unique(self, unique_fields, validated, errors):
+        """每个唯一字段一次 IN 查询；批次内部的重复值从第二次出现开始报错"""
+        for name, source, validator in unique_fields:
+            first_index = {}
+            for index, attrs in enumerate(validated):
+                if attrs is None or attrs.get(source) is None:
+                    continue
+                value = attrs[source]
+                if value in first_index:
+                    self.add_item_error(errors, index, name, validator.message, 'unique')
+                else:
+                    first_index[value] = index
+            if not first_index:
+                continue
+
+            existing = validator.queryset.filter(**{f'{source}__in': list(first_index)}).values_list(source, 'pk')
+            for value, pk in existing:
+                index = first_index.get(value)
+                if index is None:
+                    continue
+                own = self.instance[index].pk if self.instance is not None else None
+                if pk != own:
+                    self.add_item_error(errors, index, name, validator.message, 'unique')
+
+    def validate_batch(self, validated, errors):
+        """
+        整个批次的校验（子类实现），错误通过 add_item_error 记录到对应下标
+
+        Args:
+            validated: 逐项校验后的数据，校验失败的项为 None
+            errors: 与请求数组等长的错误列表
+        """
+
+    @staticmethod
+    def add_item_error(errors, index, name, message, code='invalid'):
+        if not isinstance(errors[index], dict):
+            errors[index] = {api_settings.NON_FIELD_ERRORS_KEY: errors[index]}
+        errors[index].setdefault(name, []).append(ErrorDetail(str(message), code=code))
+
+    # 写入
+
+    def _has_custom_save(self):
+        return (
+            type(self.child).create is not serializers.ModelSerializer.create
+            or type(self.child).update is not serializers.ModelSerializer.update
+        )
+
+    def _split_many_to_many(self, validated_data):
+        """从每一项中取出多对多字段，返回 (普通字段列表, {字段名: 每一项的值})"""
+        info = model_meta.get_field_info(self.model)
+        many_to_many = {}
+        for name, relation in info.relations.items():
+            if relation.to_many and any(name in attrs for attrs in validated_data):
+                many_to_many[name] = [attrs.get(name, empty) for attrs in validated_data]
+        plain = [{k: v for k, v in attrs.items() if k not in many_to_many} for attrs in validated_data]
+        return plain, many_to_many
+
+    def _send(self, signal, **kwargs):
+        if self.send_signals:
+            signal.send(**kwargs)
+
+    def create(self, validated_data):
+        if self._has_custom_save():
+            return super().create(validated_data)
+
+        model = self.model
+        using = router.db_for_write(model)
+        plain, many_to_many = self._split_many_to_many(validated_data)
+        instances = [model(**attrs) for attrs in plain]
+        for instance in instances:
+            self._send(pre_save, sender=model, instance=instance, raw=False, using=using, update_fields=None)
+        model._default_manager.bulk_create(instances, batch_size=self.batch_size)
+        for instance in instances:
+            self._send(post_save, sender=model, instance=instance, created=True, raw=False,
+                       using=using, update_fields=None)
+        touched = self._set_many_to_many(instances, many_to_many, using, created=True)
+        self._bump_versions(touched, using)
+        return instances
+
+    def update(self, instances, validated_data):
+        if self._has_custom_save():
+            return [self.child.update(instance, attrs) for instance, attrs in zip(instances, validated_data)]
+
+        model = self.model
+        using = router.db_for_write(model)
+        plain, many_to_many = self._split_many_to_many(validated_data)
+        fields = set()
+        for instance, attrs in zip(instances, plain):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            fields.update(attrs)
+            self._send(pre_save, sender=model, instance=instance, raw=False, using=using,
+                       update_fields=frozenset(attrs))
+        if fields:
+            model._default_manager.bulk_update(instances, list(fields), batch_size=self.batch_size)
+        for instance, attrs in zip(instances, plain):
+            self._send(post_save, sender=model, instance=instance, created=False, raw=False,
+                       using=using, update_fields=frozenset(attrs))
+        touched = self._set_many_to_many(instances, many_to_many, using, created=False)
+        self._bump_versions(touched, using)
+        return instances
+
+    def _bump_versions(self, models, using):
+        """不发送信号时模型版本号不会自动递增：事务提交后递增，避免其他请求把提交前的数据缓存到新版本号下"""
+        if not self.send_signals:
+            transaction.on_commit(lambda: bump_model_version(*models), using=using)
+
+    def _set_many_to_many(self, instances, many_to_many, using, created):
+        """
+        批量设置多对多字段（与 manager.set() 结果相同）
+
+        每个字段：读取现有关系一次（新建对象不需要），删除一次，中间表 bulk_create 一次。
+
+        Returns:
+            list: 写入过的模型（包括中间表与关联模型）
+        """
+        touched = [self.model]
+        for name, values in many_to_many.items():
+            field = self.model._meta.get_field(name)
+            if not isinstance(field, models.ManyToManyField):
+                # 反向多对多：逐个对象 set()
+                for instance, value in zip(instances, values):
+                    if value is not empty:
+                        getattr(instance, name).set(value)
+                continue
+
+            through = field.remote_field.through
+            related_model = field.related_model
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            wanted = {
+                instance.pk: {obj.pk for obj in value}
+                for instance, value in zip(instances, values) if value is not empty
+            }
+            current = defaultdict(set)
+            removed = defaultdict(set)
+            removed_rows = []
+            if not created and wanted:
+                rows = through._default_manager.using(using).filter(
+                    **{f'{source}__in': list(wanted)}
+                ).values_list('pk', source, target)
+                for row_pk, source_id, target_id in rows:
+                    current[source_id].add(target_id)
+                    if target_id not in wanted[source_id]:
+                        removed[source_id].add(target_id)
+                        removed_rows.append(row_pk)
+            added = {pk: targets - current[pk] for pk, targets in wanted.items()}
+
+            by_pk = {instance.pk: instance for instance in instances}
+            signal_kwargs = dict(sender=through, reverse=False, model=related_model, using=using)
+            for pk, pk_set in removed.items():
+                self._send(m2m_changed, instance=by_pk[pk], action='pre_remove', pk_set=pk_set, **signal_kwargs)
+            if removed_rows:
+                through._default_manager.using(using).filter(pk__in=removed_rows).delete()
+            for pk, pk_set in removed.items():
+                self._send(m2m_changed, instance=by_pk[pk], action='post_remove', pk_set=pk_set, **signal_kwargs)
+
+            added = {pk: pk_set for pk, pk_set in added.items() if pk_set}
+            for pk, pk_set in added.items():
+                self._send(m2m_changed, instance=by_pk[pk], action='pre_add', pk_set=pk_set, **signal_kwargs)
+            through._default_manager.using(using).bulk_create(
+                [through(**{source: pk, target: target_id}) for pk, pk_set in added.items() for target_id in pk_set],
+                batch_size=self.batch_size,
+            )
+            for pk, pk_set in added.items():
+                self._send(m2m_changed, instance=by_pk[pk], action='post_add', pk_set=pk_set, **signal_kwargs)
+            touched += [through, related_model]
+
+            for instance in instances:
+                # 与 manager.set() 一致：清除已预加载的旧关系
+                getattr(instance, '_prefetched_objects_cache', {}).pop(field.related_query_name(), None)
+                getattr(instance, '_prefetched_objects_cache', {}).pop(name, None)
+        return touched
+
+
+class BulkModelMixin:
+    """
+    批量增删改混入类
+
+    增加 {prefix}/bulk/ 接口（POST 创建、PATCH 部分更新、DELETE 删除），
+    每个请求最多 bulk_max_items 项，整个批次在一个事务中执行并且读写都使用主库。
+    响应中的对象通过 get_queryset() 重新读取，可以与 AutoPrefetchMixin 一起使用避免逐个查询关联。
+
+    使用方法:
+    ```python
+    class PermissionViewSet(BulkModelMixin, viewsets.ModelViewSet):
+        queryset = Permission.objects.all()
+        serializer_class = PermissionSerializer
+        bulk_max_items = 500
+    ```
+    """
+
+    # 每个请求最多的项数
+    bulk_max_items = 1000
+    # bulk_create / bulk_update 每条 SQL 的行数（None 表示由数据库后端决定）
+    bulk_batch_size = 500
+    # 是否逐个对象发送 pre_save / post_save / m2m_changed 信号
+    bulk_send_signals = True
+    bulk_list_serializer_class = BulkListSerializer
+
+    def get_bulk_serializer(self, instance=None, data=empty, partial=False):
+        context = self.get_serializer_context()
+        child = self.get_serializer_class()(context=context, partial=partial)
+        return self.bulk_list_serializer_class(
+            instance, data=data, child=child, partial=partial, context=context,
+            batch_size=self.bulk_batch_size, send_signals=self.bulk_send_signals,
+        )
+
+    def get_bulk_items(self, request):
+        """请求体必须是非空数组，且不超过 bulk_max_items 项"""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['请求体必须是数组']})
+        if not items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['数组不能为空']})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [f'每次最多 {self.bulk_max_items} 项']})
+        return items
+
+    def bulk_error_response(self, errors):
+        """逐项错误：data 与请求数组等长，没有错误的项为空字典"""
+        return custom_response(data=errors, code=400, msg='批量校验失败', status=status.HTTP_400_BAD_REQUEST)
+
+    def get_bulk_instances(self, items, id_of):
+        """
+        一次查询取回待更新 / 删除的对象（与 get_object 一样经过 filter_queryset 并检查对象权限）
+
+        Returns:
+            tuple: (与 items 顺序一致的对象列表, 逐项错误列表)
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        pk_field = queryset.model._meta.pk
+        keys = []
+        errors = [{} for _ in items]
+        for index, item in enumerate(items):
+            try:
+                value = id_of(item)
+                if isinstance(value, bool):
+                    raise TypeError(value)
+                keys.append(pk_field.to_python(value))
+            except (DjangoValidationError, TypeError, ValueError, KeyError):
+                keys.append(None)
+                errors[index] = {'id': ['缺少或无效的 id']}
+
+        seen = set()
+        for index, key in enumerate(keys):
+            if key is not None and key in seen:
+                errors[index] = {'id': ['id 重复']}
+            seen.add(key)
+        seen.discard(None)
+
+        objects = queryset.in_bulk(seen) if seen else {}
+        instances = []
+        for index, key in enumerate(keys):
+            instance = objects.get(key)
+            if instance is None and not errors[index]:
+                errors[index] = {'id': ['对象不存在']}
+            elif instance is not None:
+                self.check_object_permissions(self.request, instance)
+            instances.append(instance)
+        return instances, errors
+
+    def get_bulk_response_instances(self, instances):
+        """通过 get_queryset() 重新读取写入的对象（带预加载），保持请求中的顺序"""
+        objects = self.get_queryset().in_bulk([instance.pk for instance in instances])
+        return [objects.get(instance.pk, instance) for instance in instances]
+
+    @action(detail=False, methods=['post'], url_path='bulk', pagination_class=None)
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        批量创建：请求体为对象数组
+        """
+        items = self.get_bulk_items(request)
+        with use_primary_db(), transaction.atomic():
+            serializer = self.get_bulk_serializer(data=items)
+            if not serializer.is_valid():
+                return self.bulk_error_response(serializer.errors)
+            self.perform_bulk_create(serializer)
+            instances = self.get_bulk_response_instances(serializer.instance)
+        return Response(self.get_serializer(instances, many=True).data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        批量部分更新：请求体为对象数组，每个对象带 id
+        """
+        items = self.get_bulk_items(request)
+        with use_primary_db(), transaction.atomic():
+            instances, errors = self.get_bulk_instances(items, lambda item: item['id'])
+            if any(errors):
+                return self.bulk_error_response(errors)
+            serializer = self.get_bulk_serializer(instances, data=items, partial=True)
+            if not serializer.is_valid():
+                return self.bulk_error_response(serializer.errors)
+            self.perform_bulk_update(serializer)
+            instances = self.get_bulk_response_instances(serializer.instance)
+        return Response(self.get_serializer(instances, many=True).data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        """
+        批量删除：请求体为 id 数组
+        """
+        items = self.get_bulk_items(request)
+        with use_primary_db(), transaction.atomic():
+            instances, errors = self.get_bulk_instances(items, lambda item: item)
+            if any(errors):
+                return self.bulk_error_response(errors)
+            self.perform_bulk_destroy(instances)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_bulk_create(self, serializer):
+        serializer.save()
+
+    def perform_bulk_update(self, serializer):
+        serializer.save()
+
+    def perform_bulk_destroy(self, instances):
+        model = self.get_queryset().model
+        model._default_manager.filter(pk__in=[instance.pk for instance in instances]).delete()
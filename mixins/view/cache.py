@@ -0,0 +1,219 @@
+"""
+列表结果缓存 Mixin
+
+把列表接口最终序列化好的一页数据（response.data）缓存起来，缓存 key 由以下部分组成：
+
+- 视图集、协议与主机名、请求路径与规范化后的查询参数（参数顺序不影响命中）；
+  分页数据中的 next_page / prev_page 是绝对 URL，不同域名或协议访问时不能共用缓存
+- 用户维度：默认每个用户一份缓存；视图集覆盖 get_list_cache_scope 后，
+  返回值相同的用户共享缓存（如 rbac_app.views.RoleScopedListCacheMixin 按角色集合共享）
+- 相关模型的版本号（config.model_versions，post_save / post_delete / m2m_changed 时递增）
+
+模型一有变化旧缓存就不再命中，不需要主动删除。
+未命中时从主库查询（见 config.db_router），避免把只读副本上的旧数据缓存到新版本号下。
+缓存未命中时用 cache.add 实现的锁防止缓存击穿：同一个 key 只有一个请求访问数据库，
+其他请求短暂等待结果写入（LOCK_WAIT），超时后不再等锁、自行查询，避免长时间占住 worker。命中/未命中次数记录在缓存中，响应头 X-Cache 为 HIT 或 MISS。
+
+只依赖 Django cache 的通用接口，locmem、文件缓存等后端都可以使用；
+多进程部署时需要使用进程间共享的后端（见 settings.CACHES），模型版本号才能在进程间同步。
+可在 settings 中通过 LIST_CACHE 覆盖默认配置。
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from config.db_router import use_primary_db
+from config.model_versions import get_model_versions
+
+# 默认配置
+DEFAULT_LIST_CACHE = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",      # 使用的 Django cache 别名
+    "KEY_PREFIX": "list_cache",    # 缓存 key 前缀
+    "TIMEOUT": 30,                 # 缓存过期时间（秒），兜底批量操作等不发送信号的修改
+    "LOCK_TIMEOUT": 10,            # 重建缓存的锁的过期时间（秒）
+    "LOCK_WAIT": 0.2,              # 等待其他请求重建缓存的最长时间（秒），超时后自行查询
+    "LOCK_POLL_INTERVAL": 0.02,    # 等待时检查结果的间隔（秒）
+}
+
+
+def get_list_cache_config():
+    """合并 settings.LIST_CACHE 与默认配置"""
+    return {**DEFAULT_LIST_CACHE, **getattr(settings, "LIST_CACHE", {})}
+
+
+def _incr(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key 不存在：add 失败说明其他请求刚刚创建，再加一次
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_list_cache_stats(view_class=None):
+    """
+    获取列表缓存的命中/未命中次数
+
+    Args:
+        view_class: 只统计某个视图集，None 表示所有使用 ListCacheMixin 的视图集
+
+    Returns:
+        dict: {视图集标识: {"hits": 命中次数, "misses": 未命中次数}}
+    """
+    config = get_list_cache_config()
+    cache = caches[config["CACHE_ALIAS"]]
+    labels = [view_class.get_list_cache_label()] if view_class else sorted(ListCacheMixin.cached_views)
+    keys = {label: (f'{config["KEY_PREFIX"]}:stats:{label}:hits', f'{config["KEY_PREFIX"]}:stats:{label}:misses')
+            for label in labels}
+    values = cache.get_many([key for pair in keys.values() for key in pair])
+    return {
+        label: {"hits": values.get(hits, 0), "misses": values.get(misses, 0)}
+        for label, (hits, misses) in keys.items()
+    }
+
+
+class ListCacheMixin:
+    """
+    列表结果缓存混入类
+
+    使用方法:
+    ```python
+    class PermissionViewSet(ListCacheMixin, viewsets.ModelViewSet):
+        queryset = Permission.objects.all()
+        serializer_class = PermissionSerializer
+        list_cache_timeout = 60                    # 可选，覆盖 settings.LIST_CACHE["TIMEOUT"]
+        list_cache_models = [Permission, Role]     # 可选，默认是模型及其正向关联的模型
+    ```
+
+    默认每个用户一份缓存；结果只取决于角色等权限信息时覆盖 get_list_cache_scope，让这些用户共享缓存。
+    列表结果与当前用户本人有关时，设置 list_cache_vary_on_user = True（忽略 get_list_cache_scope）。
+    """
+    list_cache_timeout = None
+    list_cache_models = None
+    list_cache_vary_on_user = False
+
+    # 使用了列表缓存的视图集标识（统计命中率时使用）
+    cached_views = set()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, "queryset", None) is not None:
+            ListCacheMixin.cached_views.add(cls.get_list_cache_label())
+
+    @classmethod
+    def get_list_cache_label(cls):
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    # ---------- 缓存 key ----------
+    def get_list_cache_models(self):
+        """缓存依赖的模型：默认是查询集的模型及其正向关联（外键、多对多及中间表）的模型"""
+        if self.list_cache_models is not None:
+            return list(self.list_cache_models)
+        model = self.get_queryset().model
+        related = set()
+        for field in model._meta.get_fields():
+            if not field.is_relation or field.related_model is None or field.auto_created:
+                continue
+            related.add(field.related_model)
+            if field.many_to_many:
+                # 直接增删中间表记录时只会递增中间表的版本号
+                related.add(field.remote_field.through)
+        return [model, *sorted(related - {model}, key=lambda m: m._meta.label)]
+
+    def get_list_cache_scope(self, request):
+        """
+        已登录用户的缓存共享范围，返回值相同的用户共享缓存；None 表示每个用户一份缓存
+
+        例如按角色集合共享时返回 "roles:1,3"（见 rbac_app.views.RoleScopedListCacheMixin）。
+        """
+        return None
+
+    def get_list_cache_vary(self, request):
+        """用户维度：共享范围（超级用户、员工标记也会影响权限判断）"""
+        user = request.user
+        if not getattr(user, "is_authenticated", False):
+            return "anonymous"
+        scope = None if self.list_cache_vary_on_user else self.get_list_cache_scope(request)
+        if scope is None:
+            return f"user:{user.pk}"
+        return f"{scope}:su={int(bool(user.is_superuser))}:staff={int(bool(user.is_staff))}"
+
+    def get_list_cache_key(self, request):
+        config = get_list_cache_config()
+        params = sorted((key, tuple(values)) for key, values in request.query_params.lists())
+        renderer = getattr(request, "accepted_renderer", None)
+        versions = get_model_versions(self.get_list_cache_models())
+        raw = repr((
+            request.scheme,
+            request.get_host(),
+            request.path,
+            params,
+            getattr(renderer, "format", None),
+            self.get_list_cache_vary(request),
+            versions,
+        ))
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'{config["KEY_PREFIX"]}:{self.get_list_cache_label()}:{digest}'
+
+    def should_cache_list(self, request):
+        return get_list_cache_config()["ENABLED"] and request.method == "GET"
+
+    # ---------- 统计 ----------
+    def _record(self, cache, config, kind):
+        _incr(cache, f'{config["KEY_PREFIX"]}:stats:{self.get_list_cache_label()}:{kind}')
+
+    # ---------- 列表 ----------
+    def list(self, request, *args, **kwargs):
+        if not self.should_cache_list(request):
+            return super().list(request, *args, **kwargs)
+
+        config = get_list_cache_config()
+        cache = caches[config["CACHE_ALIAS"]]
+        key = self.get_list_cache_key(request)
+
+        data = cache.get(key)
+        if data is None:
+            data = self._wait_or_build(cache, config, key, request, *args, **kwargs)
+            if isinstance(data, Response) or not isinstance(data, (dict, list)):
+                # 流式响应、错误响应等不缓存，原样返回
+                return data
+            self._record(cache, config, "misses")
+            state = "MISS"
+        else:
+            self._record(cache, config, "hits")
+            state = "HIT"
+        return Response(data, headers={"X-Cache": state})
+
+    def _wait_or_build(self, cache, config, key, request, *args, **kwargs):
+        """
+        防止缓存击穿：拿到锁的请求查询数据库并写入缓存，其他请求等待结果
+
+        Returns:
+            缓存的数据；响应不可缓存时返回响应对象本身
+        """
+        lock_key = f"{key}:lock"
+        locked = cache.add(lock_key, 1, config["LOCK_TIMEOUT"])
+        if not locked:
+            deadline = time.monotonic() + config["LOCK_WAIT"]
+            while time.monotonic() < deadline:
+                time.sleep(config["LOCK_POLL_INTERVAL"])
+                data = cache.get(key)
+                if data is not None:
+                    return data
+            # 等待超时（持有锁的请求较慢或失败了），不再等锁，自行查询
+        try:
+            with use_primary_db():
+                response = super().list(request, *args, **kwargs)
+            if type(response) is not Response or response.status_code != 200:
+                return response
+            timeout = self.list_cache_timeout if self.list_cache_timeout is not None else config["TIMEOUT"]
+            cache.set(key, response.data, timeout)
+            return response.data
+        finally:
+            if locked:
+                cache.delete(lock_key)
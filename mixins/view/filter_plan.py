@@ -0,0 +1,182 @@
+"""
+搜索过滤计划
+
+根据序列化器 Meta（静态读取，不实例化序列化器）和模型字段类型，
+为每个可搜索的查询参数预先确定查询方式：
+
+- 整数、布尔、外键、多对多、带 choices 的字段：精确匹配（exact），逗号分隔的多个值使用 __in
+- 日期、时间字段：单个值精确匹配（时间字段按日期匹配），``field[]=开始&field[]=结束`` 为范围查询
+- 文本字段：由 text_lookup 指定，默认 icontains，可改为能使用索引的 istartswith
+- JSON、文件等字段不参与搜索
+
+过滤计划按 (视图集类, 序列化器类) 缓存，请求时只需遍历计划。
+"""
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# 查询方式
+EXACT = "exact"
+TEXT = "text"
+DATE = "date"
+DATETIME = "datetime"
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+SKIPPED_FIELDS = (models.JSONField, models.FileField, models.BinaryField)
+
+
+class FieldFilter:
+    """单个查询参数的过滤规则"""
+
+    __slots__ = ("name", "kind", "to_python", "many")
+
+    def __init__(self, name, kind, to_python, many=False):
+        self.name = name            # 查询参数名，即字段名
+        self.kind = kind            # EXACT / TEXT / DATE / DATETIME
+        self.to_python = to_python  # 把字符串转换成字段值
+        self.many = many            # 多对多字段，过滤后需要去重
+
+    def __repr__(self):
+        return f"FieldFilter({self.name!r}, {self.kind!r})"
+
+    def convert(self, value):
+        try:
+            return self.to_python(value)
+        except (DjangoValidationError, ValueError, TypeError):
+            raise ValidationError({self.name: f"无效的值：{value}"})
+
+    def exact_q(self, value):
+        """精确匹配，逗号分隔的多个值使用 __in"""
+        if "," in value:
+            values = [self.convert(item) for item in value.split(",") if item]
+            return Q(**{f"{self.name}__in": values})
+        if self.kind == DATETIME:
+            date = _parse_date(value)
+            if date is not None:
+                # 只给出日期时按日期匹配
+                return Q(**{f"{self.name}__date": date})
+            return Q(**{self.name: _aware(self.convert(value))})
+        return Q(**{self.name: self.convert(value)})
+
+    def range_q(self, values):
+        """范围查询：两个值分别为开始和结束"""
+        start, end = (self.convert(value) for value in values)
+        if self.kind == DATETIME:
+            start, end = _aware(start), _aware(end)
+        return Q(**{f"{self.name}__range": (start, end)})
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def _aware(value):
+    """确保时间带有时区信息"""
+    return make_aware(value) if is_naive(value) else value
+
+
+def _to_bool(value):
+    if value in serializers.BooleanField.TRUE_VALUES:
+        return True
+    if value in serializers.BooleanField.FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+def _to_datetime(value):
+    result = parse_datetime(value)
+    if result is None:
+        raise ValueError(value)
+    return result
+
+
+def build_field_filter(model_field, name):
+    """根据模型字段类型确定过滤规则，不支持的字段返回 None"""
+    # 反向关系和 JSON、文件等字段不参与搜索
+    if not isinstance(model_field, models.Field) or isinstance(model_field, SKIPPED_FIELDS):
+        return None
+    if model_field.is_relation:
+        # 外键、多对多按关联对象的主键精确匹配
+        pk_field = model_field.related_model._meta.pk
+        return FieldFilter(name, EXACT, pk_field.to_python, many=model_field.many_to_many)
+    if model_field.choices:
+        return FieldFilter(name, EXACT, model_field.to_python)
+    if isinstance(model_field, models.BooleanField):
+        return FieldFilter(name, EXACT, _to_bool)
+    if isinstance(model_field, models.DateTimeField):
+        return FieldFilter(name, DATETIME, _to_datetime)
+    if isinstance(model_field, models.DateField):
+        return FieldFilter(name, DATE, model_field.to_python)
+    if isinstance(model_field, TEXT_FIELDS):
+        return FieldFilter(name, TEXT, str)
+    return FieldFilter(name, EXACT, model_field.to_python)
+
+
+def serializer_field_names(serializer_class):
+    """
+    静态读取序列化器的字段名（不实例化序列化器）
+
+    Returns:
+        tuple: (模型, 字段名列表)；不是 ModelSerializer 时返回 (None, 声明的字段名)
+    """
+    declared = getattr(serializer_class, "_declared_fields", {})
+    meta = getattr(serializer_class, "Meta", None)
+    model = getattr(meta, "model", None)
+    if model is None:
+        return None, list(declared)
+
+    fields = getattr(meta, "fields", None)
+    exclude = set(getattr(meta, "exclude", None) or ())
+    if fields and fields != "__all__":
+        return model, list(fields)
+    names = [
+        field.name for field in model._meta.get_fields()
+        if field.concrete or field.many_to_many and not field.auto_created
+    ]
+    names += [name for name in declared if name not in names]
+    return model, [name for name in names if name not in exclude]
+
+
+def build_filter_plan(serializer_class, model=None, range_fields=()):
+    """
+    根据序列化器类推导过滤计划
+
+    Args:
+        serializer_class: 序列化器类
+        model: 序列化器没有 Meta.model 时使用的模型（通常是 queryset.model）
+        range_fields: 强制按范围查询的字段（SearchableListModelMixinUp.time_range_fields）
+
+    Returns:
+        dict: {查询参数名: FieldFilter}
+    """
+    serializer_model, names = serializer_field_names(serializer_class)
+    model = serializer_model or model
+    declared = getattr(serializer_class, "_declared_fields", {})
+    plan = {}
+    # 范围查询字段即使不在序列化器中也可以过滤
+    names += [name for name in range_fields if name not in names]
+    for name in names:
+        serializer_field = declared.get(name)
+        if serializer_field is not None:
+            # 只处理直接对应模型字段的声明字段
+            if serializer_field.write_only or (serializer_field.source not in (None, name)):
+                continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        field_filter = build_field_filter(model_field, name)
+        if field_filter is None:
+            continue
+        if name in range_fields and field_filter.kind not in (DATE, DATETIME):
+            field_filter = FieldFilter(name, DATETIME, _to_datetime)
+        plan[name] = field_filter
+    return plan
@@ -0,0 +1,114 @@
+"""
+自动预加载 Mixin
+
+根据序列化器的字段结构自动推导 select_related / prefetch_related，
+避免列表接口序列化嵌套对象、多对多关系时产生 N+1 查询。
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+
+def _get_relation(model, name):
+    """获取模型上名为 name 的关系字段，不是关系字段时返回 None"""
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _walk(serializer, model, prefix, in_prefetch, select_related, prefetch_related):
+    """递归遍历序列化器字段，收集需要预加载的关系路径"""
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        # 只处理直接对应模型字段的 source，如 "roles"；点号路径与方法字段无法静态推导
+        if len(field.source_attrs) != 1:
+            continue
+        relation = _get_relation(model, field.source_attrs[0])
+        if relation is None:
+            continue
+
+        path = f"{prefix}{field.source}"
+        related_model = relation.related_model
+        to_many = relation.many_to_many or relation.one_to_many
+
+        if isinstance(field, serializers.ListSerializer):
+            # 嵌套序列化器 many=True
+            prefetch_related.add(path)
+            _walk(field.child, related_model, f"{path}__", True, select_related, prefetch_related)
+        elif isinstance(field, serializers.BaseSerializer):
+            # 单个嵌套序列化器
+            if to_many:
+                continue
+            (prefetch_related if in_prefetch else select_related).add(path)
+            _walk(field, related_model, f"{path}__", in_prefetch, select_related, prefetch_related)
+        elif isinstance(field, ManyRelatedField):
+            # 关联字段 many=True，如 PrimaryKeyRelatedField(many=True)
+            prefetch_related.add(path)
+        elif isinstance(field, RelatedField) and not to_many:
+            # PrimaryKeyRelatedField 直接读取 xxx_id，不需要预加载
+            if isinstance(field, PrimaryKeyRelatedField) and relation.concrete:
+                continue
+            (prefetch_related if in_prefetch else select_related).add(path)
+
+
+def build_prefetch_plan(serializer_class):
+    """
+    根据序列化器类推导预加载计划
+
+    Args:
+        serializer_class: ModelSerializer 子类
+
+    Returns:
+        tuple: (select_related 路径元组, prefetch_related 路径元组)
+    """
+    meta = getattr(serializer_class, "Meta", None)
+    model = getattr(meta, "model", None)
+    if model is None:
+        return (), ()
+
+    select_related, prefetch_related = set(), set()
+    _walk(serializer_class(), model, "", False, select_related, prefetch_related)
+    # 已经通过 select_related 加载的路径不需要再 prefetch
+    prefetch_related -= select_related
+    return tuple(sorted(select_related)), tuple(sorted(prefetch_related))
+
+
+class AutoPrefetchMixin:
+    """
+    自动预加载混入类
+
+    按序列化器类推导出预加载计划（每个序列化器类只推导一次并缓存），
+    在 get_queryset 中自动应用，使列表接口的查询次数与分页大小无关。
+
+    使用方法:
+    ```python
+    class RoleViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
+        queryset = Role.objects.all()
+        serializer_class = RoleSerializer
+    ```
+    """
+
+    # 预加载计划缓存：{序列化器类: (select_related, prefetch_related)}
+    _prefetch_plans = {}
+
+    @classmethod
+    def get_prefetch_plan(cls, serializer_class):
+        """获取序列化器类对应的预加载计划（带缓存）"""
+        plan = cls._prefetch_plans.get(serializer_class)
+        if plan is None:
+            plan = build_prefetch_plan(serializer_class)
+            cls._prefetch_plans[serializer_class] = plan
+        return plan
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = self.get_prefetch_plan(self.get_serializer_class())
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
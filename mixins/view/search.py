@@ -5,18 +5,198 @@
 """
 
 from rest_framework import status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.db.models import Q
-from django.utils.dateparse import parse_datetime
-from django.utils.timezone import make_aware
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-class SearchableListModelMixin(viewsets.ModelViewSet):
+from config.renderers import CustomRenderer, StreamingEnvelopeResponse
+from .budget import QueryBudgetMixin
+from .export import iter_serialized_rows
+from .facets import build_facet_field, compute_facets
+from .filter_plan import DATE, DATETIME, TEXT, build_filter_plan
+from .search_backends import IcontainsSearchBackend
+
+FACETS_PARAMETER = OpenApiParameter(
+    name='facets', description='返回分面计数的字段，逗号分隔（all 表示 facet_fields 中的全部字段）', required=False, type=str
+)
+
+
+class StreamingListMixin:
+    """
+    未分页时流式输出列表
+
+    关闭分页的大列表如果一次性序列化，会同时持有完整的对象列表、序列化结果和响应字节。
+    这里改为从查询集 iterator() 逐行序列化、逐行输出，内存占用与行数无关。
+    只在响应使用 CustomRenderer（JSON）渲染时生效，可浏览 API 等仍走普通响应。
+    """
+    # 未分页时是否流式输出
+    stream_unpaginated = True
+    stream_chunk_size = 2000
+
+    def should_stream(self, request):
+        return self.stream_unpaginated and isinstance(getattr(request, 'accepted_renderer', None), CustomRenderer)
+
+    def stream_list_response(self, queryset):
+        # 查询在视图返回之后执行，迭代时重新启用当前请求的查询预算（见 budget.QueryBudgetMixin）
+        budget = getattr(self, '_query_budget', None)
+        rows = iter_serialized_rows(self.get_serializer(), queryset, self.stream_chunk_size, budget)
+        return StreamingEnvelopeResponse(rows, renderer=self.request.accepted_renderer)
+
+
+class SearchBackendMixin:
+    """
+    可插拔的搜索后端与预编译的过滤计划
+
+    search_fields 声明使用搜索后端的字段，search_backend_class 指定后端（见 search_backends）。
+    后端在定义子类时创建（FTS5SearchBackend 此时连接模型信号同步影子表），请求时直接复用。
+
+    其他查询参数按过滤计划处理（见 filter_plan）：根据序列化器 Meta 与模型字段类型，
+    整数、布尔、外键、choices 字段精确匹配，日期字段支持范围查询，
+    文本字段使用 text_lookup（默认 icontains，可改为能使用索引的 istartswith）。
+    过滤计划每个视图集、序列化器只推导一次。
+
+    使用方法:
+    ```python
+    class UserViewSet(SearchableListModelMixin, viewsets.ModelViewSet):
+        queryset = User.objects.all()
+        serializer_class = UserSerializer
+        search_fields = ('username', 'email')
+        search_backend_class = FTS5SearchBackend
+        facet_fields = ('is_active', 'is_staff')  # ?facets=is_active,is_staff
+    ```
+    """
+    search_fields = None
+    search_backend_class = IcontainsSearchBackend
+    # 不在 search_fields 中的文本字段的查询方式：icontains 或 istartswith
+    text_lookup = 'icontains'
+    # 强制按范围查询的字段
+    time_range_fields = []
+
+    # 分面字段：?facets=type,is_active 时随当前页返回这些字段各取值的数量（?facets=all 表示全部）
+    facet_fields = ()
+    facets_query_param = 'facets'
+
+    # 过滤计划缓存：{(视图集类, 序列化器类): {查询参数名: FieldFilter}}
+    _filter_plans = {}
+    # 分面规则缓存：{(视图集类, 模型): {字段名: FacetField}}
+    _facet_specs = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        queryset = getattr(cls, 'queryset', None)
+        if cls.search_fields and queryset is not None:
+            cls.get_search_backend(queryset.model)
+
+    @classmethod
+    def get_search_backend(cls, model):
+        """获取模型对应的搜索后端"""
+        fields = tuple(cls.search_fields or ())
+        backend_class = cls.search_backend_class
+        if hasattr(backend_class, 'for_model'):
+            return backend_class.for_model(model, fields)
+        return backend_class(model, fields)
+
+    @classmethod
+    def get_filter_plan(cls, serializer_class, model=None):
+        """获取序列化器类对应的过滤计划（带缓存）"""
+        key = (cls, serializer_class)
+        plan = cls._filter_plans.get(key)
+        if plan is None:
+            plan = build_filter_plan(serializer_class, model, tuple(cls.time_range_fields))
+            cls._filter_plans[key] = plan
+        return plan
+
+    @classmethod
+    def get_facet_specs(cls, model):
+        """获取模型对应的分面规则（带缓存）"""
+        key = (cls, model)
+        specs = cls._facet_specs.get(key)
+        if specs is None:
+            specs = {name: build_facet_field(model, name) for name in cls.facet_fields}
+            cls._facet_specs[key] = specs
+        return specs
+
+    def get_requested_facets(self, request, model):
+        """请求的分面字段，没有请求时返回空列表"""
+        raw = request.query_params.get(self.facets_query_param)
+        if not raw or not self.facet_fields:
+            return []
+        specs = self.get_facet_specs(model)
+        if raw == 'all':
+            return list(specs.values())
+        names = [name for name in raw.split(',') if name]
+        unknown = [name for name in names if name not in specs]
+        if unknown:
+            raise ValidationError({self.facets_query_param: f"不支持的分面字段：{', '.join(unknown)}"})
+        return [specs[name] for name in names]
+
+    def get_paginated_response_with_facets(self, data, queryset):
+        """分页响应，请求了分面时附带 facets（与当前页一起被列表缓存）"""
+        response = self.get_paginated_response(data)
+        facets = self.get_requested_facets(self.request, queryset.model)
+        if facets:
+            get_key = getattr(self.paginator, 'get_key', None)
+            response.data[get_key('facets') if get_key else 'facets'] = compute_facets(queryset, facets)
+        return response
+
+    def reject_unpaginated_facets(self, request, model):
+        """未分页（包括流式输出）时响应是纯列表，没有位置附带 facets，请求了分面时返回 400"""
+        if self.get_requested_facets(request, model):
+            raise ValidationError({self.facets_query_param: "未分页的列表不支持分面计数"})
+
+    def apply_search_filters(self, queryset, query_params, range_only=()):
+        """
+        按过滤计划过滤查询集
+
+        Args:
+            queryset: 查询集
+            query_params: 请求参数
+            range_only: 只接受范围查询（field[]）的字段
+        """
+        plan = self.get_filter_plan(self.get_serializer_class(), queryset.model)
+        search_fields = self.search_fields or ()
+        query = Q()
+        terms = {}
+        distinct = False
+
+        for name, field_filter in plan.items():
+            # 范围查询：field[]=开始&field[]=结束
+            if field_filter.kind in (DATE, DATETIME):
+                values = query_params.getlist(f'{name}[]')
+                if len(values) == 2 and all(values):
+                    query &= field_filter.range_q(values)
+                    continue
+            if name in range_only:
+                continue
+            value = query_params.get(name)
+            if not value:
+                continue
+            if field_filter.kind == TEXT:
+                if name in search_fields or self.text_lookup == 'icontains':
+                    terms[name] = value
+                else:
+                    query &= Q(**{f'{name}__{self.text_lookup}': value})
+            else:
+                query &= field_filter.exact_q(value)
+                distinct = distinct or field_filter.many
+
+        queryset = queryset.filter(query)
+        if terms:
+            # 模糊查询交给搜索后端（默认 icontains）
+            queryset = self.get_search_backend(queryset.model).filter(queryset, terms)
+        # 按多对多字段过滤会产生重复行
+        return queryset.distinct() if distinct else queryset
+
+
+class SearchableListModelMixin(QueryBudgetMixin, SearchBackendMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     基础搜索功能混入类
 
-    为 ModelViewSet 提供基本的搜索功能，支持对序列化器中定义的字段进行模糊查询。
-    默认使用 icontains 查询方式（不区分大小写的包含查询）。
+    为 ModelViewSet 提供基本的搜索功能，支持对序列化器中定义的字段进行查询。
+    文本字段默认使用 icontains 查询方式（不区分大小写的包含查询），
+    整数、布尔、外键、choices 字段精确匹配（逗号分隔多个值），日期字段支持 field[] 范围查询。
+    每个请求受查询预算限制（见 budget.QueryBudgetMixin，可通过 query_budget 属性覆盖）。
     
     使用方法:
     ```python
@@ -28,7 +208,8 @@ class SearchableListModelMixin(viewsets.ModelViewSet):
     
     @extend_schema(
         parameters=[
-            OpenApiParameter(name='field_name', description='按字段名搜索（替换为实际字段名）', required=False, type=str)
+            OpenApiParameter(name='field_name', description='按字段名搜索（替换为实际字段名）', required=False, type=str),
+            FACETS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -37,27 +218,19 @@ class SearchableListModelMixin(viewsets.ModelViewSet):
 
         根据请求参数自动构建查询条件，支持对序列化器中的字段进行搜索。
         """
-        # 获取查询参数
-        query_params = request.query_params
-        # 获取序列化器的字段
-        serializer_fields = set(self.get_serializer().fields.keys())
-
-        # 构建查询集
-        query = Q()
-        for field, value in query_params.items():
-            # 检查字段是否在序列化器中
-            if field in serializer_fields and value:
-                # 对符合条件的字段进行模糊查询
-                query.add(Q(**{f'{field}__icontains': value}), Q.AND)
-
         # 应用查询集到模型上
-        queryset = self.get_queryset().filter(query)
+        queryset = self.filter_search_queryset(self.get_queryset())
         
         # 分页处理
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response_with_facets(serializer.data, queryset)
+        self.reject_unpaginated_facets(request, queryset.model)
+
+        # 未分页的大列表逐行流式输出
+        if self.should_stream(request):
+            return self.stream_list_response(queryset)
 
         # 序列化查询结果
         serializer = self.get_serializer(queryset, many=True)
@@ -65,8 +238,14 @@ class SearchableListModelMixin(viewsets.ModelViewSet):
         # 返回响应
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def filter_search_queryset(self, queryset):
+        """
+        根据请求参数过滤查询集（列表、导出等接口共用）
+        """
+        return self.apply_search_filters(queryset, self.request.query_params)
 
-class SearchableListModelMixinUp(viewsets.ModelViewSet):
+
+class SearchableListModelMixinUp(QueryBudgetMixin, SearchBackendMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     高级搜索功能混入类
     
@@ -91,7 +270,8 @@ class SearchableListModelMixinUp(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(name='field_name', description='按字段名搜索（替换为实际字段名）', required=False, type=str),
             OpenApiParameter(name='time_field[]', description='时间范围查询（替换为实际时间字段名，需要两个值表示开始和结束时间）', 
-                           required=False, type=str, many=True)
+                           required=False, type=str, many=True),
+            FACETS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -101,35 +281,27 @@ class SearchableListModelMixinUp(viewsets.ModelViewSet):
         除了基本的字段搜索外，还支持对指定的时间字段进行范围查询。
         时间范围需要提供开始和结束时间，格式为 ISO 8601（如：2022-01-01T00:00:00）。
         """
-        query_params = request.query_params
-        serializer_fields = set(self.get_serializer().fields.keys())
-        query = Q()
-
-        # 普通字段模糊搜索（排除时间范围字段）
-        for field, value in query_params.items():
-            if field in serializer_fields and field not in self.time_range_fields and value:
-                query.add(Q(**{f'{field}__icontains': value}), Q.AND)
-
-        # 时间范围过滤
-        for time_field in self.time_range_fields:
-            time_values = query_params.getlist(f'{time_field}[]')
-            if time_values and len(time_values) == 2:
-                start_date = parse_datetime(time_values[0])
-                end_date = parse_datetime(time_values[1])
-                if start_date and end_date:
-                    # 确保时间带有时区信息
-                    start_date = make_aware(start_date) if start_date.tzinfo is None else start_date
-                    end_date = make_aware(end_date) if end_date.tzinfo is None else end_date
-                    query.add(Q(**{f'{time_field}__range': (start_date, end_date)}), Q.AND)
-
         # 查询和排序
-        queryset = self.get_queryset().filter(query).order_by('id')  # 默认按 ID 排序
+        queryset = self.filter_search_queryset(self.get_queryset())
         
         # 分页处理
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response_with_facets(serializer.data, queryset)
+        self.reject_unpaginated_facets(request, queryset.model)
+
+        if self.should_stream(request):
+            return self.stream_list_response(queryset)
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK) 
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def filter_search_queryset(self, queryset):
+        """
+        根据请求参数过滤查询集（列表、导出等接口共用）
+        """
+        queryset = self.apply_search_filters(
+            queryset, self.request.query_params, range_only=self.time_range_fields
+        )
+        return queryset.order_by('id')  # 默认按 ID 排序
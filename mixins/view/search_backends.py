@@ -0,0 +1,252 @@
+"""
+搜索后端
+
+SearchableListModelMixin 默认把搜索参数转换成 field__icontains，也就是 LIKE '%x%'，
+每次搜索都要全表扫描。这里提供可插拔的搜索后端：
+
+- IcontainsSearchBackend：原来的 icontains 行为
+- FTS5SearchBackend：为声明的 search_fields 维护一张 SQLite FTS5 影子表（trigram 分词），
+  搜索参数转换成 MATCH 查询，再通过 rowid（即模型主键）关联回模型表
+
+影子表按“模型 + 字段集合”命名（同一模型的不同 search_fields 各用一张表），
+在首次使用时（事务之外）自动创建并填充，之后由模型的 post_save / post_delete 信号同步；
+QuerySet.update()、bulk_create() 等批量操作不会发送信号，需要执行
+``python manage.py rebuild_search_index`` 重建。
+数据库不是 SQLite、SQLite 不支持 FTS5 trigram，或搜索词不足 3 个字符时，退回 icontains。
+"""
+
+import hashlib
+import threading
+
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+
+class IcontainsSearchBackend:
+    """不区分大小写的包含查询（LIKE '%x%'）"""
+
+    def __init__(self, model=None, fields=()):
+        self.model = model
+        self.fields = tuple(fields)
+
+    def filter(self, queryset, terms):
+        """
+        按搜索词过滤查询集
+
+        Args:
+            queryset: 查询集
+            terms: {字段名: 搜索词}，多个字段之间是 AND 关系
+        """
+        query = Q()
+        for field, value in terms.items():
+            query &= Q(**{f'{field}__icontains': value})
+        return queryset.filter(query)
+
+
+class FTS5SearchBackend(IcontainsSearchBackend):
+    """
+    SQLite FTS5 全文索引搜索后端
+
+    每个 (模型, 字段集合) 对应一个实例和一张影子表，通过 for_model 获取；
+    创建实例时连接模型信号，保存、删除对象时同步影子表，unregister 断开信号并移除实例。
+    影子表是否存在按数据库别名缓存，只有首次使用时查询 sqlite_master。
+    """
+
+    # trigram 分词至少需要 3 个字符才能匹配
+    min_term_length = 3
+
+    # (模型, 字段) -> 实例
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model, fields):
+        super().__init__(model, fields)
+        digest = hashlib.md5(",".join(self.fields).encode()).hexdigest()[:8]
+        self.table = f"{model._meta.db_table}_fts_{digest}"
+        self.fallback = IcontainsSearchBackend(model, fields)
+        self._unavailable = set()  # 不支持 FTS5 的数据库别名
+        self._existing = set()  # 已确认影子表存在的数据库别名
+
+    @classmethod
+    def for_model(cls, model, fields):
+        """获取模型对应的搜索后端（同一模型与字段只创建一次，并连接同步信号）"""
+        key = (model, tuple(fields))
+        backend = cls._instances.get(key)
+        if backend is None:
+            with cls._lock:
+                backend = cls._instances.get(key)
+                if backend is None:
+                    backend = cls._instances[key] = cls(model, fields)
+                    backend.connect_signals()
+        return backend
+
+    def unregister(self):
+        """断开同步信号并移除实例（之后 for_model 会重新创建）"""
+        with self._lock:
+            if self._instances.get((self.model, self.fields)) is self:
+                del self._instances[(self.model, self.fields)]
+        post_save.disconnect(sender=self.model, dispatch_uid=f"{self._dispatch_uid}:save")
+        post_delete.disconnect(sender=self.model, dispatch_uid=f"{self._dispatch_uid}:delete")
+
+    @classmethod
+    def registered(cls):
+        """所有已创建的搜索后端（重建索引时使用）"""
+        return list(cls._instances.values())
+
+    # ---------- 影子表 ----------
+    def _quote(self, connection, name):
+        return connection.ops.quote_name(name)
+
+    def _table_exists(self, connection):
+        if connection.alias in self._existing:
+            return True
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.table])
+            exists = cursor.fetchone() is not None
+        if exists:
+            self._existing.add(connection.alias)
+        return exists
+
+    def _create_table(self, connection):
+        columns = ", ".join(self._quote(connection, field) for field in self.fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {self._quote(connection, self.table)} "
+                f"USING fts5({columns}, tokenize = 'trigram')"
+            )
+        self._existing.add(connection.alias)
+
+    def _insert_rows(self, connection, rows):
+        columns = ", ".join(["rowid", *(self._quote(connection, field) for field in self.fields)])
+        placeholders = ", ".join(["%s"] * (len(self.fields) + 1))
+        sql = f"INSERT INTO {self._quote(connection, self.table)} ({columns}) VALUES ({placeholders})"
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                sql, [[row[0], *("" if value is None else str(value) for value in row[1:])] for row in rows]
+            )
+
+    def _populate(self, using, batch_size=2000):
+        connection = connections[using]
+        queryset = self.model._default_manager.using(using).values_list("pk", *self.fields).order_by("pk")
+        batch = []
+        for row in queryset.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self._insert_rows(connection, batch)
+                batch = []
+        if batch:
+            self._insert_rows(connection, batch)
+
+    def is_available(self, using):
+        return connections[using].vendor == "sqlite" and using not in self._unavailable
+
+    def ensure_index(self, using):
+        """
+        确保影子表存在，不存在时创建并填充
+
+        虚拟表的建表/删表语句在事务回滚时并不安全（回滚后 SQLite 的 schema 缓存可能与文件不一致），
+        因此只在自动提交模式下（不在 atomic 块中）创建；在事务中遇到影子表不存在时本次先退回 icontains。
+
+        Returns:
+            bool: 影子表是否可用
+        """
+        if not self.is_available(using):
+            return False
+        connection = connections[using]
+        if self._table_exists(connection):
+            return True
+        if connection.in_atomic_block:
+            return False
+        try:
+            self._create_table(connection)
+        except DatabaseError:
+            # SQLite 编译时未启用 FTS5 或不支持 trigram 分词
+            self._unavailable.add(using)
+            return False
+        try:
+            with transaction.atomic(using=using):
+                self._populate(using)
+        except Exception:
+            self._drop_table(connection)
+            raise
+        return True
+
+    def _drop_table(self, connection):
+        self._existing.discard(connection.alias)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self._quote(connection, self.table)}")
+
+    def rebuild(self, using="default"):
+        """删除并重建影子表（需要在事务之外调用）"""
+        if not self.is_available(using):
+            return False
+        connection = connections[using]
+        if connection.in_atomic_block:
+            raise RuntimeError("不能在事务中重建全文索引")
+        self._drop_table(connection)
+        return self.ensure_index(using)
+
+    # ---------- 信号同步 ----------
+    @property
+    def _dispatch_uid(self):
+        return f"fts5_search:{self.model._meta.label_lower}:{','.join(self.fields)}"
+
+    def connect_signals(self):
+        uid = self._dispatch_uid
+        post_save.connect(self._instance_saved, sender=self.model, weak=False, dispatch_uid=f"{uid}:save")
+        post_delete.connect(self._instance_deleted, sender=self.model, weak=False, dispatch_uid=f"{uid}:delete")
+
+    def _instance_saved(self, sender, instance, raw=False, using=None, **kwargs):
+        using = using or router.db_for_write(self.model)
+        if raw or not self.is_available(using):
+            return
+        connection = connections[using]
+        if not self._table_exists(connection):
+            # 创建时会把这一行一起填充进去；事务中无法创建时，之后创建影子表时同样会填充
+            self.ensure_index(using)
+            return
+        self._delete_row(connection, instance.pk)
+        self._insert_rows(connection, [[instance.pk, *(getattr(instance, field) for field in self.fields)]])
+
+    def _instance_deleted(self, sender, instance, using=None, **kwargs):
+        using = using or router.db_for_write(self.model)
+        if not self.is_available(using):
+            return
+        connection = connections[using]
+        if self._table_exists(connection):
+            self._delete_row(connection, instance.pk)
+
+    def _delete_row(self, connection, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self._quote(connection, self.table)} WHERE rowid = %s", [pk])
+
+    # ---------- 查询 ----------
+    @staticmethod
+    def _match_term(field, value):
+        # 用双引号包成字符串，避免搜索词中的运算符被 FTS5 解析
+        return f'{field} : "{value.replace(chr(34), chr(34) * 2)}"'
+
+    def filter(self, queryset, terms):
+        fts_terms = {}
+        fallback_terms = {}
+        for field, value in terms.items():
+            if field in self.fields and len(value) >= self.min_term_length:
+                fts_terms[field] = value
+            else:
+                fallback_terms[field] = value
+
+        if fts_terms and not self.ensure_index(queryset.db):
+            fallback_terms.update(fts_terms)
+            fts_terms = {}
+
+        if fts_terms:
+            expression = " AND ".join(self._match_term(field, value) for field, value in fts_terms.items())
+            table = self._quote(connections[queryset.db], self.table)
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (expression,))
+            )
+        if fallback_terms:
+            queryset = self.fallback.filter(queryset, fallback_terms)
+        return queryset
@@ -0,0 +1,148 @@
+"""
+无状态 JWT 认证
+
+签发令牌时把用户 id、is_active、is_staff、角色 id 和权限版本号写入 claims，
+认证时直接根据 claims 构造轻量的用户对象，不再每个请求查询一次 User 表。
+
+只有令牌中的权限版本号与当前版本号（见 permission_cache.get_user_version）不一致时，
+才回退到数据库查询。版本号保存在 Django cache 中，多进程部署时需要使用进程间共享的缓存后端，
+否则其他进程读到的是自己生成的版本号，每个请求都会判定为过期并查询数据库。
+"""
+
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from . import permission_cache
+
+# 权限版本号在令牌中的 claim 名称
+PERMISSION_VERSION_CLAIM = "perm_version"
+
+
+def add_rbac_claims(token, user):
+    """把用户状态、角色和权限版本号写入令牌"""
+    # 先读取版本号：如果读取角色期间发生变化，版本号会更新，令牌会被判定为过期
+    token[PERMISSION_VERSION_CLAIM] = permission_cache.get_user_version(user.pk)
+    token["username"] = user.get_username()
+    token["is_active"] = user.is_active
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token["role_ids"] = sorted(permission_cache.get_role_ids(user.pk))
+    return token
+
+
+class RBACTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """登录时签发带 RBAC claims 的令牌"""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_rbac_claims(super().get_token(user), user)
+
+
+class RBACTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    刷新时重新写入最新的 RBAC claims，避免沿用刷新令牌中的旧信息
+
+    流程与上游 TokenRefreshSerializer.validate 相同，只是复用其中查询到的用户写入 claims，
+    每次刷新只查询一次 User 表。
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(add_rbac_claims(refresh.access_token, user))}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # 未安装 token_blacklist 应用
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class RBACTokenUser(TokenUser):
+    """
+    由令牌 claims 构造的轻量用户对象
+
+    权限相关方法与 rbac_app.models.User 保持一致，数据来自权限缓存。
+    """
+
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", True)
+
+    @cached_property
+    def role_ids(self):
+        return frozenset(self.token.get("role_ids", ()))
+
+    def get_permission_codes(self):
+        return permission_cache.get_permission_codes(self.pk)
+
+    def has_permission_code(self, code):
+        return code in self.get_permission_codes()
+
+    def __eq__(self, other):
+        # 与 User 模型实例也可以比较，方便 IsOwnerOrReadOnly 等权限判断
+        if isinstance(other, get_user_model()):
+            return self.pk == other.pk
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    无状态 JWT 认证
+
+    令牌中的权限版本号仍然有效时，直接返回 RBACTokenUser，不访问数据库；
+    版本号过期（角色、权限或账号状态已变化）或令牌中没有版本号时，回退到数据库查询。
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = validated_token.get(PERMISSION_VERSION_CLAIM)
+        user = RBACTokenUser(validated_token)
+        if version is None or version != permission_cache.get_user_version(user.pk):
+            return super().get_user(validated_token)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """drf-spectacular 只按类名精确匹配认证类，子类需要单独注册 jwtAuth 安全方案"""
+
+    target_class = "rbac_app.authentication.StatelessJWTAuthentication"
@@ -0,0 +1,142 @@
+"""
+菜单/路由树
+
+一次查询取出用户可见的 Permission，在内存中按 parent_id 以 O(n) 组装成嵌套树，
+供 Vben 前端生成菜单与路由。
+
+组装结果按“角色集合”缓存：拥有相同角色的用户共享同一份缓存。
+Permission、RolePermission 变化时递增树版本号（事务提交后再递增一次），旧缓存随之失效；
+缓存的树总是从主库加载，避免把只读副本上的旧数据缓存到新版本号下。
+"""
+
+import hashlib
+
+from django.core.cache import caches
+from django.db import transaction
+
+from config.db_router import use_primary_db
+
+from . import permission_cache
+from .models import Permission
+
+# 树节点包含的字段
+TREE_FIELDS = ("id", "name", "code", "type", "parent_id", "path", "config")
+
+TREE_CACHE_PREFIX = "rbac:menu_tree"
+TREE_VERSION_KEY = f"{TREE_CACHE_PREFIX}:version"
+
+
+def _get_cache():
+    return caches[permission_cache.get_cache_config()["CACHE_ALIAS"]]
+
+
+def get_tree_version():
+    """获取当前的树版本号"""
+    return _get_cache().get_or_set(TREE_VERSION_KEY, 1, None)
+
+
+def _bump_tree_version():
+    cache = _get_cache()
+    try:
+        cache.incr(TREE_VERSION_KEY)
+    except ValueError:
+        cache.set(TREE_VERSION_KEY, 2, None)
+
+
+def bump_tree_version():
+    """
+    递增树版本号，使所有角色集合的缓存树失效
+
+    立即递增一次，并在事务提交后再递增一次，
+    避免事务提交前其他请求把旧树缓存到新版本号下。
+    """
+    _bump_tree_version()
+    transaction.on_commit(_bump_tree_version)
+
+
+def build_tree(rows):
+    """
+    将扁平的权限行组装成嵌套树
+
+    父节点不可见（未授权）的节点会被提升为根节点。
+
+    Args:
+        rows: 包含 TREE_FIELDS 字段的字典列表，需按期望的兄弟顺序排列
+
+    Returns:
+        list: 根节点列表，每个节点带有 children 列表
+    """
+    nodes = {}
+    for row in rows:
+        node = {key: row[key] for key in TREE_FIELDS if key != "parent_id"}
+        node["meta"] = node.pop("config") or {}
+        node["children"] = []
+        nodes[row["id"]] = (node, row["parent_id"])
+
+    roots = []
+    for node, parent_id in nodes.values():
+        parent = nodes.get(parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent[0]["children"].append(node)
+    return roots
+
+
+def load_tree(role_ids=None):
+    """
+    一次查询加载权限并组装成树
+
+    Args:
+        role_ids: 角色 id 集合；为 None 时加载全部权限（超级管理员）
+
+    Returns:
+        list: 根节点列表
+    """
+    queryset = Permission.objects.all()
+    if role_ids is not None:
+        queryset = queryset.filter(roles__in=role_ids).distinct()
+    return build_tree(queryset.order_by("id").values(*TREE_FIELDS))
+
+
+def _role_set_key(role_ids):
+    if role_ids is None:
+        return "all"
+    raw = ",".join(str(role_id) for role_id in sorted(role_ids))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_tree_for_roles(role_ids, timeout=None):
+    """
+    获取指定角色集合可见的树（带缓存）
+
+    Args:
+        role_ids: 角色 id 集合；为 None 时表示全部权限
+        timeout: 缓存过期时间，默认使用 RBAC_PERMISSION_CACHE["TIMEOUT"]
+    """
+    if role_ids is not None and not role_ids:
+        return []
+
+    cache = _get_cache()
+    key = f"{TREE_CACHE_PREFIX}:{get_tree_version()}:{_role_set_key(role_ids)}"
+    tree = cache.get(key)
+    if tree is None:
+        with use_primary_db():
+            tree = load_tree(role_ids)
+        if timeout is None:
+            timeout = permission_cache.get_cache_config()["TIMEOUT"]
+        cache.set(key, tree, timeout)
+    return tree
+
+
+def get_user_tree(user):
+    """
+    获取用户可见的菜单/路由树
+
+    超级管理员可以看到全部权限，匿名用户看到空树。
+    """
+    if not user or not user.is_authenticated:
+        return []
+    if user.is_superuser:
+        return get_tree_for_roles(None)
+    return get_tree_for_roles(permission_cache.get_role_ids(user.pk))
@@ -0,0 +1,65 @@
+# Generated by Django 6.1.2 on 2026-10-16 23:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def iter_closure_links(parents):
+    """
+    根据 {节点 id: 父节点 id} 生成闭包表记录（rbac_app.models.iter_closure_links 的副本）
+
+    迁移不导入应用代码，避免模型模块以后的改动影响历史迁移。
+    """
+    for node_id in parents:
+        ancestor_id, depth = node_id, 0
+        while ancestor_id is not None:
+            yield ancestor_id, node_id, depth
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+
+
+def build_permission_closure(apps, schema_editor):
+    """为已有的权限数据生成闭包表"""
+    Permission = apps.get_model('rbac_app', 'Permission')
+    PermissionClosure = apps.get_model('rbac_app', 'PermissionClosure')
+    # 显式使用正在迁移的数据库：配置了只读副本时，路由会把读操作分配到未迁移的副本
+    db_alias = schema_editor.connection.alias
+    parents = dict(Permission.objects.using(db_alias).values_list('id', 'parent_id'))
+    links = [
+        PermissionClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+        for ancestor_id, descendant_id, depth in iter_closure_links(parents)
+    ]
+    PermissionClosure.objects.using(db_alias).bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='role',
+            name='permissions',
+            field=models.ManyToManyField(related_name='roles', through='rbac_app.RolePermission', to='rbac_app.permission'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='roles',
+            field=models.ManyToManyField(related_name='users', through='rbac_app.UserRole', to='rbac_app.role'),
+        ),
+        migrations.CreateModel(
+            name='PermissionClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='rbac_app.permission')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='rbac_app.permission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='rbac_app_pe_descend_378b18_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_permission_closure, migrations.RunPython.noop),
+    ]
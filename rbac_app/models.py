@@ -11,6 +11,30 @@ PERMISSION_TYPE_CHOICES = [
     ("link", "外链"),
 ]
 
+class PermissionQuerySet(models.QuerySet):
+    """
+    基于闭包表 PermissionClosure 的层级查询，每个方法都是一次带索引的查询
+    """
+
+    def descendants(self, node, include_self=False):
+        """node 的所有后代，按深度排序"""
+        min_depth = 0 if include_self else 1
+        return self.filter(
+            ancestor_links__ancestor=node, ancestor_links__depth__gte=min_depth
+        ).order_by("ancestor_links__depth", "id")
+
+    def ancestors(self, node, include_self=False):
+        """node 的所有祖先，从根节点开始排序"""
+        min_depth = 0 if include_self else 1
+        return self.filter(
+            descendant_links__descendant=node, descendant_links__depth__gte=min_depth
+        ).order_by("-descendant_links__depth")
+
+    def subtree(self, node):
+        """以 node 为根的整棵子树（包括 node 自身）"""
+        return self.descendants(node, include_self=True)
+
+
 class Permission(models.Model):
     name = models.CharField(max_length=100, verbose_name="权限名称")
     code = models.CharField(max_length=100, unique=True, verbose_name="权限编码")
@@ -19,10 +43,100 @@ class Permission(models.Model):
     path = models.CharField(max_length=200, blank=True, null=True, help_text="前端路由地址")
     config = JSONField(default=dict, blank=True, null=True, help_text="其他配置信息")
 
+    objects = PermissionQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
 
+def iter_closure_links(parents):
+    """
+    根据 {节点 id: 父节点 id} 生成闭包表记录
+
+    Yields:
+        tuple: (祖先 id, 后代 id, 深度)，包括每个节点到自身深度为 0 的记录
+    """
+    for node_id in parents:
+        ancestor_id, depth = node_id, 0
+        while ancestor_id is not None:
+            yield ancestor_id, node_id, depth
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+
+
+class PermissionClosureManager(models.Manager):
+    """
+    闭包表维护方法，由 rbac_app.signals 在 Permission 保存时调用
+    """
+
+    def insert_node(self, node):
+        """新增节点：自身一条深度为 0 的记录，加上父节点所有祖先到该节点的记录"""
+        links = [self.model(ancestor_id=node.pk, descendant_id=node.pk, depth=0)]
+        if node.parent_id is not None:
+            links += [
+                self.model(ancestor_id=ancestor_id, descendant_id=node.pk, depth=depth + 1)
+                for ancestor_id, depth in self.filter(descendant_id=node.parent_id).values_list("ancestor_id", "depth")
+            ]
+        self.bulk_create(links)
+
+    def detach_subtree(self, node):
+        """
+        删除子树与它（当前）所有祖先之间的记录，子树成为独立的树
+
+        Returns:
+            list: 子树中每个节点的 (节点 id, 相对深度)
+        """
+        subtree = list(self.filter(ancestor_id=node.pk).values_list("descendant_id", "depth"))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        return subtree
+
+    def move_subtree(self, node):
+        """
+        节点更换父节点：删除子树与旧祖先之间的记录，再建立子树与新祖先之间的记录
+        """
+        subtree = self.detach_subtree(node)
+        if node.parent_id is None:
+            return
+        ancestors = self.filter(descendant_id=node.parent_id).values_list("ancestor_id", "depth")
+        self.bulk_create(
+            self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, depth in subtree
+        )
+
+    def rebuild(self):
+        """根据 Permission.parent 整体重建闭包表（批量导入后使用）"""
+        parents = dict(Permission.objects.using(self.db).values_list("id", "parent_id"))
+        self.all().delete()
+        self.bulk_create(
+            (
+                self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+                for ancestor_id, descendant_id, depth in iter_closure_links(parents)
+            ),
+            batch_size=1000,
+        )
+
+
+class PermissionClosure(models.Model):
+    """
+    权限层级闭包表
+
+    每个 (祖先, 后代) 对一条记录，depth 为两者之间的层数（节点到自身为 0），
+    使“所有后代 / 所有祖先 / 整棵子树”都能用一次带索引的查询完成。
+    """
+    ancestor = models.ForeignKey(Permission, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Permission, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField(default=0)
+
+    objects = PermissionClosureManager()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+
 class Role(models.Model):
     name = models.CharField(max_length=100, unique=True)
     permissions = models.ManyToManyField(
@@ -49,6 +163,15 @@ class User(AbstractUser):
         related_name='users'           # 反向访问方便，如 role.users.all()
     )
 
+    def get_permission_codes(self):
+        """获取用户的有效权限编码集合（带缓存，见 rbac_app.permission_cache）"""
+        from .permission_cache import get_permission_codes
+        return get_permission_codes(self.pk)
+
+    def has_permission_code(self, code):
+        """判断用户是否拥有指定权限编码"""
+        return code in self.get_permission_codes()
+
 
 class UserRole(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -0,0 +1,247 @@
+"""
+用户有效权限缓存
+
+用户的有效权限需要经过 User → UserRole → Role → RolePermission → Permission 多表联查，
+这里把联查结果（权限编码集合）按用户缓存起来：
+
+- 一级缓存：进程内 LRU，命中时不访问任何外部存储
+- 二级缓存：Django cache 框架（多进程/多机共享）
+
+缓存由 rbac_app.signals 中的信号精确失效；由于进程内 LRU 无法被其他进程的信号清除，
+一级缓存设置了较短的 TTL（LOCAL_TTL），以此限定跨进程的最大延迟。
+回填缓存时总是查询主库：从落后的只读副本读到的旧授权会一直缓存到过期。
+
+可在 settings 中通过 RBAC_PERMISSION_CACHE 覆盖默认配置。
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from config.db_router import use_primary_db
+
+from .models import Permission, UserRole
+
+# 默认配置
+DEFAULT_PERMISSION_CACHE = {
+    "CACHE_ALIAS": "default",          # 使用的 Django cache 别名
+    "KEY_PREFIX": "rbac:perm",         # 缓存 key 前缀
+    "TIMEOUT": 300,                    # 二级缓存过期时间（秒）
+    "LOCAL_MAXSIZE": 1024,             # 进程内 LRU 最多缓存的条目数
+    "LOCAL_TTL": 5,                    # 进程内 LRU 的过期时间（秒）
+    # 权限版本号使用的 Django cache 别名，None 表示与 CACHE_ALIAS 相同。
+    # 版本号被淘汰后令牌会被判定为过期并回退数据库，应使用不与列表缓存等争抢容量的独立缓存
+    "VERSION_CACHE_ALIAS": None,
+}
+
+
+def get_cache_config():
+    """合并 settings.RBAC_PERMISSION_CACHE 与默认配置"""
+    return {**DEFAULT_PERMISSION_CACHE, **getattr(settings, "RBAC_PERMISSION_CACHE", {})}
+
+
+class LocalLRUCache:
+    """
+    线程安全的进程内 LRU 缓存，每个条目带有过期时间
+    """
+
+    def __init__(self, maxsize=1024, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_config = get_cache_config()
+local_cache = LocalLRUCache(maxsize=_config["LOCAL_MAXSIZE"], ttl=_config["LOCAL_TTL"])
+
+
+def _version_cache(config):
+    return caches[config["VERSION_CACHE_ALIAS"] or config["CACHE_ALIAS"]]
+
+
+def _cache_key(kind, user_id):
+    return f'{get_cache_config()["KEY_PREFIX"]}:{kind}:{user_id}'
+
+
+def compute_permission_codes(user_id):
+    """直接查询数据库，计算用户的有效权限编码集合（一次查询）"""
+    codes = Permission.objects.filter(roles__users__id=user_id).values_list("code", flat=True).distinct()
+    return frozenset(codes)
+
+
+def compute_role_ids(user_id):
+    """直接查询数据库，获取用户的角色 id 集合（一次查询）"""
+    return frozenset(UserRole.objects.filter(user_id=user_id).values_list("role_id", flat=True))
+
+
+def _get_cached(kind, user_id, compute):
+    """依次查询进程内 LRU、Django cache，都未命中时才访问数据库并回填两级缓存"""
+    if user_id is None:
+        return frozenset()
+
+    value = local_cache.get((kind, user_id))
+    if value is not None:
+        return value
+
+    config = get_cache_config()
+    shared_cache = caches[config["CACHE_ALIAS"]]
+    key = _cache_key(kind, user_id)
+    value = shared_cache.get(key)
+    if value is None:
+        with use_primary_db():
+            value = compute(user_id)
+        shared_cache.set(key, value, config["TIMEOUT"])
+
+    local_cache.set((kind, user_id), value)
+    return value
+
+
+def get_permission_codes(user_id):
+    """
+    获取用户的有效权限编码集合
+
+    Args:
+        user_id: 用户主键
+
+    Returns:
+        frozenset: 权限编码集合
+    """
+    return _get_cached("codes", user_id, compute_permission_codes)
+
+
+def get_role_ids(user_id):
+    """
+    获取用户的角色 id 集合
+
+    Args:
+        user_id: 用户主键
+
+    Returns:
+        frozenset: 角色 id 集合
+    """
+    return _get_cached("roles", user_id, compute_role_ids)
+
+
+def get_user_version(user_id):
+    """
+    获取用户的权限版本号
+
+    版本号是一个随机串，用户的角色、权限或账号状态变化时会被删除（即换成新值），
+    可以嵌入 JWT 中判断令牌里的权限信息是否过期。版本号在 Django cache 中不过期，
+    保存在 VERSION_CACHE_ALIAS 指定的缓存中。
+    """
+    value = local_cache.get(("version", user_id))
+    if value is None:
+        version_cache = _version_cache(get_cache_config())
+        value = version_cache.get_or_set(_cache_key("version", user_id), lambda: uuid.uuid4().hex, None)
+        local_cache.set(("version", user_id), value)
+    return value
+
+
+# 每个用户缓存的数据种类
+CACHE_KINDS = ("codes", "roles", "version")
+
+# 其他依赖用户权限的缓存（如菜单树、权限位图）可以注册回调，随用户权限一起失效
+_invalidation_callbacks = []
+
+
+def register_invalidation_callback(callback):
+    """
+    注册用户权限失效回调
+
+    Args:
+        callback: 接收用户 id 集合的可调用对象
+    """
+    _invalidation_callbacks.append(callback)
+    return callback
+
+
+def _invalidate(user_ids):
+    config = get_cache_config()
+    shared_cache = caches[config["CACHE_ALIAS"]]
+    shared_cache.delete_many([_cache_key(kind, user_id) for kind in CACHE_KINDS for user_id in user_ids])
+    _version_cache(config).delete_many([_cache_key("version", user_id) for user_id in user_ids])
+    for kind in CACHE_KINDS:
+        for user_id in user_ids:
+            local_cache.delete((kind, user_id))
+    for callback in _invalidation_callbacks:
+        callback(user_ids)
+
+
+def invalidate_users(user_ids):
+    """
+    使指定用户的权限缓存失效
+
+    立即失效一次，并在事务提交后再失效一次，
+    避免事务提交前其他请求把旧数据重新写回缓存。
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    _invalidate(user_ids)
+    transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def invalidate_roles(role_ids):
+    """使拥有指定角色的所有用户的权限缓存失效"""
+    role_ids = [role_id for role_id in role_ids if role_id is not None]
+    if not role_ids:
+        return
+    with use_primary_db():
+        user_ids = list(UserRole.objects.filter(role_id__in=role_ids).values_list("user_id", flat=True))
+    invalidate_users(user_ids)
+
+
+def invalidate_permissions(permission_ids):
+    """使拥有指定权限的所有用户的权限缓存失效"""
+    permission_ids = [permission_id for permission_id in permission_ids if permission_id is not None]
+    if not permission_ids:
+        return
+    with use_primary_db():
+        user_ids = list(
+            UserRole.objects.filter(role__rolepermission__permission_id__in=permission_ids)
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+    invalidate_users(user_ids)
+
+
+def clear_local_cache():
+    """清空当前进程内的 LRU（测试或运维时使用）"""
+    local_cache.clear()
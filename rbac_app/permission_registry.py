@@ -0,0 +1,197 @@
+"""
+权限位图注册表
+
+把权限判断编译成位运算：
+
+- 每个 Permission.code 分配一个位下标
+- 每个角色的权限预先计算成一个整数位掩码
+- 用户的位掩码是其所有角色掩码的按位或
+
+判断“用户是否拥有某些权限”只需要一次按位与，不访问数据库
+（用户的角色 id 来自 rbac_app.permission_cache 的缓存）。
+
+RolePermission 变化时只重新计算受影响角色的掩码；
+其他进程通过共享缓存中的版本号感知变化，并在下一次检查时整体重建。
+与 permission_cache 一样，失效立即执行一次，并在事务提交后再执行一次，
+避免提交前（本进程或其他进程）重新加载的旧掩码一直留在缓存中。
+"""
+
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+from config.db_router import use_primary_db
+
+from . import permission_cache
+from .models import Permission, RolePermission
+
+REGISTRY_VERSION_KEY = "rbac:perm_registry:version"
+
+
+class PermissionBitmaskRegistry:
+    """
+    权限位图注册表，进程内单例见 permission_registry
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bits = {}            # 权限编码 -> 位下标
+        self._role_masks = {}      # 角色 id -> 位掩码
+        self._dirty_roles = set()  # 需要重新计算掩码的角色 id
+        self._loaded = False
+        self._version = None       # 上次同步时的共享版本号
+        self._checked_at = 0.0     # 上次检查共享版本号的时间
+        # 位下标映射变化（整体重建或分配新位）时递增，用于让预编译的权限掩码失效
+        self.generation = 0
+
+    # ---------- 共享版本号 ----------
+    def _get_cache(self):
+        return caches[permission_cache.get_cache_config()["CACHE_ALIAS"]]
+
+    def _shared_version(self):
+        return self._get_cache().get_or_set(REGISTRY_VERSION_KEY, 1, None)
+
+    def _bump_shared_version(self):
+        cache = self._get_cache()
+        try:
+            version = cache.incr(REGISTRY_VERSION_KEY)
+        except ValueError:
+            version = 2
+            cache.set(REGISTRY_VERSION_KEY, version, None)
+        with self._lock:
+            self._version = version
+
+    def ensure_fresh(self):
+        """首次使用时加载；每隔 LOCAL_TTL 秒检查一次其他进程是否修改过权限"""
+        ttl = permission_cache.get_cache_config()["LOCAL_TTL"]
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < ttl:
+            return
+        version = self._shared_version()
+        self._checked_at = now
+        if not self._loaded or version != self._version:
+            self.load(version)
+
+    # ---------- 构建 ----------
+    def _bit_for(self, code):
+        """获取编码对应的位下标，不存在时分配一个新的"""
+        bit = self._bits.get(code)
+        if bit is None:
+            bit = self._bits[code] = len(self._bits)
+            self.generation += 1
+        return bit
+
+    def load(self, version=None):
+        """整体重建（两次查询，读主库）"""
+        with self._lock, use_primary_db():
+            self._bits = {}
+            self._role_masks = {}
+            self._dirty_roles = set()
+            for code in Permission.objects.order_by("id").values_list("code", flat=True):
+                self._bit_for(code)
+            for role_id, code in RolePermission.objects.values_list("role_id", "permission__code"):
+                self._role_masks[role_id] = self._role_masks.get(role_id, 0) | (1 << self._bit_for(code))
+            self._loaded = True
+            self._version = version if version is not None else self._shared_version()
+            self.generation += 1
+
+    def _compute_role_mask(self, role_id):
+        mask = 0
+        with use_primary_db():
+            codes = list(RolePermission.objects.filter(role_id=role_id).values_list("permission__code", flat=True))
+        for code in codes:
+            mask |= 1 << self._bit_for(code)
+        return mask
+
+    def _invalidate_roles(self, role_ids):
+        with self._lock:
+            for role_id in role_ids:
+                self._role_masks.pop(role_id, None)
+            self._dirty_roles.update(role_ids)
+        self._bump_shared_version()
+
+    def _invalidate_all(self):
+        with self._lock:
+            self._loaded = False
+        self._bump_shared_version()
+
+    def invalidate_roles(self, role_ids):
+        """
+        标记角色掩码失效，下次检查时只重新计算这些角色（增量重建）
+        """
+        role_ids = set(role_ids)
+        self._invalidate_roles(role_ids)
+        transaction.on_commit(lambda: self._invalidate_roles(role_ids))
+
+    def invalidate_all(self):
+        """权限编码变化时，所有角色掩码都需要重新计算"""
+        self._invalidate_all()
+        transaction.on_commit(self._invalidate_all)
+
+    # ---------- 判断 ----------
+    def compile(self, codes):
+        """
+        将权限编码集合编译成位掩码
+
+        Returns:
+            tuple: (位掩码, 是否所有编码都存在)
+        """
+        self.ensure_fresh()
+        mask = 0
+        known = True
+        with self._lock:
+            for code in codes:
+                bit = self._bits.get(code)
+                if bit is None:
+                    known = False
+                else:
+                    mask |= 1 << bit
+        return mask, known
+
+    def role_mask(self, role_id):
+        """角色的位掩码，失效的角色在这里重新计算（一次查询）"""
+        mask = self._role_masks.get(role_id)
+        if mask is None:
+            with self._lock:
+                if role_id in self._dirty_roles:
+                    mask = self._compute_role_mask(role_id)
+                    self._dirty_roles.discard(role_id)
+                else:
+                    # 整体加载时没有出现的角色没有任何权限
+                    mask = 0
+                self._role_masks[role_id] = mask
+        return mask
+
+    def user_mask(self, user_id):
+        """用户的位掩码：所有角色掩码的按位或"""
+        self.ensure_fresh()
+        mask = 0
+        for role_id in permission_cache.get_role_ids(user_id):
+            mask |= self.role_mask(role_id)
+        return mask
+
+    def has_codes(self, user_id, codes, any_of=False):
+        """
+        判断用户是否拥有指定的权限编码
+
+        Args:
+            user_id: 用户主键
+            codes: 权限编码集合
+            any_of: True 表示拥有任意一个即可，False 表示需要全部拥有
+        """
+        # 先计算用户掩码：重新计算角色掩码时可能为新编码分配位
+        user_mask = self.user_mask(user_id)
+        required, known = self.compile(codes)
+        return self.check(user_mask, required, known, any_of)
+
+    @staticmethod
+    def check(user_mask, required, known=True, any_of=False):
+        """用预编译的掩码做一次按位与判断"""
+        if any_of:
+            return bool(user_mask & required)
+        return known and user_mask & required == required
+
+
+permission_registry = PermissionBitmaskRegistry()
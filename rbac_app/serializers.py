@@ -1,11 +1,92 @@
+from collections import defaultdict
+
+from django.db import router
 from rest_framework import serializers
-from .models import User, Role, Permission
+
+from mixins.view import BulkListSerializer
+from .models import User, Role, Permission, PermissionClosure
+
+PARENT_CYCLE_MESSAGE = "不能将权限移动到它自己或它的子节点下"
+
 
 class PermissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Permission
         fields = "__all__"
 
+    def validate_parent(self, value):
+        """不能把权限移动到它自己或它的子节点下（一次闭包表查询）"""
+        if isinstance(self.parent, serializers.ListSerializer):
+            # 批量更新时由 PermissionBulkListSerializer 对整个批次检查
+            return value
+        if value is not None and self.instance is not None:
+            if Permission.objects.descendants(self.instance, include_self=True).filter(pk=value.pk).exists():
+                raise serializers.ValidationError(PARENT_CYCLE_MESSAGE)
+        return value
+
+
+class PermissionBulkListSerializer(BulkListSerializer):
+    """
+    权限的批量校验：父节点变化不能成环
+
+    逐项检查看不到同一批次中的其他修改（如 A、B 互换父节点），
+    这里按“闭包表 + 本批次的父节点变化”检查最终的层级（一次闭包表查询）。
+    """
+
+    def validate_batch(self, validated, errors):
+        if self.instance is None:
+            # 新建的节点没有后代，不会成环
+            return
+        moves = {
+            instance.pk: attrs["parent"].pk if attrs["parent"] is not None else None
+            for instance, attrs in zip(self.instance, validated)
+            if attrs is not None and "parent" in attrs
+        }
+        targets = {parent_id for parent_id in moves.values() if parent_id is not None}
+        if not targets:
+            return
+        # 新父节点在当前层级中的祖先链（从自身开始）
+        chains = defaultdict(list)
+        rows = PermissionClosure.objects.filter(descendant_id__in=targets).order_by("depth")
+        for descendant_id, ancestor_id in rows.values_list("descendant_id", "ancestor_id"):
+            chains[descendant_id].append(ancestor_id)
+
+        for index, instance in enumerate(self.instance):
+            if instance.pk in moves and self._creates_cycle(instance.pk, moves, chains):
+                self.add_item_error(errors, index, "parent", PARENT_CYCLE_MESSAGE)
+
+    def update(self, instances, validated_data):
+        """
+        先把本批次移动的子树全部从原来的祖先上摘下，再由 post_save 信号逐个挂到新父节点下
+
+        逐个移动时，前面的移动看到的是后面节点还没有移动的层级（如 B 原来在 A 下，
+        本批次 A 挂到 B 下、B 移到根），会在闭包表中产生重复记录；全部摘下后挂接的顺序不影响结果。
+        """
+        if self.send_signals:
+            closure = PermissionClosure.objects.db_manager(router.db_for_write(Permission))
+            for instance, attrs in zip(instances, validated_data):
+                parent = attrs.get("parent", instance.parent)
+                if (parent.pk if parent is not None else None) != instance.parent_id:
+                    closure.detach_subtree(instance)
+        return super().update(instances, validated_data)
+
+    @staticmethod
+    def _creates_cycle(node_id, moves, chains):
+        """沿最终层级向上查找：遇到本批次移动过的节点时跳到它的新父节点"""
+        current = moves[node_id]
+        seen = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            next_parent = None
+            for ancestor_id in chains.get(current, [current]):
+                if ancestor_id == node_id:
+                    return True
+                if ancestor_id in moves:
+                    next_parent = moves[ancestor_id]
+                    break
+            current = next_parent
+        return False
+
 class RoleSerializer(serializers.ModelSerializer):
     permissions = PermissionSerializer(many=True, read_only=True)
 
@@ -0,0 +1,123 @@
+"""
+RBAC 相关信号
+
+监听 UserRole、RolePermission、Role、Permission 的变化（包括 m2m_changed），
+精确地使受影响用户的权限缓存、受影响角色的权限位掩码失效，
+并在权限结构变化时递增菜单树版本号、维护权限层级闭包表。
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import menu_tree, permission_cache
+from .permission_registry import permission_registry
+from .models import Permission, PermissionClosure, Role, RolePermission, User, UserRole
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # is_active、is_staff、密码等变化后，令牌中的用户信息需要失效
+    permission_cache.invalidate_users([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def user_role_changed(sender, instance, **kwargs):
+    permission_cache.invalidate_users([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=RolePermission)
+def role_permission_changed(sender, instance, **kwargs):
+    permission_cache.invalidate_roles([instance.role_id])
+    permission_registry.invalidate_roles([instance.role_id])
+    menu_tree.bump_tree_version()
+
+
+@receiver(pre_delete, sender=Role)
+def role_deleted(sender, instance, **kwargs):
+    # 删除前收集拥有该角色的用户，级联删除后就查不到了
+    permission_cache.invalidate_roles([instance.pk])
+
+
+@receiver(pre_save, sender=Permission)
+def permission_pre_save(sender, instance, raw=False, using=None, **kwargs):
+    """
+    记录保存前的父节点，并阻止把节点移动到自己的子树下
+
+    接口中由 PermissionSerializer.validate_parent 返回 400，这里只是兜底（如直接调用 save()）。
+    """
+    instance._closure_old_parent_id = None
+    if raw or instance.pk is None:
+        return
+    # 闭包表的读写都使用写入的数据库，不经过读副本的路由
+    old = Permission.objects.using(using).filter(pk=instance.pk).values_list("parent_id", flat=True).first()
+    instance._closure_old_parent_id = old
+    if instance.parent_id != old and instance.parent_id is not None:
+        closure = PermissionClosure.objects.using(using)
+        if closure.filter(ancestor_id=instance.pk, descendant_id=instance.parent_id).exists():
+            raise ValueError("不能将权限移动到它自己或它的子节点下")
+
+
+@receiver(post_save, sender=Permission)
+def permission_closure_sync(sender, instance, created, raw=False, using=None, **kwargs):
+    """新增节点或更换父节点时维护闭包表"""
+    if raw:
+        return
+    closure = PermissionClosure.objects.db_manager(using)
+    if created:
+        closure.insert_node(instance)
+    elif instance.parent_id != getattr(instance, "_closure_old_parent_id", instance.parent_id):
+        closure.move_subtree(instance)
+
+
+@receiver(post_save, sender=Permission)
+def permission_saved(sender, instance, created, **kwargs):
+    # 新建的权限还没有分配给任何角色
+    if not created:
+        permission_cache.invalidate_permissions([instance.pk])
+        # 编码可能被修改，位下标映射需要整体重建
+        permission_registry.invalidate_all()
+    menu_tree.bump_tree_version()
+
+
+@receiver(pre_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    permission_cache.invalidate_permissions([instance.pk])
+
+
+@receiver(post_delete, sender=Permission)
+def permission_post_deleted(sender, instance, **kwargs):
+    menu_tree.bump_tree_version()
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def user_roles_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """user.roles.add/remove/clear 或 role.users.add/remove/clear"""
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    if not reverse:
+        # instance 是 User
+        permission_cache.invalidate_users([instance.pk])
+    elif action == "pre_clear":
+        # instance 是 Role，clear 时 pk_set 为 None，需要在清空前收集用户
+        permission_cache.invalidate_roles([instance.pk])
+    elif pk_set:
+        permission_cache.invalidate_users(pk_set)
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def role_permissions_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """role.permissions.add/remove/clear 或 permission.roles.add/remove/clear"""
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+    menu_tree.bump_tree_version()
+    if not reverse:
+        # instance 是 Role
+        permission_cache.invalidate_roles([instance.pk])
+        permission_registry.invalidate_roles([instance.pk])
+    elif action == "pre_clear":
+        # instance 是 Permission
+        permission_cache.invalidate_permissions([instance.pk])
+        permission_registry.invalidate_all()
+    elif pk_set:
+        permission_cache.invalidate_roles(pk_set)
+        permission_registry.invalidate_roles(pk_set)
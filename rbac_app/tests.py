@@ -1,3 +1,1682 @@
-from django.test import TestCase
+import copy
+import csv
+import datetime
+import gzip
+import inspect
+import io
+import json
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import HttpResponse, QueryDict
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.settings import patched_settings
+from rest_framework import mixins as drf_mixins
+from rest_framework import viewsets
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+from rest_framework.utils.encoders import JSONEncoder as DRFJSONEncoder
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.counting import ApproximateCount, CachedCount
+from config.db_router import PrimaryReplicaRouter, ReplicaStickinessMiddleware, use_primary_db
+from config.model_versions import get_model_version
+from config.pagination import CustomCursorPagination, CustomPageNumberPagination
+from config.renderers import (
+    RESPONSE_TEMPLATE_CONFIG, CustomRenderer, ResponseTemplate, StreamingEnvelopeResponse, custom_response,
+    response_template, wrap_schema_with_three_stage,
+)
+from config.schema_cache import compute_cache_key, get_source_fingerprint, schema_cache
+from config.sqlite import sqlite_database
+
+from mixins.schema import SchemaModelViewSet, schema_viewset
+from mixins.schema.param_validator import CompiledParam, ParamValidator
+from mixins.schema.schema_utils import get_inline_serializer_class, spec_hash
+from mixins.view import (
+    AsyncModelViewSet, AutoPrefetchMixin, BulkModelMixin, ExportModelMixin, FTS5SearchBackend, ListCacheMixin,
+    SearchableListModelMixin, get_list_cache_stats,
+)
+from mixins.permissions import HasPermissionCode
+from mixins.view.budget import QueryBudgetExceeded
+from . import menu_tree, permission_cache
+from .authentication import PERMISSION_VERSION_CLAIM, RBACTokenUser, StatelessJWTAuthentication
+from .models import Permission, PermissionClosure, Role, RolePermission, User, UserRole
+from .permission_registry import permission_registry
+from .views import PermissionViewSet, UserViewSet
+from .serializers import PermissionSerializer, RoleSerializer, UserSerializer
+
+
+@override_settings(LIST_CACHE={"ENABLED": False})
+class AutoPrefetchTests(TestCase):
+    """列表接口的查询次数应与分页大小无关"""
+
+    @classmethod
+    def setUpTestData(cls):
+        permissions = [
+            Permission.objects.create(name=f"perm {i}", code=f"perm:{i}", type="button")
+            for i in range(5)
+        ]
+        roles = []
+        for i in range(12):
+            role = Role.objects.create(name=f"role {i}")
+            role.permissions.add(*permissions[: i % 5 + 1])
+            roles.append(role)
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        for i in range(12):
+            user = User.objects.create(username=f"user {i}")
+            user.roles.add(*roles[: i % 3 + 1])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_prefetch_plan(self):
+        self.assertEqual(AutoPrefetchMixin.get_prefetch_plan(RoleSerializer), ((), ("permissions",)))
+        self.assertEqual(AutoPrefetchMixin.get_prefetch_plan(UserSerializer), ((), ("roles",)))
+
+    def test_role_list_constant_queries(self):
+        small = self.count_queries("/rbac/roles/?page_size=2")
+        large = self.count_queries("/rbac/roles/?page_size=12")
+        self.assertEqual(small, large)
+
+    def test_user_list_constant_queries(self):
+        small = self.count_queries("/rbac/users/?page_size=2")
+        large = self.count_queries("/rbac/users/?page_size=13")
+        self.assertEqual(small, large)
+
+
+def inline_wrap_schema(result):
+    """共享组件之前的实现：每个响应内联一份完整的 code/msg/data 结构"""
+    fields = RESPONSE_TEMPLATE_CONFIG["fields"]
+    for path_item in result.get("paths", {}).values():
+        for operation in path_item.values():
+            for response in operation.get("responses", {}).values():
+                for content_schema in response.get("content", {}).values():
+                    original_schema = content_schema.get("schema")
+                    if original_schema:
+                        content_schema["schema"] = {
+                            "type": "object",
+                            "properties": {
+                                key: original_schema if field.get("default") is None
+                                else {k: v for k, v in field.items() if k != "default"}
+                                for key, field in fields.items()
+                            },
+                            "required": list(RESPONSE_TEMPLATE_CONFIG["field_order"]),
+                        }
+    return result
+
+
+class SchemaEnvelopeTests(TestCase):
+    """schema 中的响应模板应作为共享组件引用，而不是在每个响应中内联"""
+
+    @classmethod
+    def setUpTestData(cls):
+        with patched_settings({"POSTPROCESSING_HOOKS": []}):
+            cls.raw = SchemaGenerator(urlconf="rbac_app.urls").get_schema(request=None, public=True)
+
+    def test_responses_reference_envelopes(self):
+        result = wrap_schema_with_three_stage(copy.deepcopy(self.raw), None, None, True)
+        schemas = result["components"]["schemas"]
+        self.assertIn("EnvelopeBase", schemas)
+        for path_item in result["paths"].values():
+            for operation in path_item.values():
+                for response in operation.get("responses", {}).values():
+                    for content_schema in response.get("content", {}).values():
+                        name = content_schema["schema"]["$ref"].rsplit("/", 1)[-1]
+                        self.assertTrue(name.startswith("Envelope_"))
+                        base, data = schemas[name]["allOf"]
+                        self.assertEqual(base, {"$ref": "#/components/schemas/EnvelopeBase"})
+                        self.assertEqual(data["required"], ["data"])
+        self.assertEqual(
+            schemas["Envelope_PaginatedUserList"]["allOf"][1]["properties"]["data"],
+            {"$ref": "#/components/schemas/PaginatedUserList"},
+        )
+
+    def test_schema_size(self):
+        before = len(json.dumps(inline_wrap_schema(copy.deepcopy(self.raw))))
+        after = len(json.dumps(wrap_schema_with_three_stage(copy.deepcopy(self.raw), None, None, True)))
+        # 共享组件至少节省 5%
+        self.assertLess(after / before, 0.95)
+
+
+@override_settings(SCHEMA_CACHE={"DIR": False, "CODE_VERSION": "test"})
+class SchemaCacheTests(TestCase):
+    """/schema/ 缓存：gzip 协商、按编码区分的 ETag 与 304、代码版本变化时失效"""
+
+    def setUp(self):
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+
+    def test_gzip_negotiation_and_etags(self):
+        plain = self.client.get("/schema/")
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn("Content-Encoding", plain)
+        compressed = self.client.get("/schema/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/schema/", HTTP_IF_NONE_MATCH=plain["ETag"])
+        self.assertEqual((response.status_code, response["ETag"]), (304, plain["ETag"]))
+        response = self.client.get("/schema/", HTTP_IF_NONE_MATCH=compressed["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 304)
+        # 另一种编码的 ETag 不能匹配
+        response = self.client.get("/schema/", HTTP_IF_NONE_MATCH=compressed["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_key_changes_with_code_version_and_fingerprint(self):
+        key = compute_cache_key()
+        with override_settings(SCHEMA_CACHE={"CODE_VERSION": "other"}):
+            self.assertNotEqual(compute_cache_key(), key)
+
+        with tempfile.TemporaryDirectory() as root:
+            source = Path(root, "views.py")
+            source.write_text("x = 1\n")
+            before = get_source_fingerprint(root)
+            self.assertEqual(get_source_fingerprint(root), before)
+            source.write_text("x = 10\n")
+            self.assertNotEqual(get_source_fingerprint(root), before)
+
+
+class CustomRendererTests(TestCase):
+    """拼接预编码前后缀的输出与 json.dumps 整个响应结构的结果逐字节一致"""
+
+    samples = [{"name": "管理员", "tags": ["中文", "line\u2028break"], "n": 1.5}, [], "", None, 0]
+
+    def dumps(self, value):
+        text = json.dumps(value, cls=DRFJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+        return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+    def render(self, data, status_code=200):
+        return CustomRenderer().render(data, "application/json", {"response": Response(status=status_code)})
+
+    def test_spliced_output_matches_json_dumps(self):
+        for data in self.samples:
+            self.assertEqual(self.render(data), self.dumps(response_template.build(data=data)), data)
+
+    def test_build_custom_and_errors(self):
+        for data in self.samples:
+            envelope = response_template.build_custom(data=data, code=201, msg="已创建")
+            self.assertEqual(self.render(custom_response(data, code=201, msg="已创建").data), self.dumps(envelope))
+        self.assertEqual(
+            self.render({"detail": "未找到"}, 404), self.dumps(response_template.build(code=404, message="未找到"))
+        )
+
+
+class StreamingEnvelopeTests(TestCase):
+    """流式输出的响应与 CustomRenderer 一次性渲染的结果逐字节一致"""
+
+    rows = [{"id": 1, "name": "管理员"}, {"id": 2, "name": "line\u2028break"}, {"id": 3, "name": None}]
+
+    def stream(self, rows):
+        return b"".join(StreamingEnvelopeResponse(iter(rows)).streaming_content)
+
+    def test_matches_non_streamed_output(self):
+        for rows in (self.rows, []):
+            self.assertEqual(self.stream(rows), CustomRenderer().render(rows))
+        self.assertEqual(json.loads(self.stream(self.rows)), {"code": 200, "msg": "ok", "data": self.rows})
+
+    def test_falls_back_without_single_data_field(self):
+        config = copy.deepcopy(RESPONSE_TEMPLATE_CONFIG)
+        config["field_order"].append("extra")
+        config["fields"]["extra"] = {"type": "any", "default": None}
+        with mock.patch("config.renderers.response_template", ResponseTemplate(config)):
+            body = self.stream(self.rows)
+            self.assertEqual(body, CustomRenderer().render(self.rows))
+        self.assertEqual(json.loads(body)["extra"], self.rows)
+
+
+class InlineSerializerTests(TestCase):
+    """simple_extend_schema 的内联序列化器按内容哈希复用，组件名在多次生成之间保持不变"""
+
+    spec = {
+        "msg": "str",
+        "payload": {"custom_code": ("int", True, "状态码", 0), "price": ("decimal", False, "价格", Decimal("1.5"))},
+    }
+
+    def test_same_spec_same_class(self):
+        first = get_inline_serializer_class("Resp200", self.spec)
+        second = get_inline_serializer_class("Resp200", copy.deepcopy(self.spec))
+        self.assertIs(first, second)
+        self.assertEqual(first.__name__, f"Resp200_{spec_hash(self.spec)}")
+        self.assertIsNot(get_inline_serializer_class("Req", self.spec), first)
+
+    def test_different_specs_different_names(self):
+        changed = copy.deepcopy(self.spec)
+        changed["payload"]["custom_code"] = ("int", False, "状态码", 0)
+        reordered = dict(reversed(list(self.spec.items())))
+        names = {spec_hash(spec) for spec in (self.spec, changed, reordered, {**self.spec, "extra": "int"})}
+        self.assertEqual(len(names), 4)
+        # 省略的元组项与显式写 None 相同
+        self.assertEqual(spec_hash({"a": ("int", True)}), spec_hash({"a": ("int", True, None, None, None, None)}))
+
+    def test_names_stable_across_generator_runs(self):
+        def components():
+            schema = SchemaGenerator(urlconf="test_api.urls").get_schema(request=None, public=True)
+            return sorted(name for name in schema["components"]["schemas"] if "_" in name)
+
+        names = components()
+        # test_api.views.HelloWorldView.get 的 200 响应
+        response_spec = {"msg": "str", "payload": {"custom_code": "int", "msg": "str", "payload": "dict"}}
+        self.assertIn(f"Resp200_{spec_hash(response_spec)}", names)
+        self.assertEqual(components(), names)
+
+
+class SchemaRoleViewSet(SchemaModelViewSet):
+    """角色视图集"""
+    queryset = Role.objects.all()
+    serializer_class = RoleSerializer
+
+
+class SchemaUserViewSet(SchemaModelViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    schema_name = "用户"
+
+
+class SchemaModelViewSetTests(TestCase):
+    """SchemaModelViewSet 只在定义子类时装饰一次"""
+
+    def test_summaries_computed_at_class_creation(self):
+        self.assertEqual(SchemaRoleViewSet.schema_summaries["list"], "获取角色列表")
+        self.assertEqual(SchemaUserViewSet.schema_summaries["destroy"], "删除用户")
+        self.assertNotIn("__new__", SchemaModelViewSet.__dict__)
+
+    def test_no_leak_into_shared_methods(self):
+        # 继承来的方法被包成子类自己的副本，不会修改 DRF 的 mixin 方法
+        self.assertNotIn("schema", getattr(drf_mixins.ListModelMixin.list, "kwargs", {}))
+        self.assertIsNot(SchemaRoleViewSet.list, SchemaUserViewSet.list)
+
+    async def test_async_methods_stay_async(self):
+        class AsyncListMixin:
+            async def list(self, request, *args, **kwargs):
+                return "async list"
+
+        view_class = type("AsyncSchemaRoleViewSet", (AsyncListMixin, SchemaModelViewSet), {
+            "queryset": Role.objects.all(),
+            "serializer_class": RoleSerializer,
+            "schema_name": "角色",
+        })
+        # 包装后仍是协程函数，否则 DRF 会把它当作同步视图，返回未 await 的协程
+        self.assertTrue(inspect.iscoroutinefunction(view_class.list))
+        self.assertFalse(inspect.iscoroutinefunction(view_class.retrieve))
+        self.assertEqual(view_class.schema_summaries["list"], "获取角色列表")
+        self.assertEqual(await view_class().list(None), "async list")
+
+    def test_instantiation_does_no_decoration(self):
+        admin = User.objects.create(username="admin", is_staff=True)
+        methods = {name: SchemaRoleViewSet.__dict__[name] for name in SchemaRoleViewSet.schema_summaries}
+        view = SchemaRoleViewSet.as_view({"get": "list"})
+        with mock.patch.object(schema_viewset, "extend_schema", side_effect=AssertionError("不应在请求时装饰")):
+            for _ in range(3):
+                request = APIRequestFactory().get("/rbac/roles/")
+                force_authenticate(request, admin)
+                self.assertEqual(view(request).status_code, 200)
+                SchemaRoleViewSet()
+        self.assertEqual(methods, {name: SchemaRoleViewSet.__dict__[name] for name in methods})
+
+
+class FTS5SearchBackendTests(TransactionTestCase):
+    """全文索引搜索与 icontains 结果一致，并随模型信号同步"""
+
+    # 影子表只在事务之外创建，因此不能使用 TestCase
+    def setUp(self):
+        self.view_class = self.make_view_class(("username", "email"))
+        self.admin = User.objects.create(username="admin", email="boss@Example.com", is_staff=True)
+        User.objects.create(username="zhang san", email="zs@test.com")
+        self.user = User.objects.create(username="li si", email="lisi@example.com")
+
+    def make_view_class(self, fields):
+        """在测试中创建视图集：定义时注册的搜索后端及其模型信号在测试结束后移除"""
+        view_class = type("FTSUserViewSet", (SearchableListModelMixin, viewsets.ModelViewSet), {
+            "queryset": User.objects.order_by("id"),
+            "serializer_class": UserSerializer,
+            "search_fields": fields,
+            "search_backend_class": FTS5SearchBackend,
+        })
+        backend = view_class.get_search_backend(User)
+
+        def cleanup():
+            backend.unregister()
+            backend._drop_table(connection)
+        self.addCleanup(cleanup)
+        return view_class
+
+    def search(self, view_class=None, **params):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, self.admin)
+        response = (view_class or self.view_class).as_view({"get": "list"})(request)
+        return [item["username"] for item in response.data["items"]]
+
+    def test_match_is_case_insensitive_substring(self):
+        self.assertEqual(self.search(email="EXAMPLE"), ["admin", "li si"])
+        # 不足 3 个字符的搜索词退回 icontains
+        self.assertEqual(self.search(email="example", username="li"), ["li si"])
+        self.assertEqual(self.search(username='a"n'), [])
+
+    def test_index_follows_signals(self):
+        self.search(email="example")
+        self.user.username = "wang wu"
+        self.user.save()
+        self.assertEqual(self.search(username="wang"), ["wang wu"])
+        self.user.delete()
+        self.assertEqual(self.search(email="example"), ["admin"])
+
+    def test_field_sets_use_separate_tables(self):
+        narrow = self.make_view_class(("username",))
+        self.assertEqual(self.search(narrow, username="zhang"), ["zhang san"])
+        self.assertEqual(self.search(email="example"), ["admin", "li si"])
+        self.assertNotEqual(narrow.get_search_backend(User).table, self.view_class.get_search_backend(User).table)
+        User.objects.create(username="zhao liu", email="zl@example.com")
+        self.assertEqual(self.search(narrow, username="zhao"), ["zhao liu"])
+        self.assertEqual(self.search(email="example"), ["admin", "li si", "zhao liu"])
+
+    def test_table_existence_is_cached(self):
+        self.search(email="example")
+        with CaptureQueriesContext(connection) as ctx:
+            self.search(email="example")
+            self.user.save()
+        self.assertFalse([query for query in ctx.captured_queries if "sqlite_master" in query["sql"]])
+
+    def test_unregister_disconnects_signals(self):
+        self.search(email="example")
+        backend = self.view_class.get_search_backend(User)
+        backend.unregister()
+        self.assertNotIn(backend, FTS5SearchBackend.registered())
+        User.objects.create(username="wang wu")
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {backend.table}")
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+
+class PermissionSearchViewSet(SearchableListModelMixin, viewsets.ModelViewSet):
+    queryset = Permission.objects.order_by("id")
+    serializer_class = PermissionSerializer
+    text_lookup = "istartswith"
+
+
+class FilterPlanTests(TestCase):
+    """过滤计划按字段类型选择查询方式，并且每个视图集只推导一次"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.root = Permission.objects.create(name="系统管理", code="system", type="catalog")
+        for i in range(4):
+            Permission.objects.create(
+                name=f"菜单 {i}", code=f"menu:{i}", type="menu" if i % 2 else "button", parent=cls.root
+            )
+
+    def search(self, **params):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, self.admin)
+        response = PermissionSearchViewSet.as_view({"get": "list"})(request)
+        if response.status_code != 200:
+            return response.status_code
+        return [item["code"] for item in response.data["items"]]
+
+    def test_plan_lookups(self):
+        plan = PermissionSearchViewSet.get_filter_plan(PermissionSerializer, Permission)
+        self.assertIs(plan, PermissionSearchViewSet.get_filter_plan(PermissionSerializer, Permission))
+        kinds = {name: field_filter.kind for name, field_filter in plan.items()}
+        self.assertEqual(
+            kinds, {"id": "exact", "name": "text", "code": "text", "type": "exact", "parent": "exact", "path": "text"}
+        )
+
+    def test_filters(self):
+        self.assertEqual(self.search(type="menu"), ["menu:1", "menu:3"])
+        self.assertEqual(self.search(type="menu,catalog"), ["system", "menu:1", "menu:3"])
+        self.assertEqual(self.search(parent=self.root.pk, code="menu:2"), ["menu:2"])
+        # istartswith：不匹配中间的子串
+        self.assertEqual(self.search(code="enu"), [])
+        self.assertEqual(self.search(id=str(self.root.pk)), ["system"])
+        self.assertEqual(self.search(parent="abc"), 400)
+
+
+class ListCacheTests(TestCase):
+    """列表结果缓存：相同参数与角色命中缓存，模型变化后失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name="运维")
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.other = User.objects.create(username="other", is_staff=True)
+        for user in (cls.admin, cls.other):
+            user.roles.add(cls.role)
+        for i in range(3):
+            Permission.objects.create(name=f"菜单 {i}", code=f"menu:{i}", type="menu")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url, user=None):
+        self.client.force_authenticate(user or self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_hit_and_invalidate(self):
+        first, _ = self.get("/rbac/permissions/?page=1&page_size=2")
+        self.assertEqual(first["X-Cache"], "MISS")
+        # 参数顺序不同、角色相同的其他用户都命中缓存，且（角色集合已缓存时）不访问数据库
+        permission_cache.get_role_ids(self.other.pk)
+        second, queries = self.get("/rbac/permissions/?page_size=2&page=1", self.other)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.content, first.content)
+
+        Permission.objects.create(name="菜单 9", code="menu:9", type="menu")
+        third, _ = self.get("/rbac/permissions/?page=1&page_size=2")
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertEqual(json.loads(third.content)["data"]["total"], 4)
+
+        stats = get_list_cache_stats(PermissionViewSet)[PermissionViewSet.get_list_cache_label()]
+        self.assertEqual(stats, {"hits": 1, "misses": 2})
+
+    def test_m2m_and_roles(self):
+        self.get("/rbac/users/")
+        # 多对多变化使用户列表失效
+        role = Role.objects.create(name="审计")
+        self.other.roles.add(role)
+        response, _ = self.get("/rbac/users/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        # 角色集合不同的用户不共享缓存
+        response, _ = self.get("/rbac/users/", self.other)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn(UserViewSet.get_list_cache_label(), get_list_cache_stats())
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "admin.example.com"])
+    def test_key_varies_on_host_and_scheme(self):
+        # 分页链接是绝对 URL，不同主机名或协议各自缓存
+        url = "/rbac/permissions/?page=1&page_size=2"
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        other_host = self.client.get(url, HTTP_HOST="admin.example.com")
+        self.assertEqual(other_host["X-Cache"], "MISS")
+        self.assertTrue(json.loads(other_host.content)["data"]["next_page"].startswith("http://admin.example.com/"))
+        secure = self.client.get(url, secure=True)
+        self.assertEqual(secure["X-Cache"], "MISS")
+        self.assertTrue(json.loads(secure.content)["data"]["next_page"].startswith("https://testserver/"))
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+    def test_stampede_waits_for_builder(self):
+        from mixins.view.cache import get_list_cache_config
+
+        view = PermissionViewSet(action_map={"get": "list"})
+        request = APIRequestFactory().get("/rbac/permissions/")
+        force_authenticate(request, self.admin)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        key = view.get_list_cache_key(view.request)
+        cache.add(f"{key}:lock", 1)
+        cache.set(key, {"items": ["cached"]})
+        data = view._wait_or_build(cache, get_list_cache_config(), key, view.request)
+        self.assertEqual(data, {"items": ["cached"]})
+
+        # 持有锁的请求迟迟没有写入：短暂等待后自行查询，且不释放别人的锁
+        cache.delete(key)
+        config = {**get_list_cache_config(), "LOCK_WAIT": 0.05}
+        started = time.monotonic()
+        data = view._wait_or_build(cache, config, key, view.request)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(data["total"], 3)
+        self.assertIsNotNone(cache.get(f"{key}:lock"))
+
+    def test_scope_defaults_to_user(self):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, self.admin)
+        view = PermissionViewSet(action_map={"get": "list"})
+        request = view.initialize_request(request)
+        self.assertTrue(view.get_list_cache_vary(request).startswith(f"roles:{self.role.pk}:"))
+        self.assertEqual(FacetUserViewSet().get_list_cache_vary(request), f"user:{self.admin.pk}")
+
+
+class BudgetPermissionViewSet(SearchableListModelMixin, viewsets.ModelViewSet):
+    queryset = Permission.objects.order_by("id")
+    serializer_class = PermissionSerializer
+
+
+class QueryBudgetTests(TestCase):
+    """超出查询预算时中断查询并返回标准错误结构"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        Permission.objects.bulk_create(
+            Permission(name=f"菜单 {i}", code=f"menu:{i}", type="menu") for i in range(300)
+        )
+
+    def search(self, budget, **params):
+        view = type("View", (BudgetPermissionViewSet,), {"query_budget": budget})
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, self.admin)
+        response = view.as_view({"get": "list"})(request)
+        response.render()
+        return response.status_code, json.loads(response.content)
+
+    def test_within_budget(self):
+        status_code, body = self.search({"MAX_QUERIES": 2}, name="菜单 1")
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["data"]["total"], 111)
+
+    def test_statement_budget(self):
+        status_code, body = self.search({"MAX_QUERIES": 1}, name="菜单")
+        self.assertEqual(status_code, 400)
+        self.assertEqual(body["code"], 400)
+        self.assertIn("语句数", body["msg"])
+
+    def test_sqlite_instruction_budget(self):
+        status_code, body = self.search(
+            {"MAX_SQLITE_INSTRUCTIONS": 2000, "PROGRESS_INTERVAL": 100}, name="菜单", page_size=300
+        )
+        self.assertEqual(status_code, 400)
+        self.assertIn("指令数", body["msg"])
+        # 中断后连接仍然可用，progress handler 已经移除
+        self.assertEqual(Permission.objects.count(), 300)
+
+    def test_streamed_search_is_cut_off(self):
+        view = type("View", (BudgetPermissionViewSet,), {
+            "query_budget": {"MAX_SQLITE_INSTRUCTIONS": 2000, "PROGRESS_INTERVAL": 100},
+            "pagination_class": None,
+        })
+        request = APIRequestFactory().get("/", {"name": "菜单"})
+        force_authenticate(request, self.admin)
+        response = view.as_view({"get": "list"})(request)
+        self.assertTrue(response.streaming)
+        with self.assertRaisesMessage(QueryBudgetExceeded, "指令数"):
+            b"".join(response.streaming_content)
+        self.assertEqual(Permission.objects.count(), 300)
+
+    def test_writes_not_budgeted_by_default(self):
+        view = type("View", (BudgetPermissionViewSet,), {"query_budget": {"MAX_QUERIES": 1}})
+        request = APIRequestFactory().post("/", {"name": "新菜单", "code": "menu:new", "type": "menu"}, format="json")
+        force_authenticate(request, self.admin)
+        self.assertEqual(view.as_view({"post": "create"})(request).status_code, 201)
+
+    def test_budgeted_write_rolls_back(self):
+        view = type("View", (BudgetPermissionViewSet,), {
+            "query_budget": {"MAX_QUERIES": 2},  # 唯一性检查、插入权限，第三条（闭包表）被中断
+            "query_budget_actions": None,
+        })
+        request = APIRequestFactory().post("/", {"name": "新菜单", "code": "menu:new", "type": "menu"}, format="json")
+        force_authenticate(request, self.admin)
+        self.assertEqual(view.as_view({"post": "create"})(request).status_code, 400)
+        # 权限已插入、闭包表还没写入时被中断，整体回滚
+        self.assertFalse(Permission.objects.filter(code="menu:new").exists())
+        self.assertFalse(PermissionClosure.objects.filter(descendant__code="menu:new").exists())
+
+
+class FacetUserViewSet(ListCacheMixin, SearchableListModelMixin, viewsets.ModelViewSet):
+    queryset = User.objects.order_by("id")
+    serializer_class = UserSerializer
+    facet_fields = ("is_active", "is_staff")
+
+
+class FacetPermissionViewSet(SearchableListModelMixin, viewsets.ModelViewSet):
+    queryset = Permission.objects.order_by("id")
+    serializer_class = PermissionSerializer
+    facet_fields = ("type", "parent")
+
+
+class FacetTests(TestCase):
+    """分面计数基于过滤后的查询集，可枚举的字段合并成一条聚合查询"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        for i in range(5):
+            User.objects.create(username=f"user {i}", is_active=i % 2 == 0)
+        cls.root = Permission.objects.create(name="系统管理", code="system", type="catalog")
+        for i in range(3):
+            Permission.objects.create(name=f"菜单 {i}", code=f"menu:{i}", type="menu", parent=cls.root)
+
+    def get(self, view_class, **params):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = view_class.as_view({"get": "list"})(request)
+        return response, len(ctx.captured_queries)
+
+    def test_choice_and_boolean_facets_in_one_query(self):
+        cache.clear()
+        permission_cache.get_role_ids(self.admin.pk)
+        _, plain = self.get(FacetUserViewSet, username="user", page_size=2)
+        response, queries = self.get(FacetUserViewSet, username="user", page_size=2, facets="is_active,is_staff")
+        self.assertEqual(queries, plain + 1)
+        self.assertEqual(response.data["facets"], {"is_active": {True: 3, False: 2}, "is_staff": {True: 0, False: 5}})
+        # 分面与当前页一起缓存
+        response, queries = self.get(FacetUserViewSet, username="user", page_size=2, facets="is_active,is_staff")
+        self.assertEqual((response["X-Cache"], queries), ("HIT", 0))
+        self.assertEqual(response.data["facets"]["is_active"], {True: 3, False: 2})
+
+    def test_group_by_facets(self):
+        response, _ = self.get(FacetPermissionViewSet, facets="all")
+        self.assertEqual(
+            response.data["facets"],
+            {
+                "type": {"catalog": 1, "menu": 3, "button": 0, "iframe": 0, "link": 0},
+                "parent": {None: 1, self.root.pk: 3},
+            },
+        )
+        response, _ = self.get(FacetPermissionViewSet, type="menu", facets="type")
+        self.assertEqual(response.data["facets"]["type"]["menu"], 3)
+        self.assertEqual(response.data["facets"]["type"]["catalog"], 0)
+        response, _ = self.get(FacetPermissionViewSet, facets="code")
+        self.assertEqual(response.status_code, 400)
+
+    def test_unpaginated_facets_rejected(self):
+        view_class = type("View", (FacetPermissionViewSet,), {"pagination_class": None})
+        response, _ = self.get(view_class, facets="type")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.streaming)
+        self.assertIn("facets", response.data)
+        # 不请求分面时照常流式输出
+        response, _ = self.get(view_class)
+        self.assertTrue(response.streaming)
+
+
+@override_settings(DB_ROUTER={"REPLICAS": ["replica1"], "STICKY_SECONDS": 5})
+class DBRouterTests(TestCase):
+    """读操作走副本，写操作之后的读在时间窗口内走主库"""
+
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = APIRequestFactory()
+
+    def run_middleware(self, request, view):
+        return ReplicaStickinessMiddleware(view)(request)
+
+    def test_routing(self):
+        self.assertEqual(self.router.db_for_read(User), "replica1")
+        self.assertEqual(self.router.db_for_write(User), "default")
+        with use_primary_db():
+            self.assertEqual(self.router.db_for_read(User), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "rbac_app"))
+
+    def test_read_your_writes(self):
+        user = User.objects.create(username="writer")
+        reads = []
+
+        def write_view(request):
+            reads.append(self.router.db_for_read(User))
+            self.router.db_for_write(User)
+            reads.append(self.router.db_for_read(User))
+            request.user = user
+            return HttpResponse()
+
+        response = self.run_middleware(self.factory.post("/"), write_view)
+        self.assertEqual(reads, ["replica1", "default"])
+        cookie = response.cookies["db_primary"]
+        self.assertEqual(cookie["max-age"], 5)
+
+        def read_view(request):
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        # 带 Cookie 的客户端读主库
+        request = self.factory.get("/")
+        request.COOKIES["db_primary"] = "1"
+        self.run_middleware(request, read_view)
+
+        # 没有 Cookie 但已认证为同一用户（如 JWT 客户端）时同样读主库
+        def authenticated_read_view(request):
+            request.user = user
+            return read_view(request)
+
+        self.run_middleware(self.factory.get("/"), authenticated_read_view)
+        # 其他客户端仍然读副本
+        self.run_middleware(self.factory.get("/"), read_view)
+        self.assertEqual(reads[2:], ["default", "default", "replica1"])
+
+    def test_read_from_primary_view(self):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        view.cls = type("PrimaryView", (), {"read_from_primary": True})
+
+        def get_response(request):
+            # 与 Django 的请求处理顺序一致：先 process_view，再调用视图
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaStickinessMiddleware(get_response)
+        middleware(self.factory.get("/"))
+        self.assertEqual(reads, ["default"])
+
+    def test_cache_refills_read_primary(self):
+        # 测试环境没有 replica1 连接：回填缓存时读副本会抛出 ConnectionDoesNotExist
+        role = Role.objects.create(name="副本")
+        permission = Permission.objects.create(name="菜单", code="menu", type="menu")
+        role.permissions.add(permission)
+        user = User.objects.create(username="reader", is_staff=True)
+        user.roles.add(role)
+        permission_cache.clear_local_cache()
+
+        self.assertEqual(permission_cache.get_permission_codes(user.pk), {"menu"})
+        self.assertEqual(permission_cache.get_role_ids(user.pk), {role.pk})
+        permission_registry.load()
+        self.assertTrue(permission_registry.has_codes(user.pk, {"menu"}))
+        self.assertEqual(menu_tree.get_user_tree(user)[0]["code"], "menu")
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/rbac/permissions/")
+        self.assertEqual((response.status_code, response["X-Cache"]), (200, "MISS"))
+
+
+class AsyncUserViewSet(AutoPrefetchMixin, AsyncModelViewSet):
+    queryset = User.objects.order_by("id")
+    serializer_class = UserSerializer
+
+
+class CountingThrottle(BaseThrottle):
+    calls = 0
+
+    def allow_request(self, request, view):
+        type(self).calls += 1
+        return True
+
+
+class QueryingPermission(BasePermission):
+    """权限检查需要查询数据库，在事件循环中会抛出 SynchronousOnlyOperation"""
+
+    def has_permission(self, request, view):
+        return Role.objects.exists()
+
+
+class QueryingFilterBackend:
+    def filter_queryset(self, request, queryset, view):
+        return queryset if Role.objects.exists() else queryset.none()
+
+
+class AsyncGuardedUserViewSet(AsyncUserViewSet):
+    permission_classes = [QueryingPermission]
+    throttle_classes = [CountingThrottle]
+    filter_backends = [QueryingFilterBackend]
+
+
+class AsyncViewSetTests(TestCase):
+    """异步视图集的增删改查使用异步 ORM，响应结构与同步视图集一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.roles = [Role.objects.create(name=f"role {i}") for i in range(2)]
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        for i in range(3):
+            User.objects.create(username=f"user {i}").roles.add(*cls.roles)
+
+    async def call(self, method, actions, path="/", data=None, **kwargs):
+        factory = AsyncRequestFactory()
+        if data is None:
+            request = getattr(factory, method)(path)
+        else:
+            request = getattr(factory, method)(path, data, content_type="application/json")
+        force_authenticate(request, self.admin)
+        response = await AsyncUserViewSet.as_view(actions)(request, **kwargs)
+        response.render()
+        return response.status_code, json.loads(response.content) if response.content else None
+
+    async def test_list_matches_sync_viewset(self):
+        status_code, body = await self.call("get", {"get": "list"}, "/?page=2&page_size=2")
+        self.assertEqual(status_code, 200)
+        sync_response = await sync_to_async(self.client_list)("/rbac/users/?page=2&page_size=2")
+        self.assertEqual(body["data"]["items"], sync_response["data"]["items"])
+        self.assertEqual(body["data"]["total"], 4)
+        self.assertIsNone(body["data"]["next_page"])
+        self.assertEqual(body["data"]["items"][0]["roles"], [role.pk for role in self.roles])
+
+    def client_list(self, url):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with override_settings(LIST_CACHE={"ENABLED": False}):
+            return json.loads(client.get(url).content)
+
+    async def test_crud(self):
+        status_code, body = await self.call(
+            "post", {"post": "create"}, data={"username": "new", "password": "x", "roles": [self.roles[0].pk]}
+        )
+        self.assertEqual(status_code, 201)
+        pk = body["data"]["id"]
+        self.assertEqual(body["data"]["roles"], [self.roles[0].pk])
+
+        status_code, body = await self.call(
+            "patch", {"patch": "partial_update"}, data={"roles": [r.pk for r in self.roles]}, pk=pk
+        )
+        self.assertEqual((status_code, body["data"]["roles"]), (200, [r.pk for r in self.roles]))
+
+        status_code, body = await self.call("get", {"get": "retrieve"}, pk=pk)
+        self.assertEqual(body["data"]["username"], "new")
+
+        status_code, _ = await self.call("delete", {"delete": "destroy"}, pk=pk)
+        self.assertEqual(status_code, 204)
+        self.assertFalse(await User.objects.filter(pk=pk).aexists())
+
+        status_code, body = await self.call("get", {"get": "retrieve"}, pk=pk)
+        self.assertEqual((status_code, body["code"]), (404, 404))
+
+        status_code, body = await self.call("post", {"post": "create"}, data={"username": "admin", "roles": []})
+        self.assertEqual(status_code, 400)
+        self.assertIn("username", body["msg"])
+
+    async def test_database_permissions_and_filters_run_once(self):
+        CountingThrottle.calls = 0
+        for actions, kwargs in (({"get": "list"}, {}), ({"get": "retrieve"}, {"pk": self.admin.pk})):
+            request = AsyncRequestFactory().get("/")
+            force_authenticate(request, self.admin)
+            response = await AsyncGuardedUserViewSet.as_view(actions)(request, **kwargs)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(CountingThrottle.calls, 2)
+
+
+
+class UnsignalledBulkUserViewSet(AutoPrefetchMixin, BulkModelMixin, viewsets.ModelViewSet):
+    # 不发送逐个对象的信号：只统计批量读写本身的查询次数
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    bulk_send_signals = False
+
+
+class BulkModelMixinTests(TestCase):
+    """批量增删改：查询次数与批次大小无关，逐项返回错误，整个批次在一个事务中"""
+
+    bulk_actions = {"post": "bulk_create", "patch": "bulk_update", "delete": "bulk_destroy"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.roles = [Role.objects.create(name=f"role {i}") for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def request(self, method, url, data):
+        response = getattr(self.client, method)(url, data, format="json")
+        return response.status_code, json.loads(response.content) if response.content else None
+
+    def unsignalled(self, method, data):
+        request = getattr(APIRequestFactory(), method)("/", data, format="json", HTTP_HOST="localhost")
+        force_authenticate(request, self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = UnsignalledBulkUserViewSet.as_view(self.bulk_actions)(request)
+            response.render()
+        return response.status_code, json.loads(response.content) if response.content else None, len(ctx.captured_queries)
+
+    def users(self, prefix, count):
+        return [
+            {"username": f"{prefix}{i}", "password": "x", "roles": [self.roles[i % 3].pk, self.roles[(i + 1) % 3].pk]}
+            for i in range(count)
+        ]
+
+    def test_query_count_independent_of_batch_size(self):
+        counts = []
+        for prefix, size in (("a", 5), ("b", 50)):
+            status_code, body, queries = self.unsignalled("post", self.users(prefix, size))
+            self.assertEqual(status_code, 201)
+            self.assertEqual(len(body["data"]), size)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(body["data"][1]["roles"], [self.roles[1].pk, self.roles[2].pk])
+
+        ids = [item["id"] for item in body["data"]]
+        counts = []
+        for size in (5, 50):
+            status_code, body, queries = self.unsignalled(
+                "patch", [{"id": pk, "first_name": "x", "roles": [self.roles[0].pk]} for pk in ids[:size]]
+            )
+            self.assertEqual(status_code, 200)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual({item["first_name"] for item in body["data"]}, {"x"})
+        self.assertEqual(set(User.roles.through.objects.filter(user_id__in=ids).values_list("role_id", flat=True)),
+                         {self.roles[0].pk})
+
+        status_code, _, _ = self.unsignalled("delete", ids)
+        self.assertEqual(status_code, 204)
+        self.assertFalse(User.objects.filter(pk__in=ids).exists())
+
+    def test_per_item_errors_roll_back_batch(self):
+        users = self.users("c", 4)
+        users[1]["username"] = "admin"               # 与已有数据重复
+        users[2]["username"] = users[0]["username"]  # 与批次内前一项重复
+        users[3]["roles"] = [999]
+        status_code, body = self.request("post", "/rbac/users/bulk/", users)
+        self.assertEqual((status_code, body["code"], body["msg"]), (400, 400, "批量校验失败"))
+        self.assertEqual(body["data"][0], {})
+        self.assertIn("username", body["data"][1])
+        self.assertIn("username", body["data"][2])
+        self.assertIn("roles", body["data"][3])
+        self.assertFalse(User.objects.filter(username__startswith="c").exists())
+
+        status_code, body = self.request("patch", "/rbac/users/bulk/", [{"id": self.admin.pk}, {"id": 999}, {}])
+        self.assertEqual(status_code, 400)
+        self.assertEqual(body["data"][0], {})
+        self.assertEqual(list(body["data"][1]), ["id"])
+        self.assertEqual(list(body["data"][2]), ["id"])
+
+        status_code, _ = self.request("post", "/rbac/users/bulk/", {"username": "x"})
+        self.assertEqual(status_code, 400)
+
+    def test_signals_keep_caches_and_closure_in_sync(self):
+        user = User.objects.create(username="cached")
+        user.roles.add(self.roles[0])
+        self.assertEqual(permission_cache.get_role_ids(user.pk), {self.roles[0].pk})
+        status_code, _ = self.request("patch", "/rbac/users/bulk/", [{"id": user.pk, "roles": [self.roles[1].pk]}])
+        self.assertEqual(status_code, 200)
+        self.assertEqual(permission_cache.get_role_ids(user.pk), {self.roles[1].pk})
+
+        root = Permission.objects.create(name="系统", code="sys", type="menu")
+        status_code, _ = self.request(
+            "post", "/rbac/permissions/bulk/",
+            [{"name": f"菜单 {i}", "code": f"sys:{i}", "type": "menu", "parent": root.pk} for i in range(3)],
+        )
+        self.assertEqual(status_code, 201)
+        self.assertEqual(Permission.objects.descendants(root).count(), 3)
+
+    def test_parent_cycles_across_batch_are_rejected(self):
+        a = Permission.objects.create(name="A", code="a", type="menu")
+        b = Permission.objects.create(name="B", code="b", type="menu")
+        c = Permission.objects.create(name="C", code="c", type="menu", parent=b)
+        # 逐项检查都能通过，合起来 A、B 互为父节点
+        status_code, body = self.request(
+            "patch", "/rbac/permissions/bulk/", [{"id": a.pk, "parent": c.pk}, {"id": b.pk, "parent": a.pk}]
+        )
+        self.assertEqual(status_code, 400)
+        self.assertEqual([list(item) for item in body["data"]], [["parent"], ["parent"]])
+        self.assertIsNone(Permission.objects.get(pk=a.pk).parent_id)
+
+        # 先把 C 移出 B 的子树，A 再挂到 C 下就不会成环
+        status_code, _ = self.request(
+            "patch", "/rbac/permissions/bulk/",
+            [{"id": c.pk, "parent": None}, {"id": a.pk, "parent": c.pk}, {"id": b.pk, "parent": a.pk}],
+        )
+        self.assertEqual(status_code, 200)
+        self.assertEqual(list(Permission.objects.ancestors(b)), [c, a])
+
+        # B 原来在 A 的子树中：同一批次把 A 挂到 B 下、B 移到根，闭包表与逐个保存的结果一致
+        status_code, _ = self.request(
+            "patch", "/rbac/permissions/bulk/", [{"id": a.pk, "parent": b.pk}, {"id": b.pk, "parent": None}]
+        )
+        self.assertEqual(status_code, 200)
+        expected = set(PermissionClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+        PermissionClosure.objects.rebuild()
+        self.assertEqual(set(PermissionClosure.objects.values_list("ancestor_id", "descendant_id", "depth")), expected)
+        self.assertEqual(list(Permission.objects.ancestors(a)), [b])
+
+    def test_versions_bumped_after_commit_without_signals(self):
+        before = get_model_version(User)
+        with self.captureOnCommitCallbacks() as callbacks:
+            status_code, _, _ = self.unsignalled("post", self.users("v", 2))
+        self.assertEqual(status_code, 201)
+        self.assertEqual(get_model_version(User), before)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_model_version(User), before)
+
+
+class HasPermissionCodeTests(TestCase):
+    """权限编码检查：全部 / 任意一个、未映射的 action 拒绝、RolePermission 变化后提交时失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.list_perm = Permission.objects.create(name="用户列表", code="user:list", type="button")
+        cls.create_perm = Permission.objects.create(name="新建用户", code="user:create", type="button")
+        cls.role = Role.objects.create(name="查看")
+        cls.role.permissions.add(cls.list_perm)
+        cls.user = User.objects.create(username="viewer")
+        cls.user.roles.add(cls.role)
+        cls.superuser = User.objects.create(username="root", is_superuser=True)
+
+    def setUp(self):
+        cache.clear()
+        permission_cache.clear_local_cache()
+        permission_registry.load()
+
+    def check(self, permission, user=None, action=None, code_map=None):
+        request = APIRequestFactory().get("/")
+        request.user = user or self.user
+        view = mock.Mock(action=action, permission_code_map=code_map or {})
+        return permission.has_permission(request, view)
+
+    def test_all_of_and_any_of(self):
+        self.assertTrue(self.check(HasPermissionCode("user:list")))
+        self.assertFalse(self.check(HasPermissionCode("user:list", "user:create")))
+        self.assertTrue(self.check(HasPermissionCode("user:list", "user:create", any_of=True)))
+        self.assertFalse(self.check(HasPermissionCode("user:unknown")))
+        self.assertTrue(self.check(HasPermissionCode("user:create"), self.superuser))
+        self.assertFalse(self.check(HasPermissionCode("user:list"), mock.Mock(is_authenticated=False)))
+
+    def test_unmapped_action_is_denied(self):
+        code_map = {"list": "user:list", "create": ["user:create"], "tree": ()}
+        self.assertTrue(self.check(HasPermissionCode(), action="list", code_map=code_map))
+        self.assertFalse(self.check(HasPermissionCode(), action="create", code_map=code_map))
+        # 显式映射为空元组：只需要登录
+        self.assertTrue(self.check(HasPermissionCode(), action="tree", code_map=code_map))
+        # 新增的 action（如 export、bulk_create）没有映射时拒绝
+        self.assertFalse(self.check(HasPermissionCode(), action="bulk_create", code_map=code_map))
+        self.assertTrue(self.check(HasPermissionCode(), self.superuser, action="bulk_create", code_map=code_map))
+
+    def test_role_permission_change_invalidates_after_commit(self):
+        permission = HasPermissionCode("user:create")
+        self.assertFalse(self.check(permission))
+        stale_mask = permission_registry.role_mask(self.role.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.create(role=self.role, permission=self.create_perm)
+            self.assertTrue(self.check(permission))
+            # 模拟提交前重新加载、缓存了旧掩码（如其他进程读到未提交前的数据）
+            permission_registry._role_masks[self.role.pk] = stale_mask
+            permission_registry._dirty_roles.discard(self.role.pk)
+            self.assertFalse(self.check(permission))
+        # 提交后再次失效，重新计算出新掩码
+        self.assertTrue(self.check(permission))
+
+
+class PermissionClosureTests(TestCase):
+    """权限层级闭包表：新增、移动子树、整体重建与层级查询"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Permission.objects.create(name="系统", code="sys", type="catalog")
+        cls.menu = Permission.objects.create(name="用户", code="sys:user", type="menu", parent=cls.root)
+        cls.button = Permission.objects.create(name="新建", code="sys:user:add", type="button", parent=cls.menu)
+        cls.other = Permission.objects.create(name="日志", code="log", type="catalog")
+
+    def links(self):
+        return set(PermissionClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+
+    def test_queries(self):
+        self.assertEqual(list(Permission.objects.descendants(self.root)), [self.menu, self.button])
+        self.assertEqual(list(Permission.objects.ancestors(self.button)), [self.root, self.menu])
+        self.assertEqual(list(Permission.objects.subtree(self.menu)), [self.menu, self.button])
+        self.assertEqual(list(Permission.objects.ancestors(self.button, include_self=True))[-1], self.button)
+
+    def test_move_subtree(self):
+        self.menu.parent = self.other
+        self.menu.save()
+        self.assertEqual(list(Permission.objects.ancestors(self.button)), [self.other, self.menu])
+        self.assertFalse(Permission.objects.descendants(self.root).exists())
+
+        self.menu.parent = None
+        self.menu.save()
+        self.assertEqual(list(Permission.objects.ancestors(self.button)), [self.menu])
+        self.assertIn((self.menu.pk, self.button.pk, 1), self.links())
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        expected = self.links()
+        self.assertIn((self.root.pk, self.button.pk, 2), expected)
+        PermissionClosure.objects.all().delete()
+        PermissionClosure.objects.rebuild()
+        self.assertEqual(self.links(), expected)
+
+    def test_cycle_is_rejected_with_400(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="admin", is_staff=True))
+        for parent in (self.button, self.root):
+            response = client.patch(f"/rbac/permissions/{self.root.pk}/", {"parent": parent.pk}, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("parent", json.loads(response.content)["msg"])
+        response = client.patch(f"/rbac/permissions/{self.menu.pk}/", {"parent": self.other.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # 直接保存时由信号兜底
+        self.other.parent = self.button
+        with self.assertRaises(ValueError):
+            self.other.save()
+
+
+class StatelessJWTTests(TestCase):
+    """无状态 JWT：签发与刷新时写入 claims，版本号过期时回退数据库，拒绝停用或已删除的用户"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name="运维")
+        cls.other_role = Role.objects.create(name="审计")
+        cls.user = User.objects.create(username="alice")
+        cls.user.set_password("secret")
+        cls.user.save()
+        cls.user.roles.add(cls.role)
+
+    def setUp(self):
+        cache.clear()
+        caches["permission_versions"].clear()
+        permission_cache.clear_local_cache()
+        self.client = APIClient()
+
+    def obtain(self):
+        response = self.client.post("/rbac/token/", {"username": "alice", "password": "secret"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)["data"]
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}", HTTP_HOST="localhost")
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def test_claims_on_obtain_and_refresh(self):
+        tokens = self.obtain()
+        access = AccessToken(tokens["access"])
+        self.assertEqual(access["username"], "alice")
+        self.assertEqual(access["role_ids"], [self.role.pk])
+        self.assertTrue(access["is_active"])
+        self.assertEqual(access[PERMISSION_VERSION_CLAIM], permission_cache.get_user_version(self.user.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles.add(self.other_role)
+        response = self.client.post("/rbac/token/refresh/", {"refresh": tokens["refresh"]}, format="json")
+        refreshed = AccessToken(json.loads(response.content)["data"]["access"])
+        self.assertEqual(refreshed["role_ids"], sorted([self.role.pk, self.other_role.pk]))
+        self.assertNotEqual(refreshed[PERMISSION_VERSION_CLAIM], access[PERMISSION_VERSION_CLAIM])
+
+    def test_current_stamp_skips_database(self):
+        access = self.obtain()["access"]
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+        self.assertIsInstance(user, RBACTokenUser)
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.role_ids, {self.role.pk})
+
+    def test_stamp_survives_list_cache_load(self):
+        access = self.obtain()["access"]
+        # 模拟大量列表缓存写入，默认缓存的 MAX_ENTRIES 会淘汰其中的条目
+        for i in range(1000):
+            cache.set(f"list-cache:{i}", {"items": [i]})
+        permission_cache.clear_local_cache()
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+        self.assertIsInstance(user, RBACTokenUser)
+
+    def test_refresh_loads_user_once(self):
+        refresh = self.obtain()["refresh"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/rbac/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+        user_table = User._meta.db_table
+        user_queries = [q for q in queries if f'FROM "{user_table}"' in q["sql"]]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_refresh_rejects_deleted_user(self):
+        refresh = self.obtain()["refresh"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        response = self.client.post("/rbac/token/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_invalidates_stamp(self):
+        access = self.obtain()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles.add(self.other_role)
+        self.assertNotEqual(AccessToken(access)[PERMISSION_VERSION_CLAIM], permission_cache.get_user_version(self.user.pk))
+        with self.assertNumQueries(1):
+            user = self.authenticate(access)
+        self.assertIsInstance(user, User)
+
+    def test_stale_stamp_rejects_inactive_or_deleted_user(self):
+        access = self.obtain()["access"]
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            permission_cache.invalidate_users([self.user.pk])
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_schema_keeps_jwt_security_scheme(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+
+
+class ModelVersionTests(TestCase):
+    """模型版本号：信号中立即递增，事务提交后再递增一次"""
+
+    def test_bumped_again_after_commit(self):
+        before = get_model_version(Role)
+        with self.captureOnCommitCallbacks() as callbacks:
+            role = Role.objects.create(name="运维")
+            role.permissions.add(Permission.objects.create(name="日志", code="log", type="catalog"))
+        after_signal = get_model_version(Role)
+        self.assertGreater(after_signal, before)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_model_version(Role), after_signal)
+
+
+class PermissionCacheTests(TestCase):
+    """用户权限缓存：进程内 LRU、Django cache 两级缓存，以及信号只在提交后失效受影响的用户"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.perm = Permission.objects.create(name="用户", code="sys:user", type="menu")
+        cls.other_perm = Permission.objects.create(name="日志", code="sys:log", type="menu")
+        cls.role = Role.objects.create(name="运维")
+        cls.other_role = Role.objects.create(name="审计")
+        cls.alice = User.objects.create(username="alice")
+        cls.bob = User.objects.create(username="bob")
+        cls.carol = User.objects.create(username="carol")
+        cls.alice.roles.add(cls.role)
+        cls.bob.roles.add(cls.role)
+        cls.carol.roles.add(cls.other_role)
+        RolePermission.objects.create(role=cls.role, permission=cls.perm)
+
+    def setUp(self):
+        cache.clear()
+        permission_cache.clear_local_cache()
+        self.invalidated = []
+        patcher = mock.patch.object(permission_cache, "_invalidation_callbacks", [self.invalidated.append])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_lru_evicts_least_recently_used_and_expires(self):
+        lru = permission_cache.LocalLRUCache(maxsize=2, ttl=5)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        self.assertEqual(lru.get("a"), 1)
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+        self.assertEqual(len(lru), 2)
+
+        now = time.monotonic()
+        with mock.patch("rbac_app.permission_cache.time.monotonic", return_value=now + 6):
+            self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 1)
+
+    def test_two_cache_layers(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(permission_cache.get_permission_codes(self.alice.pk), {"sys:user"})
+        with self.assertNumQueries(0):
+            permission_cache.get_permission_codes(self.alice.pk)
+        # 进程内 LRU 失效后由 Django cache 回填
+        permission_cache.clear_local_cache()
+        with self.assertNumQueries(0):
+            permission_cache.get_permission_codes(self.alice.pk)
+        self.assertIsNotNone(permission_cache.local_cache.get(("codes", self.alice.pk)))
+        permission_cache.clear_local_cache()
+        cache.clear()
+        with self.assertNumQueries(1):
+            permission_cache.get_permission_codes(self.alice.pk)
+
+    def assertInvalidatesAfterCommit(self, change, expected):
+        """change 只失效 expected 中的用户：立即失效，提交后再失效一次"""
+        users = (self.alice, self.bob, self.carol)
+        expected_ids = {user.pk for user in expected}
+        for user in users:
+            permission_cache.get_permission_codes(user.pk)
+        self.invalidated.clear()
+        with self.captureOnCommitCallbacks() as callbacks:
+            change()
+            immediate = list(self.invalidated)
+            self.assertEqual(set().union(*immediate), expected_ids)
+            # 模拟提交前其他请求把旧数据写回缓存
+            for user in users:
+                permission_cache.get_permission_codes(user.pk)
+        for callback in callbacks:
+            callback()
+        after_commit = self.invalidated[len(immediate):]
+        self.assertEqual(len(after_commit), len(immediate))
+        self.assertEqual(set().union(*after_commit), expected_ids)
+        shared = caches[permission_cache.get_cache_config()["CACHE_ALIAS"]]
+        for user in users:
+            key = permission_cache._cache_key("codes", user.pk)
+            self.assertEqual(shared.get(key) is None, user in expected, user)
+            self.assertEqual(permission_cache.local_cache.get(("codes", user.pk)) is None, user in expected, user)
+
+    def test_user_change(self):
+        def change():
+            self.carol.is_active = False
+            self.carol.save()
+        self.assertInvalidatesAfterCommit(change, [self.carol])
+
+    def test_user_role_change(self):
+        self.assertInvalidatesAfterCommit(lambda: UserRole.objects.create(user=self.carol, role=self.role), [self.carol])
+
+    def test_role_permission_change(self):
+        self.assertInvalidatesAfterCommit(
+            lambda: RolePermission.objects.create(role=self.role, permission=self.other_perm), [self.alice, self.bob]
+        )
+
+    def test_m2m_changes(self):
+        self.assertInvalidatesAfterCommit(lambda: self.bob.roles.add(self.other_role), [self.bob])
+        self.assertInvalidatesAfterCommit(lambda: self.other_role.users.remove(self.carol), [self.carol])
+        self.assertInvalidatesAfterCommit(lambda: self.role.permissions.add(self.other_perm), [self.alice, self.bob])
+        self.assertInvalidatesAfterCommit(lambda: self.perm.roles.clear(), [self.alice, self.bob])
+
+
+class MenuTreeTests(TestCase):
+    """菜单树：父节点不可见时提升为根节点，按角色集合缓存，权限变化提交后失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Permission.objects.create(name="系统", code="sys", type="catalog")
+        cls.menu = Permission.objects.create(name="用户", code="sys:user", type="menu", parent=cls.root)
+        cls.button = Permission.objects.create(name="新建", code="sys:user:add", type="button", parent=cls.menu)
+        cls.viewer = Role.objects.create(name="查看")
+        cls.editor = Role.objects.create(name="编辑")
+        cls.viewer.permissions.add(cls.root, cls.menu)
+        cls.editor.permissions.add(cls.button)
+
+    def setUp(self):
+        cache.clear()
+
+    def codes(self, nodes):
+        return [(node["code"], self.codes(node["children"])) for node in nodes]
+
+    def test_orphaned_nodes_are_promoted(self):
+        rows = [
+            {"id": 2, "name": "用户", "code": "sys:user", "type": "menu", "parent_id": 1, "path": "", "config": None},
+            {"id": 3, "name": "新建", "code": "sys:user:add", "type": "button", "parent_id": 2, "path": "", "config": {}},
+        ]
+        tree = menu_tree.build_tree(rows)
+        self.assertEqual(self.codes(tree), [("sys:user", [("sys:user:add", [])])])
+        self.assertEqual(tree[0]["meta"], {})
+        self.assertEqual(self.codes(menu_tree.get_tree_for_roles({self.editor.pk})), [("sys:user:add", [])])
+
+    def test_cache_key_per_role_set(self):
+        both = [self.viewer.pk, self.editor.pk]
+        with self.assertNumQueries(1):
+            tree = menu_tree.get_tree_for_roles(set(both))
+        self.assertEqual(self.codes(tree), [("sys", [("sys:user", [("sys:user:add", [])])])])
+        # 角色集合相同（顺序不同）时共用缓存
+        with self.assertNumQueries(0):
+            self.assertEqual(menu_tree.get_tree_for_roles(list(reversed(both))), tree)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.codes(menu_tree.get_tree_for_roles({self.viewer.pk})), [("sys", [("sys:user", [])])])
+
+    def test_version_bumped_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            version = menu_tree.get_tree_version()
+            self.editor.permissions.remove(self.button)
+            immediate = menu_tree.get_tree_version()
+            self.assertGreater(immediate, version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(menu_tree.get_tree_version(), immediate)
+        self.assertEqual(menu_tree.get_tree_for_roles({self.editor.pk}), [])
+
+
+class CursorPermissionViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Permission.objects.all()
+    serializer_class = PermissionSerializer
+    pagination_class = CustomCursorPagination
+
+
+class CursorPaginationTests(TestCase):
+    """游标分页：按 next/prev 链接往返翻页，可选总数，cursor_ordering 与字段映射"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [Permission.objects.create(name=f"菜单 {i}", code=f"menu:{i}", type="menu").pk for i in range(5)]
+
+    def get(self, url, view_class=CursorPermissionViewSet):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, User(username="admin", is_staff=True))
+        response = view_class.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids_of(self, data):
+        return [item["id"] for item in data["items"]]
+
+    def test_round_trip(self):
+        pages, url = [], "/?page_size=2"
+        while url:
+            data = self.get(url)
+            pages.append(self.ids_of(data))
+            url = data["next_page"]
+        self.assertEqual(pages, [self.ids[:-3:-1], self.ids[-3:-5:-1], self.ids[:1]])
+
+        # 从最后一页沿 prev_page 返回
+        data = self.get(self.get(self.get("/?page_size=2")["next_page"])["next_page"])
+        self.assertEqual(self.ids_of(self.get(data["prev_page"])), pages[1])
+        self.assertIsNone(self.get("/?page_size=2")["prev_page"])
+
+    def test_total_only_when_requested(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.get("/?page_size=2")["total"])
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get("/?page_size=2&with_total=1")["total"], 5)
+        self.assertIsNone(self.get("/?with_total=false")["total"])
+
+    def test_cursor_ordering(self):
+        view_class = type("AscendingViewSet", (CursorPermissionViewSet,), {"cursor_ordering": ("code", "id")})
+        data = self.get("/?page_size=3", view_class)
+        self.assertEqual(self.ids_of(data), self.ids[:3])
+        self.assertEqual(self.ids_of(self.get(data["next_page"], view_class)), self.ids[3:])
+
+    @override_settings(CUSTOM_PAGINATION_KEYS={"count": "count", "results": "rows", "next": "next"})
+    def test_key_mapping(self):
+        data = self.get("/?page_size=2")
+        self.assertEqual(list(data), ["count", "next", "previous", "rows"])
+
+
+class ExportPermissionViewSet(ExportModelMixin, PermissionSearchViewSet):
+    export_chunk_size = 2
+
+
+class ExportModelMixinTests(TestCase):
+    """流式导出：NDJSON / CSV 切换、CSV 转义、沿用列表的搜索条件、不支持的格式返回 400"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.root = Permission.objects.create(name="系统管理", code="system", type="catalog")
+        Permission.objects.create(name='引号"逗号,换行\n', code="menu:1", type="menu", parent=cls.root, config={"k": "值"})
+        Permission.objects.create(name="按钮", code="button:1", type="button", parent=cls.root)
+
+    def export(self, **params):
+        request = APIRequestFactory().get("/export/", params)
+        force_authenticate(request, self.admin)
+        return ExportPermissionViewSet.as_view({"get": "export"})(request)
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_by_default(self):
+        response = self.export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="permission.ndjson"')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row["code"] for row in rows], ["system", "menu:1", "button:1"])
+        self.assertEqual(rows[1]["config"], {"k": "值"})
+
+    def test_csv_escaping(self):
+        response = self.export(export_format="CSV")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        text = self.content(response)
+        self.assertTrue(text.startswith("\ufeff"))
+        rows = list(csv.DictReader(io.StringIO(text[1:])))
+        self.assertEqual([row["code"] for row in rows], ["system", "menu:1", "button:1"])
+        self.assertEqual(rows[1]["name"], '引号"逗号,换行\n')
+        self.assertEqual(json.loads(rows[1]["config"]), {"k": "值"})
+        self.assertEqual(rows[0]["parent"], "")
+
+    def test_search_filters_pass_through(self):
+        rows = self.content(self.export(type="menu,button", code="menu"))
+        self.assertEqual([json.loads(line)["code"] for line in rows.splitlines()], ["menu:1"])
+        self.assertEqual(self.export(parent="abc").status_code, 400)
+
+    def test_unknown_format(self):
+        response = self.export(export_format="xlsx")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("export_format", response.data)
+
+
+class ParamValidatorTests(TestCase):
+    """查询参数校验器：类型转换、枚举、必填与默认值、多值参数"""
+
+    def validate(self, parameters, query):
+        return ParamValidator.compile(parameters).validate(QueryDict(query))
+
+    def test_coercion(self):
+        parameters = {
+            "age": ("int",),
+            "active": ("bool",),
+            "day": ("date",),
+            "price": ("decimal",),
+            "extra": ("dict",),
+            "ids": ("list[int]",),
+        }
+        params, errors = self.validate(
+            parameters, "age=18&active=false&day=2024-05-20&price=9.90&extra=%7B%22a%22%3A1%7D&ids=1,2&ids=3"
+        )
+        self.assertEqual(errors, {})
+        self.assertEqual(params, {
+            "age": 18, "active": False, "day": datetime.date(2024, 5, 20), "price": Decimal("9.90"),
+            "extra": {"a": 1}, "ids": [1, 2, 3],
+        })
+        _, errors = self.validate(parameters, "age=x&active=maybe&day=2024%2F05%2F20&extra=%5B1%5D&ids=1,a")
+        self.assertEqual(errors, {
+            "age": "请输入合法的整数", "active": "请输入合法的布尔值", "day": "日期格式错误，应为 YYYY-MM-DD",
+            "extra": "请输入 JSON 对象", "ids": "请输入合法的整数",
+        })
+
+    def test_enum(self):
+        parameters = {
+            "gender": ("str", False, "性别", None, None, ["male", "female"]),
+            "level": ("int", False, "等级", None, None, [1, 2]),
+        }
+        self.assertEqual(self.validate(parameters, "gender=male&level=2"), ({"gender": "male", "level": 2}, {}))
+        self.assertEqual(
+            self.validate(parameters, "gender=x&level=3")[1], {"gender": "可选值为：female, male", "level": "可选值为：1, 2"}
+        )
+
+    def test_required_and_default(self):
+        parameters = {
+            "name": ("str", True), "page": ("int", False, "页码", 1), "size": ("int", True, "每页数量", 10), "q": ("str",),
+        }
+        params, errors = self.validate(parameters, "name=")
+        self.assertEqual(errors, {"name": "该参数为必填项"})
+        # 有默认值的必填参数不报错
+        self.assertEqual(params, {"page": 1, "size": 10})
+        self.assertEqual(self.validate(parameters, "name=a&page=3"), ({"name": "a", "page": 3, "size": 10}, {}))
+
+        param = CompiledParam("types", "list")
+        self.assertTrue(param.many)
+        self.assertFalse(CompiledParam("size", "int", required=True, default=10).required)
+
+
+class SQLiteProfileTests(TestCase):
+    """SQLite 生产配置：新连接执行 PRAGMA，写事务使用 BEGIN IMMEDIATE"""
+
+    def connect(self, database):
+        """直接创建连接对象（不注册到 connections，不受测试数据库隔离的限制）"""
+        databases = {DEFAULT_DB_ALIAS: dict(connections.settings[DEFAULT_DB_ALIAS]), "production": database}
+        connection = SQLiteDatabaseWrapper(connections.configure_settings(databases)["production"], "production")
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_production_profile(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "db.sqlite3"
+        database = sqlite_database(path, profile="production", pragmas={"busy_timeout": 3000})
+        self.assertEqual(database["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual((database["CONN_MAX_AGE"], database["CONN_HEALTH_CHECKS"]), (600, True))
+
+        connection = self.connect(database)
+        self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 3000)
+        self.assertEqual(self.pragma(connection, "temp_store"), 2)  # MEMORY
+        with CaptureQueriesContext(connection) as ctx:
+            # transaction.atomic() 开启事务时执行的语句
+            connection._start_transaction_under_autocommit()
+            connection.rollback()
+        self.assertEqual(ctx.captured_queries[0]["sql"], "BEGIN IMMEDIATE")
+
+    def test_default_profile(self):
+        self.assertEqual(sqlite_database("db.sqlite3"), {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"})
+        with self.assertRaises(ValueError):
+            sqlite_database("db.sqlite3", profile="fast")
+
+
+class CountingRoleViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Role.objects.order_by("id")
+    serializer_class = RoleSerializer
+    pagination_class = CustomPageNumberPagination
+
+
+class CountStrategyTests(TestCase):
+    """分页计数策略：缓存计数按模型版本号失效，近似计数读取 sqlite_stat1，视图集可以覆盖默认策略"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Role.objects.create(name=f"角色 {i}")
+
+    def setUp(self):
+        cache.clear()
+
+    def list(self, count_strategy=None, queryset=None, **params):
+        attrs = {"count_strategy": count_strategy}
+        if queryset is not None:
+            attrs["queryset"] = queryset
+        view_class = type("View", (CountingRoleViewSet,), attrs)
+        request = APIRequestFactory().get("/", {"page_size": 2, **params})
+        force_authenticate(request, User(username="admin", is_staff=True))
+        with CaptureQueriesContext(connection) as ctx:
+            response = view_class.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        counts = [query for query in ctx.captured_queries if "COUNT(" in query["sql"].upper()]
+        return response.data, len(counts)
+
+    def test_default_is_exact(self):
+        data, counts = self.list()
+        self.assertEqual((data["total"], data["total_exact"], counts), (3, True, 1))
+
+    def test_cached_count(self):
+        strategy = CachedCount(timeout=60)
+        self.assertEqual(self.list(strategy)[1], 1)
+        data, counts = self.list(strategy, page=2)
+        self.assertEqual((data["total"], data["total_exact"], counts), (3, True, 0))
+        # 不同的过滤条件使用不同的缓存
+        self.assertEqual(self.list(strategy, Role.objects.filter(name="x"))[1], 1)
+
+        Role.objects.create(name="新角色")
+        data, counts = self.list(strategy)
+        self.assertEqual((data["total"], counts), (4, 1))
+
+    def test_approximate_count(self):
+        strategy = ApproximateCount()
+        # 还没有统计信息时退回精确计数
+        data, _ = self.list(strategy)
+        self.assertEqual((data["total"], data["total_exact"]), (3, True))
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            cursor.execute("UPDATE sqlite_stat1 SET stat = '1000' WHERE tbl = %s", [Role._meta.db_table])
+        data, counts = self.list(strategy)
+        self.assertEqual((data["total"], data["total_exact"], counts), (1000, False, 0))
+        # 有过滤条件时不能近似
+        data, counts = self.list(strategy, Role.objects.filter(name="角色 1"))
+        self.assertEqual((data["total"], data["total_exact"], counts), (1, True, 1))
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import UserViewSet, RoleViewSet, PermissionViewSet
 
 router = DefaultRouter()
@@ -9,4 +10,6 @@ router.register(r'permissions', PermissionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # 登录获取令牌
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # 刷新令牌
 ]
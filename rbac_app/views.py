@@ -6,10 +6,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from config.pagination import CustomPageNumberPagination
+from mixins.view import AutoPrefetchMixin, BulkModelMixin, ExportModelMixin, ListCacheMixin
+from . import permission_cache
+from .menu_tree import get_user_tree
 from .models import User, Role, Permission
-from .serializers import UserSerializer, RoleSerializer, PermissionSerializer
+from .serializers import UserSerializer, RoleSerializer, PermissionSerializer, PermissionBulkListSerializer
 
-class UserViewSet(viewsets.ModelViewSet):
+class RoleScopedListCacheMixin(ListCacheMixin):
+    """列表缓存按角色集合共享：角色相同的用户共用一份缓存"""
+
+    def get_list_cache_scope(self, request):
+        role_ids = sorted(permission_cache.get_role_ids(request.user.pk))
+        return "roles:" + ",".join(str(role_id) for role_id in role_ids)
+
+
+class UserViewSet(RoleScopedListCacheMixin, BulkModelMixin, ExportModelMixin, AutoPrefetchMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     @action(detail=False, methods=["get"], url_path="active-users")
@@ -20,14 +31,22 @@ class UserViewSet(viewsets.ModelViewSet):
         # 创建分页器
         paginator = CustomPageNumberPagination()
         paginator.page_size=1
-        active_users = self.queryset.filter(is_active=True)
+        active_users = self.get_queryset().filter(is_active=True)
         page = paginator.paginate_queryset(active_users,request)
         serializer = self.get_serializer(page, many=True)
         return paginator.get_paginated_response(serializer.data)
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(RoleScopedListCacheMixin, BulkModelMixin, ExportModelMixin, AutoPrefetchMixin, viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
 
-class PermissionViewSet(viewsets.ModelViewSet):
+class PermissionViewSet(RoleScopedListCacheMixin, BulkModelMixin, ExportModelMixin, viewsets.ModelViewSet):
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
+    bulk_list_serializer_class = PermissionBulkListSerializer
+
+    @action(detail=False, methods=["get"], url_path="tree", pagination_class=None)
+    def tree(self, request):
+        """
+        获取当前用户可见的菜单/路由树（供 Vben 前端使用）
+        """
+        return Response(get_user_tree(request.user))
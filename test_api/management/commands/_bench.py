@@ -0,0 +1,38 @@
+"""
+基准测试命令的公共工具
+
+所有 bench_* 命令都在一个最终回滚的事务中准备测试数据，不会污染数据库。
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Rollback(Exception):
+    """用于在基准测试结束后回滚事务"""
+
+
+@contextmanager
+def rollback_atomic(using=None):
+    """在事务中执行，退出时总是回滚"""
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def measure(func, repeat=1000):
+    """
+    重复执行 func，返回 (平均耗时毫秒, 平均查询数)
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - start
+    return elapsed * 1000 / repeat, len(ctx.captured_queries) / repeat
@@ -0,0 +1,81 @@
+"""
+基准测试：ASGI 下同步与异步视图集的并发
+
+通过 Django 的 ASGI 处理器（AsyncClient）并发请求两个相同的列表接口，
+每个请求先等待 --delay 秒模拟调用上游服务等 I/O，再分页读取权限列表：
+
+- 同步视图集：ASGI 下同步视图在同一个线程中依次执行（thread_sensitive），I/O 等待无法重叠
+- 异步视图集（mixins/view/async_viewsets.py）：等待期间事件循环处理其他请求
+
+    python manage.py bench_async_viewsets --concurrency 50 --delay 0.02
+"""
+
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import path
+from rest_framework import viewsets
+from rest_framework.permissions import AllowAny
+
+from mixins.view import AsyncReadOnlyModelViewSet
+from rbac_app.models import Permission
+from rbac_app.serializers import PermissionSerializer
+
+
+class SyncPermissionViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Permission.objects.order_by("id")
+    serializer_class = PermissionSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    delay = 0.02
+
+    def list(self, request, *args, **kwargs):
+        time.sleep(self.delay)  # 模拟上游调用
+        return super().list(request, *args, **kwargs)
+
+
+class AsyncPermissionViewSet(AsyncReadOnlyModelViewSet):
+    queryset = Permission.objects.order_by("id")
+    serializer_class = PermissionSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    delay = 0.02
+
+    async def list(self, request, *args, **kwargs):
+        await asyncio.sleep(self.delay)  # 模拟上游调用
+        return await super().list(request, *args, **kwargs)
+
+
+# 基准测试使用本模块作为 ROOT_URLCONF
+urlpatterns = [
+    path("sync/", SyncPermissionViewSet.as_view({"get": "list"})),
+    path("async/", AsyncPermissionViewSet.as_view({"get": "list"})),
+]
+
+
+class Command(BaseCommand):
+    help = "对比 ASGI 下同步与异步视图集在 I/O 等待时的并发吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=50, help="并发请求数")
+        parser.add_argument("--rounds", type=int, default=3, help="每种视图集的轮数")
+        parser.add_argument("--delay", type=float, default=0.02, help="每个请求模拟的 I/O 等待（秒）")
+
+    def handle(self, *args, **options):
+        SyncPermissionViewSet.delay = AsyncPermissionViewSet.delay = options["delay"]
+        with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=["testserver"]):
+            for name, url in (("同步视图集", "/sync/?page_size=20"), ("异步视图集", "/async/?page_size=20")):
+                elapsed = asyncio.run(self.run(url, options["concurrency"], options["rounds"]))
+                total = options["concurrency"] * options["rounds"]
+                self.stdout.write(f"{name}: {total / elapsed:.0f} 请求/秒（{elapsed * 1000 / options['rounds']:.0f} ms/轮）")
+
+    async def run(self, url, concurrency, rounds):
+        client = AsyncClient()
+        await client.get(url)  # 预热
+        start = time.perf_counter()
+        for _ in range(rounds):
+            responses = await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+            assert all(response.status_code == 200 for response in responses), responses[0].content
+        return time.perf_counter() - start
@@ -0,0 +1,53 @@
+"""
+基准测试：批量创建用户
+
+对比逐个 POST /rbac/users/ 与一次 POST /rbac/users/bulk/ 创建同样数量用户（每个用户两个角色）的耗时与查询数：
+
+    python manage.py bench_bulk --users 1000
+"""
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from rbac_app.models import Role, User
+from rbac_app.views import UserViewSet
+
+from ._bench import measure, rollback_atomic
+
+
+class Command(BaseCommand):
+    help = "对比逐个创建与批量创建用户的耗时与查询数"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="创建的用户数量")
+
+    def handle(self, *args, **options):
+        count = options["users"]
+        factory = APIRequestFactory()
+        results = {}
+        with rollback_atomic():
+            roles = [Role.objects.create(name=f"bench role {i}") for i in range(10)]
+            admin = User.objects.create(username="bench_admin", is_staff=True)
+
+            def payload(prefix, i):
+                return {"username": f"{prefix}_{i}", "password": "x", "roles": [roles[i % 10].pk, roles[(i + 1) % 10].pk]}
+
+            def call(actions, path, data):
+                request = factory.post(path, data, format="json", HTTP_HOST="localhost")
+                force_authenticate(request, admin)
+                response = UserViewSet.as_view(actions)(request)
+                assert response.status_code == 201, response.data
+                return response
+
+            def one_by_one():
+                for i in range(count):
+                    call({"post": "create"}, "/rbac/users/", payload("single", i))
+
+            def bulk():
+                call({"post": "bulk_create"}, "/rbac/users/bulk/", [payload("bulk", i) for i in range(count)])
+
+            results["逐个创建"] = measure(one_by_one, 1)
+            results["批量创建"] = measure(bulk, 1)
+
+        for name, (ms, queries) in results.items():
+            self.stdout.write(f"{name}: {ms:.0f} ms, {queries:.0f} 次查询（{count} 个用户）")
@@ -0,0 +1,54 @@
+"""
+基准测试：列表结果缓存
+
+对比 /rbac/users/ 列表在关闭缓存、缓存命中时的耗时与查询数：
+
+    python manage.py bench_list_cache --users 500
+"""
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from mixins.view.cache import get_list_cache_config
+from rbac_app.models import Role, User
+from rbac_app.views import UserViewSet
+
+from ._bench import measure, rollback_atomic
+
+
+class Command(BaseCommand):
+    help = "对比列表接口关闭缓存与命中缓存时的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500, help="测试用户数量")
+        parser.add_argument("--page-size", type=int, default=50, help="每页数量")
+        parser.add_argument("--repeat", type=int, default=200, help="每种情况的请求次数")
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            roles = [Role.objects.create(name=f"bench role {i}") for i in range(10)]
+            admin = User.objects.create(username="bench_admin", is_staff=True)
+            for i in range(options["users"]):
+                user = User.objects.create(username=f"bench_user_{i}")
+                user.roles.add(*roles[: i % 5 + 1])
+
+            view = UserViewSet.as_view({"get": "list"})
+            factory = APIRequestFactory()
+
+            def request():
+                req = factory.get("/rbac/users/", {"page": 2, "page_size": options["page_size"]}, HTTP_HOST="localhost")
+                force_authenticate(req, admin)
+                response = view(req)
+                response.render()
+                return response
+
+            caches[get_list_cache_config()["CACHE_ALIAS"]].clear()
+            with override_settings(LIST_CACHE={"ENABLED": False}):
+                uncached = measure(request, options["repeat"])
+            request()  # 预热
+            cached = measure(request, options["repeat"])
+
+        for name, (ms, queries) in (("关闭缓存", uncached), ("命中缓存", cached)):
+            self.stdout.write(f"{name}: {ms:.2f} ms/次, {queries:.1f} 次查询")
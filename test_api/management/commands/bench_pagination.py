@@ -0,0 +1,60 @@
+"""
+基准测试：页码分页 vs 键集（游标）分页
+
+分别测量第 1 页和深页（默认第 10000 页）的耗时：
+
+    python manage.py bench_pagination --rows 100000 --page 10000
+"""
+
+from django.core.management.base import BaseCommand
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from config.pagination import CustomCursorPagination, CustomPageNumberPagination
+from rbac_app.models import Permission
+
+from ._bench import measure, rollback_atomic
+
+
+class Command(BaseCommand):
+    help = "对比页码分页与键集分页在浅页、深页上的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--page", type=int, default=10000)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        with rollback_atomic():
+            Permission.objects.bulk_create(
+                (Permission(name=f"bench {i}", code=f"bench:{i}", type="button") for i in range(options["rows"])),
+                batch_size=5000,
+            )
+            queryset = Permission.objects.order_by("-id")
+            factory = APIRequestFactory(HTTP_HOST="localhost")
+
+            for page in (1, options["page"]):
+                # 页码分页：OFFSET + COUNT(*)
+                request = Request(factory.get("/", {"page": page, "page_size": page_size}))
+
+                def page_number():
+                    paginator = CustomPageNumberPagination()
+                    paginator.get_paginated_response(paginator.paginate_queryset(queryset, request))
+
+                # 键集分页：直接构造指向该页的游标，WHERE id < ? LIMIT n
+                position = queryset.values_list("id", flat=True)[(page - 1) * page_size]
+                paginator = CustomCursorPagination()
+                paginator.base_url = "http://localhost/"
+                cursor = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position + 1))
+                cursor_request = Request(factory.get(cursor))
+
+                def keyset():
+                    paginator = CustomCursorPagination()
+                    paginator.get_paginated_response(paginator.paginate_queryset(queryset, cursor_request))
+
+                for label, func in (("页码分页", page_number), ("键集分页", keyset)):
+                    ms, queries = measure(func, repeat=options["repeat"])
+                    self.stdout.write(f"第 {page} 页 {label}: {ms:.2f} ms, {queries:.0f} 次查询")
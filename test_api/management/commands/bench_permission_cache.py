@@ -0,0 +1,66 @@
+"""
+基准测试：用户有效权限缓存
+
+对比每次都查询数据库与使用 rbac_app.permission_cache 两种方式，
+单次权限判断的平均耗时和查询次数。
+
+    python manage.py bench_permission_cache --users 50 --permissions 200
+"""
+
+from django.core.management.base import BaseCommand
+
+from rbac_app import permission_cache
+from rbac_app.models import Permission, Role, RolePermission, User, UserRole
+
+from ._bench import measure, rollback_atomic
+
+
+class Command(BaseCommand):
+    help = "对比有无权限缓存时，单次权限判断的耗时与查询次数"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--roles", type=int, default=5)
+        parser.add_argument("--permissions", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with rollback_atomic():
+            users = self._prepare(options)
+            user_ids = [user.pk for user in users]
+            repeat = options["repeat"]
+
+            def uncached():
+                for user_id in user_ids:
+                    "bench:0" in permission_cache.compute_permission_codes(user_id)
+
+            def cached():
+                for user_id in user_ids:
+                    "bench:0" in permission_cache.get_permission_codes(user_id)
+
+            # 预热缓存，测量的是稳定状态下的命中开销
+            cached()
+            rounds = max(repeat // len(user_ids), 1)
+            for label, func in (("无缓存", uncached), ("有缓存", cached)):
+                ms, queries = measure(func, repeat=rounds)
+                self.stdout.write(
+                    f"{label}: 每次判断 {ms * 1000 / len(user_ids):.1f} µs, "
+                    f"{queries / len(user_ids):.3f} 次查询"
+                )
+
+    def _prepare(self, options):
+        permissions = Permission.objects.bulk_create(
+            Permission(name=f"bench {i}", code=f"bench:{i}", type="button")
+            for i in range(options["permissions"])
+        )
+        roles = Role.objects.bulk_create(Role(name=f"bench-role-{i}") for i in range(options["roles"]))
+        RolePermission.objects.bulk_create(
+            RolePermission(role=role, permission=permission)
+            for i, role in enumerate(roles)
+            for permission in permissions[i::2]
+        )
+        users = User.objects.bulk_create(User(username=f"bench-user-{i}") for i in range(options["users"]))
+        UserRole.objects.bulk_create(
+            UserRole(user=user, role=role) for user in users for role in roles[:3]
+        )
+        return users
@@ -0,0 +1,74 @@
+"""
+基准测试：CustomRenderer 渲染耗时
+
+对比预编译模板（只序列化 data 再拼接前后缀）与逐次解析配置的旧实现，
+分别使用小数据和大数据：
+
+    python manage.py bench_renderer
+"""
+
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from config.renderers import RESPONSE_TEMPLATE_CONFIG, CustomRenderer
+
+
+def legacy_build_response(data=None, code=None, message=None, is_error=False):
+    """预编译之前的 build_response 实现"""
+    cfg = RESPONSE_TEMPLATE_CONFIG
+    resp = {}
+    for key in cfg["field_order"]:
+        field = cfg["fields"][key]
+        if key == cfg["field_order"][0]:
+            resp[key] = code if code is not None else field.get("default", 0)
+        elif "msg" in key or "message" in key:
+            resp[key] = message if message is not None else field.get("default", "success")
+        elif field.get("default") is None:
+            resp[key] = data
+        else:
+            resp[key] = field.get("default")
+    return resp
+
+
+class LegacyRenderer(JSONRenderer):
+    """预编译之前的 CustomRenderer 实现"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = renderer_context.get("response", None)
+        template_keys = set(RESPONSE_TEMPLATE_CONFIG["field_order"])
+        if isinstance(data, dict) and template_keys <= set(data.keys()):
+            return super().render(data, accepted_media_type, renderer_context)
+        if response and not str(response.status_code).startswith("2"):
+            code = response.status_code
+            message = data.get("detail") if isinstance(data, dict) and 'detail' in data else data
+            return super().render(legacy_build_response(code=code, message=message, is_error=True),
+                                  accepted_media_type, renderer_context)
+        return super().render(legacy_build_response(data=data), accepted_media_type, renderer_context)
+
+
+class Command(BaseCommand):
+    help = "对比预编译响应模板与旧实现的渲染耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="大数据的行数")
+
+    def handle(self, *args, **options):
+        payloads = {
+            "小数据": {"id": 1, "name": "admin"},
+            "大数据": [
+                {"id": i, "name": f"用户{i}", "email": f"user{i}@example.com", "roles": [1, 2, 3]}
+                for i in range(options["rows"])
+            ],
+        }
+        context = {"response": Response(status=200)}
+        for label, payload in payloads.items():
+            number = 20000 if label == "小数据" else 50
+            results = {}
+            for name, renderer in (("旧实现", LegacyRenderer()), ("预编译", CustomRenderer())):
+                results[name] = renderer.render(payload, "application/json", context)
+                seconds = timeit.timeit(lambda: renderer.render(payload, "application/json", context), number=number)
+                self.stdout.write(f"{label} {name}: {seconds * 1e6 / number:.1f} µs/次")
+            assert results["旧实现"] == results["预编译"], "两种实现的输出不一致"
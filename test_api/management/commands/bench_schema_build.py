@@ -0,0 +1,78 @@
+"""
+基准测试：大量使用 simple_extend_schema 的视图生成 schema 的耗时
+
+对比按内容哈希复用内联序列化器与旧实现（每次装饰都用随机名称新建序列化器）：
+
+    python manage.py bench_schema_build --views 200
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.urls import path
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework.views import APIView
+
+from mixins.schema.schema_utils import create_fields, simple_extend_schema
+
+RESPONSE_SPEC = {
+    "msg": "str",
+    "payload": {
+        "user_id": ("uuid", True, "用户ID"),
+        "created_at": ("datetime", True, "创建时间"),
+        "roles": ("list[str]", False, "角色列表"),
+    },
+}
+REQUEST_SPEC = {
+    "name": ("str", True, "用户姓名", None, "张三"),
+    "tags": ("list[str]", False, "标签数组"),
+    "gender": ("str", True, "性别", None, "male", ["male", "female", "other"]),
+}
+
+
+def legacy_extend_schema(responses, request_body):
+    """内容哈希之前的实现：每次装饰都新建随机名称的内联序列化器"""
+    return extend_schema(
+        request=inline_serializer(name=f"Req_{uuid.uuid4().hex[:6]}", fields=create_fields(request_body)),
+        responses={
+            code: inline_serializer(name=f"Resp{code}_{uuid.uuid4().hex[:6]}", fields=create_fields(schema))
+            for code, schema in responses.items()
+        },
+    )
+
+
+def build_patterns(decorator_factory, count):
+    patterns = []
+    for i in range(count):
+        def post(self, request):
+            pass
+        view = type(f"BenchView{i}", (APIView,), {"post": decorator_factory()(post)})
+        patterns.append(path(f"bench/{i}/", view.as_view()))
+    return patterns
+
+
+class Command(BaseCommand):
+    help = "对比内联序列化器复用前后的 schema 生成耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--views", type=int, default=200, help="视图数量")
+
+    def handle(self, *args, **options):
+        count = options["views"]
+        factories = {
+            "旧实现": lambda: legacy_extend_schema({200: RESPONSE_SPEC}, REQUEST_SPEC),
+            "内容哈希": lambda: simple_extend_schema(responses={200: RESPONSE_SPEC}, request_body=REQUEST_SPEC),
+        }
+        for name, factory in factories.items():
+            start = time.perf_counter()
+            patterns = build_patterns(factory, count)
+            decorated = time.perf_counter() - start
+            start = time.perf_counter()
+            schema = SchemaGenerator(patterns=patterns).get_schema(request=None, public=True)
+            generated = time.perf_counter() - start
+            self.stdout.write(
+                f"{name}: 装饰 {decorated * 1000:.0f} ms，生成 {generated * 1000:.0f} ms，"
+                f"组件 {len(schema['components']['schemas'])} 个"
+            )
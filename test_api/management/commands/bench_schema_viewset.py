@@ -0,0 +1,93 @@
+"""
+基准测试：SchemaModelViewSet 的请求吞吐
+
+对比在定义子类时装饰一次（__init_subclass__）与旧实现（每次实例化都在 __new__ 中重新装饰）：
+
+    python manage.py bench_schema_viewset
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from drf_spectacular.utils import extend_schema
+from rest_framework import viewsets
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from mixins.schema import SchemaModelViewSet
+from rbac_app.models import Role, User
+from rbac_app.serializers import RoleSerializer
+
+from ._bench import rollback_atomic
+
+
+class LegacySchemaModelViewSet(viewsets.ModelViewSet):
+    """改动之前的 SchemaModelViewSet：每次实例化都执行装饰"""
+
+    schema_summary_mapping = SchemaModelViewSet.schema_summary_mapping
+    schema_name = ""
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        cls._apply_schema_decorators(cls)
+        return instance
+
+    @classmethod
+    def _apply_schema_decorators(cls, subclass):
+        name = subclass.schema_name
+        if not name and subclass.__doc__:
+            name = subclass.__doc__.split('视图集')[0].strip()
+        if not name:
+            name = "对象"
+        for method_name, summary_template in cls.schema_summary_mapping.items():
+            if hasattr(subclass, method_name) and callable(getattr(subclass, method_name)):
+                method_func = getattr(subclass, method_name)
+                if not hasattr(method_func, '_spectacular_annotation'):
+                    summary = summary_template.format(name=name)
+                    setattr(subclass, method_name, extend_schema(summary=summary)(method_func))
+
+
+class LegacyRoleViewSet(LegacySchemaModelViewSet):
+    """角色视图集"""
+    queryset = Role.objects.order_by("id")
+    serializer_class = RoleSerializer
+
+
+class RoleViewSet(SchemaModelViewSet):
+    """角色视图集"""
+    queryset = Role.objects.order_by("id")
+    serializer_class = RoleSerializer
+
+
+class Command(BaseCommand):
+    help = "对比 SchemaModelViewSet 改为定义时装饰前后的请求吞吐"
+
+    def add_arguments(self, parser):
+        # 旧实现每次实例化都会在原有 schema 类上再叠加一层，耗时随请求数增长，次数不宜过大
+        parser.add_argument("--repeat", type=int, default=300)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        factory = APIRequestFactory(HTTP_HOST="localhost")
+        with rollback_atomic():
+            user = User.objects.create(username="bench_schema_viewset", is_superuser=True, is_staff=True)
+            role = Role.objects.create(name="bench_schema_viewset")
+            for label, viewset in (("定义时装饰", RoleViewSet), ("旧实现", LegacyRoleViewSet)):
+                views = {
+                    "list": (viewset.as_view({"get": "list"}), lambda: factory.get("/", {"page_size": 1})),
+                    "retrieve": (viewset.as_view({"get": "retrieve"}), lambda: factory.get("/")),
+                }
+                for action, (view, make_request) in views.items():
+                    kwargs = {"pk": role.pk} if action == "retrieve" else {}
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        request = make_request()
+                        force_authenticate(request, user)
+                        view(request, **kwargs).render()
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(f"{label} {action}: {repeat / elapsed:.0f} 请求/秒")
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    viewset()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label} 实例化: {elapsed * 1e6 / (repeat):.2f} µs/次")
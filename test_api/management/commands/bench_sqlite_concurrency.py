@@ -0,0 +1,112 @@
+"""
+基准测试：SQLite 并发读写
+
+在临时数据库文件上分别使用 Django 默认配置与生产配置（config/sqlite.py），
+多个线程同时读、写（写事务先读后写），统计吞吐量与 "database is locked" 错误数：
+
+    python manage.py bench_sqlite_concurrency --readers 8 --writers 4 --seconds 5
+"""
+
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from config.sqlite import PROFILES, sqlite_database
+
+
+def _register(alias, database):
+    """临时注册数据库别名（补全 Django 的默认配置项）"""
+    databases = {DEFAULT_DB_ALIAS: dict(connections.settings[DEFAULT_DB_ALIAS]), alias: database}
+    connections.settings[alias] = connections.configure_settings(databases)[alias]
+
+
+def _unregister(alias):
+    connections[alias].close()
+    del connections.settings[alias]
+
+
+class Command(BaseCommand):
+    help = "对比 SQLite 默认配置与生产配置的并发读写吞吐量"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8, help="读线程数")
+        parser.add_argument("--writers", type=int, default=4, help="写线程数")
+        parser.add_argument("--seconds", type=float, default=5.0, help="每种配置的运行时间")
+        parser.add_argument("--rows", type=int, default=20000, help="初始数据行数")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in PROFILES:
+                alias = f"bench_{profile}"
+                _register(alias, sqlite_database(Path(directory) / f"{profile}.sqlite3", profile=profile))
+                try:
+                    self.prepare(alias, options["rows"])
+                    result = self.run(alias, options)
+                finally:
+                    _unregister(alias)
+                self.stdout.write(
+                    f"{profile:<10} 读 {result['reads'] / options['seconds']:>8.0f} 次/秒, "
+                    f"写 {result['writes'] / options['seconds']:>7.0f} 次/秒, "
+                    f"锁错误 {result['locked']}"
+                )
+
+    def prepare(self, alias, rows):
+        with connections[alias].cursor() as cursor:
+            cursor.execute("CREATE TABLE bench_item (id INTEGER PRIMARY KEY, grp INTEGER, value INTEGER)")
+            cursor.executemany(
+                "INSERT INTO bench_item (grp, value) VALUES (%s, %s)",
+                [(i % 100, i) for i in range(rows)],
+            )
+
+    def run(self, alias, options):
+        deadline = time.monotonic() + options["seconds"]
+        counters = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+
+        def count(key):
+            with lock:
+                counters[key] += 1
+
+        def reader():
+            try:
+                while time.monotonic() < deadline:
+                    try:
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute(
+                                "SELECT COUNT(*), SUM(value) FROM bench_item WHERE grp = %s", [random.randrange(100)]
+                            )
+                            cursor.fetchone()
+                        count("reads")
+                    except OperationalError:
+                        count("locked")
+            finally:
+                connections[alias].close()
+
+        def writer():
+            try:
+                while time.monotonic() < deadline:
+                    try:
+                        # 先读后写：默认的 BEGIN（DEFERRED）在升级为写锁时可能直接失败
+                        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                            grp = random.randrange(100)
+                            cursor.execute("SELECT MAX(value) FROM bench_item WHERE grp = %s", [grp])
+                            value = cursor.fetchone()[0] or 0
+                            cursor.execute("INSERT INTO bench_item (grp, value) VALUES (%s, %s)", [grp, value + 1])
+                        count("writes")
+                    except OperationalError:
+                        count("locked")
+            finally:
+                connections[alias].close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        threads += [threading.Thread(target=writer) for _ in range(options["writers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counters
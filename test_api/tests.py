@@ -1,3 +1,19 @@
+import json
+
 from django.test import TestCase
 
-# Create your tests here.
+
+class HelloWorldViewTests(TestCase):
+    """GET /test/ 按 parameters 校验查询参数：name 必填，age 为整数"""
+
+    def test_query_params_validated(self):
+        response = self.client.get("/test/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)["data"], {"name": "该参数为必填项"})
+
+        response = self.client.get("/test/", {"name": "张三", "age": "x"})
+        self.assertEqual(json.loads(response.content)["data"], {"age": "请输入合法的整数"})
+
+        response = self.client.get("/test/", {"name": "张三", "age": "18"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["data"], {"id": 23})
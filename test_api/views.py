@@ -1,8 +1,8 @@
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import inline_serializer, extend_schema, OpenApiParameter
 from rest_framework import serializers
-from rest_framework.views import APIView
 from config.renderers import custom_response
+from mixins.view import AsyncAPIView
 from utils.test_utils import  simple_extend_schema
 
 
@@ -10,7 +10,7 @@ class HelloWorldDataSerializer(serializers.Serializer):
     id = serializers.CharField()
 
 
-class HelloWorldView(APIView):
+class HelloWorldView(AsyncAPIView):
     # 序列化器声明data的schema
     # serializer_class = HelloWorldDataSerializer
 
@@ -65,9 +65,11 @@ class HelloWorldView(APIView):
                     "payload": "dict"
                 }
             }
-        }
+        },
+        # 按 parameters 校验查询参数，结果在 request.validated_params 中
+        validate_params=True,
     )
-    def get(self, request):
+    async def get(self, request):
         #返回数据要三段式符合要求
         return custom_response(data={"id":23},code=23)
 
@@ -109,7 +111,7 @@ class HelloWorldView(APIView):
         }
 
     )
-    def post(self, request):
+    async def post(self, request):
         # 这里返回示例
         data = {
             "id": 1001,